@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -9,6 +10,9 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv("DJANGO_SECRET")
+if "test" in sys.argv and not SECRET_KEY:
+    # Signed values (e.g. the replica pin) need a key
+    SECRET_KEY = "insecure-test-only-key"
 DEBUG = os.getenv("DEBUG", "1") == "1"
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "*").split(",")
 
@@ -23,7 +27,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'core.middleware.SimpleCorsMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryCountMiddleware',
     'core.middleware.ApiKeyMiddleware',
+    'core.middleware.AdmissionControlMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.CacheGenerationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -49,26 +58,122 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DB_POOL=1 makes each worker keep a pool of MySQL connections (core.db.backends.mysqlpool),
+# so requests skip the connect, TLS and auth handshakes. It is off by default until it has
+# run against production traffic; the default opens one connection per request. Size it per
+# worker: the server needs GUNICORN_WORKERS * (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW)
+# connections at peak. Keep DB_POOL_RECYCLE below the server's wait_timeout.
+DB_POOL = os.getenv("DB_POOL", "0") == "1"
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": "core.db.backends.mysqlpool" if DB_POOL else "django.db.backends.mysql",
         "NAME": os.getenv("DB_NAME"),
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASS"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
         "OPTIONS": {"charset": "utf8mb4"},
+        "POOL": {
+            "size": int(os.getenv("DB_POOL_SIZE", "4")),
+            "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", "4")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "5")),
+            "recycle": float(os.getenv("DB_POOL_RECYCLE", "1800")),
+            "pre_ping_after": float(os.getenv("DB_POOL_PRE_PING_AFTER", "10")),
+        },
     }
 }
 
-# Use SQLite for tests to avoid external DB dependency
+# Read replicas: DB_REPLICA_HOSTS=host[:port],... adds one alias per replica, with the
+# primary's credentials. Reads go to a random replica, writes and the reads of write
+# requests to the primary, and a client's reads stay on the primary for
+# REPLICA_STICKY_SECONDS after it wrote (keep it above the usual replication lag).
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1):
+    host, _, port = replica.strip().partition(":")
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"], "HOST": host, "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{index}")
+DATABASE_ROUTERS = ["core.db.routing.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+# Use SQLite for tests to avoid external DB dependency. The second database stands in for
+# a replica: it gets its own schema, and routing tests list it in DATABASE_REPLICAS.
 if "test" in sys.argv:
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
-        }
+        },
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db-replica.sqlite3",
+        },
+    }
+    DATABASE_REPLICAS = []
+
+# Cache
+# The catalog cache keeps an in-process LRU in front of this cache. Use a backend that is
+# shared between gunicorn workers (file based by default, or e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache with CACHE_LOCATION=redis://...)
+# so catalog invalidations reach every worker.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "/tmp/roosh-cache"),
     }
+}
+if "test" in sys.argv:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "300"))
+CATALOG_CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_LOCAL_MAX_ENTRIES", "2048"))
+CATALOG_CACHE_LOCAL_TTL = int(os.getenv("CATALOG_CACHE_LOCAL_TTL", "60"))
+
+# Metrics
+# Each process writes its metrics to METRICS_DIR at most every METRICS_FLUSH_SECONDS;
+# GET /v1/metrics/ merges the files of all workers. Use a directory private to the container.
+METRICS_DIR = os.getenv("METRICS_DIR", "/tmp/roosh-metrics")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "1"))
+if "test" in sys.argv:
+    METRICS_DIR = os.path.join(tempfile.gettempdir(), f"roosh-metrics-test-{os.getpid()}")
+
+# Query instrumentation (QueryCountMiddleware)
+QUERY_DEBUG_HEADERS = os.getenv("QUERY_DEBUG_HEADERS", "1" if DEBUG else "0") == "1"
+QUERY_LOG = os.getenv("QUERY_LOG", "0") == "1"
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "3"))
+# Per-route overrides of the views' @query_budget, e.g. {"v1/getproducts/": 4}
+QUERY_BUDGETS = {}
+QUERY_BUDGET_STRICT = "test" in sys.argv
+if "test" in sys.argv:
+    QUERY_DEBUG_HEADERS = True
+
+# Admission control (AdmissionControlMiddleware)
+# In-flight requests per route class for the whole container, and the longest a request
+# waits for a slot before it gets a 503. Bulk imports run for minutes, so they have a
+# class of their own: one at a time, and a second one is turned away at once instead of
+# holding a write slot. With sync workers, reads always find a free worker while
+# GUNICORN_WORKERS is above the write, email_write and import limits together, so the
+# write limit defaults to the workers those leave over, minus one kept for reads.
+GUNICORN_WORKERS = int(os.getenv("GUNICORN_WORKERS", "4"))
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+_ADMISSION_EMAIL_WRITE_LIMIT = int(os.getenv("ADMISSION_EMAIL_WRITE_LIMIT", "1"))
+_ADMISSION_IMPORT_LIMIT = int(os.getenv("ADMISSION_IMPORT_LIMIT", "1"))
+_ADMISSION_WRITE_LIMIT = int(os.getenv(
+    "ADMISSION_WRITE_LIMIT", str(max(GUNICORN_WORKERS - 1 - _ADMISSION_EMAIL_WRITE_LIMIT - _ADMISSION_IMPORT_LIMIT, 1))
+))
+ADMISSION_CLASSES = {
+    "read": (int(os.getenv("ADMISSION_READ_LIMIT", "64")), float(os.getenv("ADMISSION_READ_WAIT", "0.5"))),
+    "write": (_ADMISSION_WRITE_LIMIT, float(os.getenv("ADMISSION_WRITE_WAIT", "2"))),
+    "email_write": (_ADMISSION_EMAIL_WRITE_LIMIT, float(os.getenv("ADMISSION_EMAIL_WRITE_WAIT", "2"))),
+    "import": (_ADMISSION_IMPORT_LIMIT, float(os.getenv("ADMISSION_IMPORT_WAIT", "0"))),
+}
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+# Lock files shared by the workers; use a directory private to the container
+ADMISSION_DIR = os.getenv("ADMISSION_DIR", "/tmp/roosh-admission")
+if "test" in sys.argv:
+    ADMISSION_DIR = os.path.join(tempfile.gettempdir(), f"roosh-admission-test-{os.getpid()}")
 
 # Password validation (disabled)
 AUTH_PASSWORD_VALIDATORS = []
@@ -94,6 +199,34 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Bookings
+# Reject bookings whose total_price differs from the server-side quote (see /v1/quote/).
+# Off by default: clients that compute their own totals must move to /v1/quote/ first.
+BOOKING_VERIFY_PRICE = os.getenv("BOOKING_VERIFY_PRICE", "0") == "1"
+
+# Idempotency keys
+# Responses to write requests sent with an Idempotency-Key header are replayed to retries
+# for IDEMPOTENCY_TTL_SECONDS; `manage.py purge_idempotency_keys` deletes expired keys
+# IDEMPOTENCY_PURGE_BATCH_SIZE rows at a time.
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_PURGE_BATCH_SIZE = int(os.getenv("IDEMPOTENCY_PURGE_BATCH_SIZE", "1000"))
+
+# Email outbox
+# Booking emails are queued in core.EmailOutbox and delivered by `manage.py drain_outbox`.
+# MAIL_SENDER is the dotted path of the callable used to deliver a single message and
+# MAIL_BULK_SENDER the one that delivers a batch of messages of one kind (leave empty to
+# send one by one). Point both at utilities.fakemailerutility to run without SES.
+MAIL_SENDER = os.getenv("MAIL_SENDER", "utilities.mailerutility.send_mail")
+MAIL_BULK_SENDER = os.getenv("MAIL_BULK_SENDER", "utilities.mailerutility.send_bulk_mail")
+if "test" in sys.argv:
+    MAIL_SENDER = "utilities.fakemailerutility.send_mail"
+    MAIL_BULK_SENDER = "utilities.fakemailerutility.send_bulk_mail"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE_SECONDS = int(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [],
     "DEFAULT_PERMISSION_CLASSES": ["rest_framework.permissions.AllowAny"],
@@ -1,22 +1,42 @@
 from django.urls import path
 from core.views import health, getbooking
 from core.views import getproducts
+from core.views import searchproducts
+from core.views import productfacets
 from core.views import createproduct
+from core.views import importproducts
 from core.views import getproduct
 from core.views import createbooking
+from core.views import createbookings
 from core.views import cancelbooking
+from core.views import cancelbookingbytoken
 from core.views import getbookings
+from core.views import getbookingbytoken
+from core.views import resellerreport
+from core.views import cachestats
+from core.views import quote
+from core.views import metrics
 
 
 urlpatterns = [
     path("v1/health/", health),
     path("v1/getproducts/", getproducts),
+    path("v1/searchproducts/", searchproducts),
+    path("v1/productfacets/", productfacets),
     path("v1/createproduct/", createproduct),
+    path("v1/importproducts/", importproducts),
     path("v1/getproduct/<int:product_id>/", getproduct),
     path("v1/createbooking/", createbooking),
+    path("v1/createbookings/", createbookings),
     path("v1/cancelbooking/<int:booking_id>/", cancelbooking),
+    path("v1/cancelbooking/token/<str:token>/", cancelbookingbytoken),
     path("v1/getbookings/<str:customer_email>/", getbookings),
     path("v1/getbooking/<int:booking_id>/", getbooking),
+    path("v1/getbooking/token/<str:token>/", getbookingbytoken),
+    path("v1/resellerreport/<int:reseller_id>/", resellerreport),
+    path("v1/cachestats/", cachestats),
+    path("v1/quote/", quote),
+    path("v1/metrics/", metrics),
 ]
 
 # JSON error handlers
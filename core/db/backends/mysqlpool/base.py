@@ -0,0 +1,64 @@
+"""
+MySQL backend that checks connections out of a per-process pool (core.db.pool) instead
+of opening one per request.
+
+Django still "connects" and "closes" per request (CONN_MAX_AGE=0); here that means
+taking a connection from the pool and handing it back, so the TCP, TLS and auth
+handshakes and the session SETs only happen for new connections. Configure the pool
+with DATABASES[alias]["POOL"], see ConnectionPool for the options.
+"""
+from django.db.backends.mysql import base as mysql
+from core.db.pool import get_pool
+
+
+def _connect(conn_params: dict):
+    connection = mysql.Database.connect(**conn_params)
+    # Same workaround as django.db.backends.mysql
+    if connection.encoders.get(bytes) is bytes:
+        connection.encoders.pop(bytes)
+    return connection
+
+
+def _ping(connection):
+    connection.ping()
+
+
+class DatabaseWrapper(mysql.DatabaseWrapper):
+    _pool = None
+    _pool_fresh = True
+
+    def get_new_connection(self, conn_params):
+        self._pool = get_pool(
+            self.alias, lambda: _connect(conn_params), ping=_ping, **self.settings_dict.get("POOL", {}),
+        )
+        connection, self._pool_fresh = self._pool.acquire()
+        return connection
+
+    def init_connection_state(self):
+        # A reused connection keeps the session settings made when it was opened
+        if self._pool_fresh:
+            super().init_connection_state()
+
+    def _set_autocommit(self, autocommit):
+        # Connections go back to the pool in autocommit mode; don't send it again
+        if self.connection.get_autocommit() != autocommit:
+            super()._set_autocommit(autocommit)
+
+    def _close(self):
+        connection, self.connection = self.connection, None
+        if connection is None:
+            return
+        discard = False
+        try:
+            if not connection.get_autocommit():
+                # Closed inside a transaction: don't let the next request see it
+                connection.rollback()
+                connection.autocommit(True)
+        except mysql.Database.Error:
+            discard = True
+        if self.errors_occurred and not discard:
+            try:
+                connection.ping()
+            except mysql.Database.Error:
+                discard = True
+        self._pool.release(connection, discard=discard)
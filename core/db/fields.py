@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class FixedBinaryField(models.BinaryField):
+    """
+    Fixed-width binary column (BINARY(n) on MySQL) that can be indexed. Django's
+    BinaryField is a LONGBLOB on MySQL, which needs a prefix length to be indexed.
+    """
+
+    def db_type(self, connection):
+        if connection.vendor == "mysql":
+            return f"binary({self.max_length})"
+        return super().db_type(connection)
+
+
+class BinaryCollationCharField(models.CharField):
+    """
+    CharField compared and sorted by code point on every backend. On MySQL the column
+    gets the utf8mb4_bin collation instead of the accent- and case-insensitive default
+    (utf8mb4_0900_ai_ci), under which e.g. "é" sorts equal to "e"; SQLite already
+    compares text bytewise.
+    """
+
+    def db_parameters(self, connection):
+        db_params = super().db_parameters(connection)
+        if connection.vendor == "mysql":
+            db_params["collation"] = "utf8mb4_bin"
+        return db_params
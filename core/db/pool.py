@@ -0,0 +1,224 @@
+"""
+Thread-safe DB-API connection pool, one per database alias and process.
+
+Connections are handed out most recently used first, so a quiet worker keeps a few warm
+connections while the rest age out. Before reuse a connection is:
+
+- recycled (closed and replaced) once it is older than `recycle` seconds, which keeps it
+  well below the server's wait_timeout;
+- pinged if it sat idle longer than `pre_ping_after` seconds, and replaced if the ping
+  fails (e.g. the server dropped it overnight).
+
+Up to `size` connections are kept open; `max_overflow` more may be opened under load and
+are closed when returned. When all are in use, acquire() waits up to `timeout` seconds
+and then raises PoolTimeout.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from django.db.utils import OperationalError
+from utilities.metricsutility import registry
+
+registry.describe("db_pool_connections", "gauge", "Pooled database connections by state (idle, in_use)")
+registry.describe("db_pool_size", "gauge", "Connections a pool keeps open (without overflow)")
+registry.describe("db_pool_connects_total", "counter", "New database connections opened by the pool")
+registry.describe("db_pool_recycled_total", "counter", "Pooled connections replaced, by reason (age, ping, error)")
+registry.describe("db_pool_timeouts_total", "counter", "Checkouts that gave up waiting for a free connection")
+registry.describe(
+    "db_pool_wait_seconds", "histogram", "Time spent waiting for a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+
+class PoolTimeout(OperationalError):
+    """Raised when no connection became free within the pool's timeout."""
+
+
+@dataclass
+class _Entry:
+    connection: object
+    created_at: float
+    last_used: float
+
+
+class ConnectionPool:
+    def __init__(
+        self, name: str, connect, *, ping=None, size: int = 5, max_overflow: int = 5,
+        timeout: float = 10.0, recycle: float = 1800.0, pre_ping_after: float = 10.0,
+    ):
+        """
+        connect() opens a new DB-API connection; ping(connection) raises if it is unusable
+        (defaults to running SELECT 1).
+        """
+        self.name = name
+        self._connect = connect
+        self._ping = ping or _select_one
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping_after = pre_ping_after
+        self._cond = threading.Condition()
+        self._idle: list[_Entry] = []
+        self._in_use: dict[int, _Entry] = {}
+        # Idle plus in use plus being opened
+        self._open = 0
+        self._labels = {"alias": name}
+        registry.set_gauge("db_pool_size", size, self._labels)
+
+    def acquire(self) -> tuple[object, bool]:
+        """Checks out a connection; returns (connection, fresh), fresh if it was just opened."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    registry.inc("db_pool_timeouts_total", self._labels)
+                    raise PoolTimeout(
+                        f"No database connection free in pool '{self.name}' after {self.timeout}s "
+                        f"({self.size} + {self.max_overflow} overflow in use)"
+                    )
+                self._cond.wait(remaining)
+        registry.observe("db_pool_wait_seconds", time.monotonic() - started, self._labels)
+
+        fresh = entry is None
+        if fresh:
+            entry = self._open_entry()
+        else:
+            entry, fresh = self._validate(entry)
+        with self._cond:
+            self._in_use[id(entry.connection)] = entry
+        self._report()
+        return entry.connection, fresh
+
+    def release(self, connection, discard: bool = False):
+        """Returns a connection; discard closes it instead (e.g. after a connection error)."""
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+        if entry is None:
+            # Not ours (e.g. checked out before a fork); just close it
+            _close(connection)
+            return
+        with self._cond:
+            keep = not discard and self._open <= self.size
+            if keep:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if not keep:
+            if discard:
+                registry.inc("db_pool_recycled_total", {**self._labels, "reason": "error"})
+            _close(connection)
+        self._report()
+
+    def close(self):
+        """Closes the idle connections; checked out ones are closed when released."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            _close(entry.connection)
+        self._report()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "open": self._open,
+            }
+
+    def _open_entry(self) -> _Entry:
+        try:
+            connection = self._connect()
+        except BaseException:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        registry.inc("db_pool_connects_total", self._labels)
+        now = time.monotonic()
+        return _Entry(connection, now, now)
+
+    def _validate(self, entry: _Entry) -> tuple[_Entry, bool]:
+        now = time.monotonic()
+        if now - entry.created_at >= self.recycle:
+            reason = "age"
+        elif now - entry.last_used >= self.pre_ping_after and not self._alive(entry.connection):
+            reason = "ping"
+        else:
+            return entry, False
+        registry.inc("db_pool_recycled_total", {**self._labels, "reason": reason})
+        _close(entry.connection)
+        # The slot stays counted in _open; _open_entry gives it back if connecting fails
+        return self._open_entry(), True
+
+    def _alive(self, connection) -> bool:
+        try:
+            self._ping(connection)
+            return True
+        except Exception:
+            return False
+
+    def _report(self):
+        with self._cond:
+            idle, in_use = len(self._idle), len(self._in_use)
+        registry.set_gauge("db_pool_connections", idle, {**self._labels, "state": "idle"})
+        registry.set_gauge("db_pool_connections", in_use, {**self._labels, "state": "in_use"})
+
+
+def _select_one(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_pid = os.getpid()
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str, connect, **options) -> ConnectionPool:
+    """
+    The process's pool for `name`, created on first use. A forked worker starts with no
+    pools: connections inherited from the parent must not be shared between processes.
+    """
+    global _pools, _pools_pid
+    with _pools_lock:
+        if _pools_pid != os.getpid():
+            _pools, _pools_pid = {}, os.getpid()
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = ConnectionPool(name, connect, **options)
+        return pool
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values()) if _pools_pid == os.getpid() else []
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,92 @@
+"""
+Read replica routing with read-your-writes stickiness.
+
+ReplicaRouter sends reads to one of settings.DATABASE_REPLICAS and everything else to
+the primary ("default"). Reads go to the primary as well when
+
+- the current context is pinned to it (see primary() and ReplicaRoutingMiddleware:
+  write requests, and a client's requests for REPLICA_STICKY_SECONDS after its last
+  write), or
+- the primary has a transaction open, so reads inside atomic() (select_for_update, the
+  overlap checks) see the transaction's own writes and lock rows where they are written.
+
+The pin lives in a ContextVar, so it follows async views into the threads that run
+their ORM calls.
+"""
+import random
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+
+_pinned: ContextVar[bool] = ContextVar("db_primary_pinned", default=False)
+_PIN_SALT = "core.db.routing.pin"
+
+
+def pin():
+    """Routes this context's reads to the primary until unpin(token)."""
+    return _pinned.set(True)
+
+
+def unpin(token):
+    try:
+        _pinned.reset(token)
+    except ValueError:
+        # Finished from another context (e.g. a stream closed by the server)
+        _pinned.set(False)
+
+
+@contextmanager
+def primary():
+    token = pin()
+    try:
+        yield
+    finally:
+        unpin(token)
+
+
+def after_change(age: float | None):
+    """
+    Context for refilling a cache whose data changed `age` seconds ago: the primary
+    while replicas may still lag behind the change, so no stale rows get cached.
+    """
+    if age is not None and age < settings.REPLICA_STICKY_SECONDS:
+        return primary()
+    return nullcontext()
+
+
+def make_pin_token() -> str:
+    """A signed, timestamped token a client returns to keep its reads on the primary."""
+    return signing.TimestampSigner(salt=_PIN_SALT).sign("primary")
+
+
+def valid_pin_token(token: str | None) -> bool:
+    if not token:
+        return False
+    try:
+        signing.TimestampSigner(salt=_PIN_SALT).unsign(token, max_age=settings.REPLICA_STICKY_SECONDS)
+        return True
+    except signing.BadSignature:
+        return False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or _pinned.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,30 @@
+"""
+Transactions whose reads all see one snapshot of the database.
+
+Django's MySQL backend runs transactions at READ COMMITTED, where every statement reads
+the latest committed rows. A job that compares two tables with several reads (e.g. the
+bookings and their rollups) would then see a write that lands between the reads on one
+side only. Inside repeatable_read() plain reads come from the snapshot taken by the
+transaction's first read, while writes and locking reads still act on the latest rows,
+so increments computed from the snapshot add up with the ones committed since.
+
+SQLite read transactions already see a single snapshot.
+"""
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def repeatable_read(using: str = DEFAULT_DB_ALIAS):
+    """
+    atomic() at REPEATABLE READ. Nested in an open transaction it joins that one, whose
+    isolation level can no longer change.
+    """
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(using=using):
+        if outermost and connection.vendor == "mysql":
+            # Applies to this transaction only; it has not read anything yet
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        yield
@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+@dataclass(frozen=True)
+class ProductSearchDTO:
+    type: str | None = None
+    reseller_id: int | None = None
+    min_price: Decimal | None = None
+    max_price: Decimal | None = None
+    min_rating: Decimal | None = None
+    # Lowercase name prefix
+    name_prefix: str | None = None
+    # A key of SEARCH_SORT_COLUMNS, "-" in front for descending
+    sort: str = "-rating"
+    # (sort value, product_id) of the last row of the previous page
+    after: tuple | None = None
+    limit: int = 25
@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+@dataclass
+class QuoteItemDTO:
+    product_id: int
+    start_date: datetime
+    end_date: datetime
@@ -0,0 +1,54 @@
+import logging
+import signal
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core.service.outbox_service import OutboxService
+from utilities.mailerutility import get_ses_stats
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Delivers queued booking emails from the email outbox, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument("--idle-sleep", type=float, default=2.0,
+                            help="Seconds to wait when no messages are due.")
+        parser.add_argument("--once", action="store_true",
+                            help="Drain everything that is currently due and exit.")
+        parser.add_argument("--stats-interval", type=float, default=60.0,
+                            help="Seconds between SES latency / circuit breaker log lines.")
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        totals = {"sent": 0, "retried": 0, "failed": 0, "deferred": 0}
+        last_stats = time.monotonic()
+        while not self._stopping:
+            if time.monotonic() - last_stats >= options["stats_interval"]:
+                logger.info("SES stats: %s", get_ses_stats())
+                last_stats = time.monotonic()
+
+            close_old_connections()
+            result = OutboxService.drain(options["batch_size"])
+            for key, value in result.items():
+                totals[key] += value
+
+            if any(result.values()):
+                logger.info("Outbox batch: %s", result)
+                continue
+
+            if options["once"]:
+                break
+            time.sleep(options["idle_sleep"])
+
+        self.stdout.write(f"Outbox drained: {totals}")
+        self.stdout.write(f"SES stats: {get_ses_stats()}")
+
+    def _stop(self, signum, frame):
+        self._stopping = True
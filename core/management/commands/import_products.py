@@ -0,0 +1,33 @@
+import json
+import sys
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from core.service.product_import_service import ProductImportService
+
+
+class Command(BaseCommand):
+    help = "Streams a reseller product catalog (NDJSON or CSV) into the Product table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin.")
+        parser.add_argument("--format", choices=["ndjson", "csv"],
+                            help="Defaults to the file extension (.csv, otherwise NDJSON).")
+        parser.add_argument("--chunk-size", type=int, default=ProductImportService.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("csv" if path.lower().endswith(".csv") else "ndjson")
+
+        try:
+            # Bytes, so the import reports lines that are not UTF-8 instead of stopping at them
+            if path == "-":
+                summary = ProductImportService.import_stream(sys.stdin.buffer, fmt, options["chunk_size"])
+            else:
+                with Path(path).open("rb") as handle:
+                    summary = ProductImportService.import_stream(handle, fmt, options["chunk_size"])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for rejection in summary["rejected"]:
+            self.stderr.write(f"line {rejection['line']}: {rejection['error']}")
+        self.stdout.write(json.dumps({k: v for k, v in summary.items() if k != "rejected"}))
@@ -0,0 +1,31 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.db import routing
+from core.repository.idempotency_repository import IdempotencyRepository
+
+
+class Command(BaseCommand):
+    help = "Deletes expired idempotency keys in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.IDEMPOTENCY_PURGE_BATCH_SIZE)
+        parser.add_argument("--pause", type=float, default=0.0,
+                            help="Seconds to sleep between batches, to spread the load on the primary.")
+
+    def handle(self, *args, **options):
+        # Keys that expire while the command runs are left for the next run
+        now = timezone.now()
+        deleted = batches = 0
+        # Select the expired ids on the primary too; a lagging replica would return deleted ones
+        with routing.primary():
+            while True:
+                count = IdempotencyRepository.purge_expired(options["batch_size"], now)
+                deleted += count
+                batches += 1 if count else 0
+                if count < options["batch_size"]:
+                    break
+                if options["pause"]:
+                    time.sleep(options["pause"])
+        self.stdout.write(self.style.SUCCESS(f"Idempotency keys purged: {deleted} in {batches} batch(es)."))
@@ -1,6 +1,33 @@
+import json
+import logging
 import os
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import JsonResponse, HttpResponse
 from django.conf import settings
+from django.urls import Resolver404, resolve
+from core.db import routing
+from utilities import querycountutility
+from utilities.admissionutility import SlotLimiter, view_admission_class
+from utilities.cacheutility import generation_scope
+from utilities.metricsutility import registry
+from utilities.querycountutility import QueryBudgetExceeded
+
+query_logger = logging.getLogger("core.queries")
+
+
+def _error_response(message: str, code: int) -> JsonResponse:
+    """The error envelope of the middleware's own responses."""
+    return JsonResponse(
+        {
+            "status": "error",
+            "data": {
+                "message": message,
+                "code": code,
+            },
+        },
+        status=code,
+    )
 
 
 class SimpleCorsMiddleware:
@@ -9,11 +36,17 @@ class SimpleCorsMiddleware:
 
     - Allows all origins by default (or restrict via env CORS_ALLOWED_ORIGINS=origin1,origin2)
     - Handles preflight OPTIONS requests before other middlewares (should be placed first)
-    - Adds the appropriate CORS headers to all responses
+    - Adds the appropriate CORS headers to all responses and exposes the ETag header
+    - Sync and async capable, so ASGI requests are not adapted through a thread
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
         allowed = os.getenv("CORS_ALLOWED_ORIGINS")
         self.allowed_origins = (
             [o.strip() for o in allowed.split(",") if o.strip()]
@@ -30,27 +63,43 @@ class SimpleCorsMiddleware:
 
         return origin if origin in self.allowed_origins else None
 
-    def __call__(self, request):
-        origin = request.headers.get("Origin")
-        allow_origin = self._get_allow_origin(origin)
+    def _preflight(self, allow_origin: str | None) -> HttpResponse:
+        resp = HttpResponse(status=200)
+        if allow_origin:
+            resp["Access-Control-Allow-Origin"] = allow_origin
+            resp["Vary"] = "Origin"
+            resp["Access-Control-Allow-Methods"] = "GET, POST, DELETE, OPTIONS"
+            resp["Access-Control-Allow-Headers"] = "Content-Type, X-API-Key, If-None-Match, X-DB-Pin, Idempotency-Key"
+            resp["Access-Control-Max-Age"] = "86400"
+        return resp
 
-        # Short-circuit preflight with proper CORS headers
-        if request.method == "OPTIONS":
-            resp = HttpResponse(status=200)
-            if allow_origin:
-                resp["Access-Control-Allow-Origin"] = allow_origin
-                resp["Vary"] = "Origin"
-                resp["Access-Control-Allow-Methods"] = "GET, POST, DELETE, OPTIONS"
-                resp["Access-Control-Allow-Headers"] = "Content-Type, X-API-Key"
-                resp["Access-Control-Max-Age"] = "86400"
-            return resp
-
-        response = self.get_response(request)
+    def _add_headers(self, response, allow_origin: str | None):
         if allow_origin:
             response["Access-Control-Allow-Origin"] = allow_origin
             response["Vary"] = "Origin"
+            # Let browser clients read the ETag for conditional requests, the read-your-writes
+            # pin and whether a response was replayed for an Idempotency-Key
+            response["Access-Control-Expose-Headers"] = "ETag, X-DB-Pin, Idempotent-Replayed"
         return response
 
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        allow_origin = self._get_allow_origin(request.headers.get("Origin"))
+
+        # Short-circuit preflight with proper CORS headers
+        if request.method == "OPTIONS":
+            return self._preflight(allow_origin)
+
+        return self._add_headers(self.get_response(request), allow_origin)
+
+    async def __acall__(self, request):
+        allow_origin = self._get_allow_origin(request.headers.get("Origin"))
+        if request.method == "OPTIONS":
+            return self._preflight(allow_origin)
+        return self._add_headers(await self.get_response(request), allow_origin)
+
 
 class ApiKeyMiddleware:
     """
@@ -60,39 +109,452 @@ class ApiKeyMiddleware:
     - Accepts credentials via header "X-API-Key" or query param "api_key".
     - Returns JSON 401 on missing/invalid key; JSON 500 if API key is not configured.
     - Catches unhandled exceptions downstream and returns a JSON 500 to ensure API consistency.
+    - Sync and async capable, like SimpleCorsMiddleware.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _authorized(request) -> bool:
+        expected = os.getenv("API_KEY")
+        supplied = request.headers.get("X-API-Key") or request.GET.get("api_key") or ""
+        return bool(supplied) and supplied == expected
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         # Allow unauthenticated CORS preflight requests
         if request.method == "OPTIONS":
             return self.get_response(request)
 
-        expected = os.getenv("API_KEY")
-        supplied = request.headers.get("X-API-Key") or request.GET.get("api_key") or ""
-        if not supplied or supplied != expected:
-            return JsonResponse(
-                {
-                    "status": "error",
-                    "data": {
-                        "message": "Invalid API key",
-                        "code": 401,
-                    },
-                },
-                status=401,
-            )
+        if not self._authorized(request):
+            return _error_response("Invalid API key", 401)
 
         # Auth OK — protect against unhandled exceptions to avoid HTML 500s
         try:
             return self.get_response(request)
         except Exception:
-            payload = {
-                "status": "error",
-                "data": {
-                    "message": "Internal server error",
-                    "code": 500,
-                },
-            }
-            return JsonResponse(payload, status=500)
+            return _error_response("Internal server error", 500)
+
+    async def __acall__(self, request):
+        if request.method == "OPTIONS":
+            return await self.get_response(request)
+
+        if not self._authorized(request):
+            return _error_response("Invalid API key", 401)
+
+        try:
+            return await self.get_response(request)
+        except Exception:
+            return _error_response("Internal server error", 500)
+
+
+registry.describe("http_requests_total", "counter", "Requests by route pattern, method and status code.")
+registry.describe("http_request_duration_seconds", "histogram", "Time until the response is returned, by route pattern and method.")
+
+
+class MetricsMiddleware:
+    """
+    Records request counts, status codes and latency per resolved URL pattern
+    (e.g. "v1/getproduct/<int:product_id>/"), never per raw path, so the number of series
+    stays bounded. Requests that never resolve to a route (401s, 404s) are recorded
+    under "unmatched". Latency is measured until the response is returned, so for
+    streamed responses it is the time to the first byte.
+
+    Place it before ApiKeyMiddleware so rejected requests are counted too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _record(request, status: int, started: float):
+        elapsed = time.perf_counter() - started
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "unmatched"
+        labels = {"route": route, "method": request.method}
+        registry.observe("http_request_duration_seconds", elapsed, labels)
+        registry.inc("http_requests_total", {**labels, "status": str(status)})
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._record(request, status, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self._record(request, status, started)
+
+
+class QueryCountMiddleware:
+    """
+    Counts the database queries, their total time and repeated statement shapes of
+    each request.
+
+    - Adds X-DB-Queries, X-DB-Time-Ms and X-DB-Repeated headers when QUERY_DEBUG_HEADERS is on.
+    - Logs a JSON line to the "core.queries" logger: a warning when the view's query budget
+      is exceeded, info when a statement shape repeats QUERY_REPEAT_THRESHOLD times
+      (a likely N+1), and info for every request when QUERY_LOG is on.
+    - The budget comes from settings.QUERY_BUDGETS[route], else from the view's
+      @query_budget(n). With QUERY_BUDGET_STRICT (on in tests) exceeding it raises.
+    - For streamed responses the numbers are final only when the stream ends, so they
+      are logged then and no headers are added.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _budget(request, route: str) -> int | None:
+        if route in settings.QUERY_BUDGETS:
+            return settings.QUERY_BUDGETS[route]
+        match = getattr(request, "resolver_match", None)
+        return getattr(match.func, "query_budget", None) if match is not None else None
+
+    def _report(self, request, stats, response=None):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "unmatched"
+        budget = self._budget(request, route)
+        repeated = stats.repeated(settings.QUERY_REPEAT_THRESHOLD)
+        over_budget = budget is not None and stats.count > budget
+
+        if response is not None and settings.QUERY_DEBUG_HEADERS:
+            response["X-DB-Queries"] = str(stats.count)
+            response["X-DB-Time-Ms"] = str(stats.duration_ms)
+            response["X-DB-Repeated"] = str(repeated[0][1] if repeated else 0)
+
+        if over_budget or repeated or settings.QUERY_LOG:
+            payload = json.dumps({
+                "route": route,
+                "method": request.method,
+                "queries": stats.count,
+                "budget": budget,
+                "time_ms": stats.duration_ms,
+                "repeated": [{"sql": shape, "count": n} for shape, n in repeated],
+            })
+            query_logger.log(logging.WARNING if over_budget else logging.INFO, payload)
+
+        if over_budget and settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(
+                f"{request.method} {route} ran {stats.count} queries, budget is {budget}: {dict(stats.shapes)}"
+            )
+
+    def _finish(self, request, response, stats, token):
+        if not response.streaming:
+            querycountutility.stop(token)
+            self._report(request, stats, response)
+            return response
+
+        if response.is_async:
+            response.streaming_content = self._afinish_stream(response.streaming_content, request, stats, token)
+        else:
+            response.streaming_content = self._finish_stream(response.streaming_content, request, stats, token)
+        return response
+
+    def _finish_stream(self, content, request, stats, token):
+        try:
+            yield from content
+        finally:
+            querycountutility.stop(token)
+        self._report(request, stats)
+
+    async def _afinish_stream(self, content, request, stats, token):
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            querycountutility.stop(token)
+        self._report(request, stats)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats, token = querycountutility.start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            querycountutility.stop(token)
+            raise
+        return self._finish(request, response, stats, token)
+
+    async def __acall__(self, request):
+        stats, token = querycountutility.start()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            querycountutility.stop(token)
+            raise
+        return self._finish(request, response, stats, token)
+
+
+class CacheGenerationMiddleware:
+    """
+    Opens a cache generation_scope() per request: each TieredCache generation (e.g. the
+    catalog's) is read from the shared cache once, by the request's first lookup, and
+    reused by the rest. A product change made by any worker is seen by the next request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with generation_scope():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with generation_scope():
+            return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decides per request whether reads may go to a replica (see core/db/routing.py).
+
+    - Write requests (any method but GET, HEAD and OPTIONS) read from the primary.
+    - A successful write returns a signed pin, as the X-DB-Pin header and the db_pin
+      cookie. While it is younger than REPLICA_STICKY_SECONDS, requests carrying it
+      (header or cookie) read from the primary too, so a client sees its own writes
+      even if the replicas lag behind.
+    - Streamed responses keep the decision until the stream ends.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    HEADER = "X-DB-Pin"
+    COOKIE = "db_pin"
+    READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _pinned(self, request) -> bool:
+        if request.method not in self.READ_METHODS:
+            return True
+        return routing.valid_pin_token(request.headers.get(self.HEADER) or request.COOKIES.get(self.COOKIE))
+
+    def _finish(self, request, response, token):
+        if request.method not in self.READ_METHODS and response.status_code < 400:
+            pin = routing.make_pin_token()
+            response[self.HEADER] = pin
+            response.set_cookie(
+                self.COOKIE, pin, max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax",
+            )
+        if token is None:
+            return response
+        routing.unpin(token)
+        if response.streaming:
+            stream = self._apinned_stream if response.is_async else self._pinned_stream
+            response.streaming_content = stream(response.streaming_content)
+        return response
+
+    @staticmethod
+    def _pinned_stream(content):
+        token = routing.pin()
+        try:
+            yield from content
+        finally:
+            routing.unpin(token)
+
+    @staticmethod
+    async def _apinned_stream(content):
+        token = routing.pin()
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            routing.unpin(token)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = routing.pin() if self._pinned(request) else None
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            if token is not None:
+                routing.unpin(token)
+            raise
+        return self._finish(request, response, token)
+
+    async def __acall__(self, request):
+        token = routing.pin() if self._pinned(request) else None
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            if token is not None:
+                routing.unpin(token)
+            raise
+        return self._finish(request, response, token)
+
+
+registry.describe("admission_shed_total", "counter", "Requests rejected with 503 by admission control, by class and route.")
+registry.describe("admission_in_flight", "gauge", "Requests holding an admission slot, by class.")
+registry.describe(
+    "admission_wait_seconds", "histogram", "Time admitted requests waited for a slot, by class.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+class AdmissionControlMiddleware:
+    """
+    Caps the requests in flight per route class across all workers of the container
+    (settings.ADMISSION_CLASSES: class -> (limit, max queue wait in seconds)).
+
+    - Classes: "read" (GET/HEAD), "write" (other methods) and whatever a view declares
+      with @admission_class, e.g. "email_write" for the booking writes and "import" for
+      bulk imports; health and metrics are exempt.
+    - A request waits up to its class's queue wait for a slot. If none frees up it gets
+      a JSON 503 with Retry-After instead of tying up a worker until gunicorn's timeout.
+    - Streamed responses hold their slot until the stream ends.
+    - Shed counts, in-flight gauges and wait times go to the metrics registry.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.enabled = settings.ADMISSION_ENABLED
+        self.limiters = {
+            name: (SlotLimiter(name, limit, settings.ADMISSION_DIR), wait)
+            for name, (limit, wait) in settings.ADMISSION_CLASSES.items()
+        }
+
+    def _classify(self, request):
+        """(class, route) of the request, or (None, None) when it is not limited."""
+        if not self.enabled or request.method == "OPTIONS":
+            return None, None
+        try:
+            match = resolve(request.path_info, getattr(request, "urlconf", None))
+        except Resolver404:
+            return None, None
+        name = view_admission_class(match.func, request.method)
+        if name not in self.limiters:
+            return None, None
+        return name, match
+
+    @staticmethod
+    def _shed(request, name: str, match):
+        # Let MetricsMiddleware record the route, not "unmatched"
+        request.resolver_match = match
+        registry.inc("admission_shed_total", {"class": name, "route": match.route})
+        response = _error_response("Server busy, retry later", 503)
+        response["Retry-After"] = str(settings.ADMISSION_RETRY_AFTER)
+        return response
+
+    def _admitted(self, name: str, waited: float):
+        registry.observe("admission_wait_seconds", waited, {"class": name})
+        self._report(name)
+
+    def _release(self, name: str, slot: int):
+        self.limiters[name][0].release(slot)
+        self._report(name)
+
+    def _report(self, name: str):
+        registry.set_gauge("admission_in_flight", self.limiters[name][0].in_use(), {"class": name})
+
+    def _finish(self, response, name: str, slot: int):
+        if not response.streaming:
+            self._release(name, slot)
+        elif response.is_async:
+            response.streaming_content = self._arelease_after(response.streaming_content, name, slot)
+        else:
+            response.streaming_content = self._release_after(response.streaming_content, name, slot)
+        return response
+
+    def _release_after(self, content, name, slot):
+        try:
+            yield from content
+        finally:
+            self._release(name, slot)
+
+    async def _arelease_after(self, content, name, slot):
+        try:
+            async for chunk in content:
+                yield chunk
+        finally:
+            self._release(name, slot)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        name, match = self._classify(request)
+        if name is None:
+            return self.get_response(request)
+
+        limiter, wait = self.limiters[name]
+        started = time.perf_counter()
+        slot = limiter.acquire(wait)
+        if slot is None:
+            return self._shed(request, name, match)
+        self._admitted(name, time.perf_counter() - started)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self._release(name, slot)
+            raise
+        return self._finish(response, name, slot)
+
+    async def __acall__(self, request):
+        name, match = self._classify(request)
+        if name is None:
+            return await self.get_response(request)
+
+        limiter, wait = self.limiters[name]
+        started = time.perf_counter()
+        slot = await limiter.aacquire(wait)
+        if slot is None:
+            return self._shed(request, name, match)
+        self._admitted(name, time.perf_counter() - started)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self._release(name, slot)
+            raise
+        return self._finish(response, name, slot)
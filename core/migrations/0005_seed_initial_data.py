@@ -6,6 +6,7 @@ from django.db import migrations
 def seed_initial_data(apps, schema_editor):
     Reseller = apps.get_model('core', 'Reseller')
     Product = apps.get_model('core', 'Product')
+    db_alias = schema_editor.connection.alias
 
     # Only run this seeding in debug environments
     import os
@@ -77,7 +78,7 @@ def seed_initial_data(apps, schema_editor):
     ]
 
     for r_name in reseller_names:
-        reseller, _ = Reseller.objects.get_or_create(name=r_name)
+        reseller, _ = Reseller.objects.using(db_alias).get_or_create(name=r_name)
 
         for i in range(1, products_per_reseller + 1):
             # Deterministic name ensures idempotency
@@ -87,7 +88,7 @@ def seed_initial_data(apps, schema_editor):
             price = Decimal(str(random.randint(15, 30)))  # whole number between 15 and 30
             rating = Decimal(str(random.randint(10, 50) / 10))  # 1.0 to 5.0 step 0.1
 
-            Product.objects.get_or_create(
+            Product.objects.using(db_alias).get_or_create(
                 reseller=reseller,
                 name=name,
                 defaults={
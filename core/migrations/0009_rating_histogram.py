@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:13
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def populate_rating_histogram(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    RatingBucket = apps.get_model('core', 'RatingBucket')
+    from django.db.models import Count
+    db_alias = schema_editor.connection.alias
+
+    counts = [0] * 51
+    rows = Product.objects.using(db_alias).filter(rating__isnull=False).values('rating').annotate(n=Count('product_id'))
+    for row in rows.order_by():
+        rating = Decimal(row['rating'])
+        if rating >= 0:
+            counts[min(int(rating * 10), 50)] += row['n']
+
+    RatingBucket.objects.using(db_alias).bulk_create(
+        [RatingBucket(bucket=bucket, product_count=count) for bucket, count in enumerate(counts)]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_product_rating_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingBucket',
+            fields=[
+                ('bucket', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_rating_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_updated_at'),
+    ]
+
+    operations = [
+        # Add the replacement first so product lookups are never left without an index
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['product_id', 'end_date', 'start_date'], name='booking_product_end_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_product_dates_idx',
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:47
+
+import hashlib
+import core.db.fields
+from django.db import migrations, transaction
+
+BATCH_SIZE = 2000
+
+
+def backfill_access_token_digests(apps, schema_editor):
+    """Digests existing tokens in booking_id batches, one transaction per batch."""
+    Booking = apps.get_model('core', 'Booking')
+    db_alias = schema_editor.connection.alias
+    last_id = 0
+    while True:
+        rows = list(
+            Booking.objects.using(db_alias)
+            .filter(booking_id__gt=last_id)
+            .order_by('booking_id')
+            .values_list('booking_id', 'access_token', 'access_token_digest')[:BATCH_SIZE]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        updates = [
+            Booking(booking_id=booking_id, access_token_digest=hashlib.blake2b(token.encode(), digest_size=16).digest())
+            for booking_id, token, digest in rows
+            if digest is None
+        ]
+        with transaction.atomic(using=db_alias):
+            Booking.objects.using(db_alias).bulk_update(updates, ['access_token_digest'])
+
+
+class Migration(migrations.Migration):
+    # Each backfill batch commits on its own, so a large table is not updated in one
+    # long transaction, and an interrupted run resumes where it stopped
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_booking_overlap_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='access_token_digest',
+            field=core.db.fields.FixedBinaryField(editable=False, max_length=16, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_access_token_digests, migrations.RunPython.noop),
+    ]
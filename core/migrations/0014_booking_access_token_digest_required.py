@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:48
+
+import core.db.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_booking_access_token_digest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='booking',
+            name='access_token_digest',
+            field=core.db.fields.FixedBinaryField(editable=False, max_length=16, unique=True),
+        ),
+        # The digest's unique index replaces the one on the 128-character token
+        migrations.AlterField(
+            model_name='booking',
+            name='access_token',
+            field=models.CharField(editable=False, max_length=128),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:51
+
+import core.db.fields
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_booking_access_token_digest_required'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='name_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('name'), output_field=core.db.fields.BinaryCollationCharField(max_length=150)),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price_per_day', 'product_id'], name='product_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name_key', 'product_id'], name='product_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['type', 'price_per_day', 'product_id'], name='product_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['type', 'rating', 'product_id'], name='product_type_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['type', 'name_key', 'product_id'], name='product_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['reseller', 'price_per_day', 'product_id'], name='product_reseller_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['reseller', 'rating', 'product_id'], name='product_reseller_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['reseller', 'name_key', 'product_id'], name='product_reseller_name_idx'),
+        ),
+    ]
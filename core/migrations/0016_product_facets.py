@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_product_facets(apps, schema_editor):
+    Product = apps.get_model('core', 'Product')
+    ProductFacet = apps.get_model('core', 'ProductFacet')
+    from django.db.models import Count, Max, Min
+    db_alias = schema_editor.connection.alias
+
+    facets = []
+    for field in ('type', 'reseller_id'):
+        rows = (
+            Product.objects.using(db_alias).values(field)
+            .annotate(n=Count('product_id'), low=Min('price_per_day'), high=Max('price_per_day'))
+            .order_by()
+        )
+        facets += [
+            ProductFacet(**{field: row[field]}, product_count=row['n'], min_price=row['low'], max_price=row['high'])
+            for row in rows
+        ]
+    ProductFacet.objects.using(db_alias).bulk_create(facets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=50, null=True, unique=True)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('reseller', models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, to='core.reseller')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('reseller__isnull', True), ('type__isnull', False)), models.Q(('reseller__isnull', False), ('type__isnull', True)), _connector='OR'), name='product_facet_type_or_reseller')],
+            },
+        ),
+        migrations.RunPython(populate_product_facets, migrations.RunPython.noop),
+    ]
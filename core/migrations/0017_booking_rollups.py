@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:57
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 10000
+
+
+def backfill_booking_rollups(apps, schema_editor):
+    """Totals the bookings in booking_id batches, then writes the rollup rows."""
+    Booking = apps.get_model('core', 'Booking')
+    BookingRollup = apps.get_model('core', 'BookingRollup')
+    db_alias = schema_editor.connection.alias
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    last_id = 0
+    while True:
+        rows = list(
+            Booking.objects.using(db_alias)
+            .filter(booking_id__gt=last_id)
+            .order_by('booking_id')
+            .values_list('booking_id', 'reseller_id', 'start_date', 'status', 'total_price')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        for _, reseller_id, start_date, status, total_price in rows:
+            total = totals[(reseller_id, timezone.localtime(start_date).date(), status)]
+            total[0] += 1
+            total[1] += total_price
+
+    BookingRollup.objects.using(db_alias).bulk_create([
+        BookingRollup(reseller_id=reseller_id, day=day, status=status, booking_count=count, revenue=revenue)
+        for (reseller_id, day, status), (count, revenue) in totals.items()
+    ], batch_size=BATCH_SIZE)
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_product_facets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reseller_id', models.IntegerField()),
+                ('day', models.DateField()),
+                ('status', models.IntegerField(choices=[(0, 'Pending'), (1, 'Confirmed'), (2, 'Cancelled'), (3, 'Refunded')])),
+                ('booking_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('reseller_id', 'day', 'status'), name='booking_rollup_key')],
+            },
+        ),
+        migrations.RunPython(backfill_booking_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:02
+
+import core.db.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_booking_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_digest', core.db.fields.FixedBinaryField(max_length=16, unique=True)),
+                ('request_digest', core.db.fields.FixedBinaryField(max_length=16)),
+                ('status_code', models.PositiveSmallIntegerField(null=True)),
+                ('response_body', models.BinaryField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expires_at'], name='idempotency_expires_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:20
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 2000
+
+
+def drop_access_tokens(apps, schema_editor):
+    """
+    Removes the booking access tokens that confirmations used to be queued with.
+    The outbox worker now adds the token when it sends the email.
+    """
+    EmailOutbox = apps.get_model('core', 'EmailOutbox')
+    db_alias = schema_editor.connection.alias
+    last_id = 0
+    while True:
+        rows = list(
+            EmailOutbox.objects.using(db_alias)
+            .filter(kind='confirmation', id__gt=last_id)
+            .order_by('id')
+            .only('id', 'template_data')[:BATCH_SIZE]
+        )
+        if not rows:
+            return
+        last_id = rows[-1].id
+        updates = [row for row in rows if row.template_data.pop('access_token', None) is not None]
+        with transaction.atomic(using=db_alias):
+            EmailOutbox.objects.using(db_alias).bulk_update(updates, ['template_data'])
+
+
+class Migration(migrations.Migration):
+    # One transaction per batch, like 0013
+    atomic = False
+
+    dependencies = [
+        ('core', '0018_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_access_tokens, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from enum import Enum
+import hashlib
 import secrets
+from core.db.fields import BinaryCollationCharField, FixedBinaryField
 
 class Product(models.Model):
     product_id = models.AutoField(primary_key=True)
@@ -9,11 +13,76 @@ class Product(models.Model):
     type = models.CharField(max_length=50)
     price_per_day = models.DecimalField(max_digits=10, decimal_places=2)
     rating = models.DecimalField(max_digits=2, decimal_places=1, null=True, blank=True)
+    # Lowercased name, computed by the database; product search matches prefixes and
+    # sorts by name on it. Binary collation, so a prefix is a range of code points.
+    name_key = models.GeneratedField(
+        expression=Lower("name"),
+        output_field=BinaryCollationCharField(max_length=150),
+        db_persist=True,
+    )
+    # Change tracking for ETags; note queryset.update() does not touch it
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Backs the stable (rating, product_id) order used for keyset pagination
+            models.Index(fields=["rating", "product_id"], name="product_rating_id_idx"),
+            # Product search: one index per sort key, alone and behind each equality
+            # filter, so every filter and sort combination is read in index order
+            models.Index(fields=["price_per_day", "product_id"], name="product_price_id_idx"),
+            models.Index(fields=["name_key", "product_id"], name="product_name_id_idx"),
+            models.Index(fields=["type", "price_per_day", "product_id"], name="product_type_price_idx"),
+            models.Index(fields=["type", "rating", "product_id"], name="product_type_rating_idx"),
+            models.Index(fields=["type", "name_key", "product_id"], name="product_type_name_idx"),
+            models.Index(fields=["reseller", "price_per_day", "product_id"], name="product_reseller_price_idx"),
+            models.Index(fields=["reseller", "rating", "product_id"], name="product_reseller_rating_idx"),
+            models.Index(fields=["reseller", "name_key", "product_id"], name="product_reseller_name_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RatingBucket(models.Model):
+    """
+    Number of products per rating bucket (rating * 10, so 0..50).
+    Lets getproducts answer `total` with a suffix sum instead of COUNT(*).
+    Kept up to date by the Product signal handlers in core/signals.py.
+    """
+    bucket = models.PositiveSmallIntegerField(primary_key=True)
+    product_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Rating {self.bucket / 10:.1f}: {self.product_count}"
+
+
+class ProductFacet(models.Model):
+    """
+    Product count and price range of one product type or one reseller (exactly one of
+    the two is set), for the search filter sidebar. Lets productfacets read a handful
+    of rows instead of aggregating the catalog. Kept up to date by the Product signal
+    handlers in core/signals.py and by the product import.
+    """
+    type = models.CharField(max_length=50, null=True, unique=True)
+    reseller = models.OneToOneField('core.Reseller', on_delete=models.CASCADE, null=True)
+    product_count = models.PositiveIntegerField(default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(type__isnull=False, reseller__isnull=True)
+                | models.Q(type__isnull=True, reseller__isnull=False),
+                name="product_facet_type_or_reseller",
+            ),
+        ]
+
+    def __str__(self):
+        facet = f"type {self.type}" if self.type is not None else f"reseller {self.reseller_id}"
+        return f"{facet}: {self.product_count}"
+
+
 class Reseller(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=150)
@@ -29,6 +98,14 @@ class Status(Enum):
 
 Status_Choices = [(status.value, status.name) for status in Status]
 
+ACCESS_TOKEN_MAX_LENGTH = 128
+
+
+def digest_access_token(token: str) -> bytes:
+    """The 16-byte BLAKE2b digest bookings are looked up by, instead of the token itself."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
 class Booking(models.Model):
     booking_id = models.AutoField(primary_key=True)
     product_id = models.IntegerField()
@@ -40,16 +117,122 @@ class Booking(models.Model):
     status = models.IntegerField(choices=Status_Choices, default=Status.Pending.value)
 
     access_token = models.CharField(
-        max_length=128,
-        unique=True,
+        max_length=ACCESS_TOKEN_MAX_LENGTH,
         editable=False,
         null=False,
     )
+    # Token lookups compare this fixed-width digest (unique index) rather than the
+    # 86-character token
+    access_token_digest = FixedBinaryField(max_length=16, unique=True, editable=False)
+    # Change tracking for ETags; note queryset.update() does not touch it
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # getbookings: WHERE customer_email = ? (ordered by booking_id)
+            models.Index(fields=["customer_email", "booking_id"], name="booking_email_id_idx"),
+            # Overlap check: WHERE product_id = ? AND end_date > ? AND start_date < ?
+            # end_date leads the range so only bookings that have not ended yet are read
+            models.Index(fields=["product_id", "end_date", "start_date"], name="booking_product_end_idx"),
+            # Reseller reporting by date
+            models.Index(fields=["reseller_id", "start_date"], name="booking_reseller_start_idx"),
+        ]
+
+    def issue_access_token(self):
+        """Sets a new access token and its digest; save() calls this, bulk_create() callers must do it themselves."""
+        self.access_token = secrets.token_urlsafe(64)
+        self.access_token_digest = digest_access_token(self.access_token)
 
     def save(self, *args, **kwargs):
         if not self.access_token:
-            self.access_token = secrets.token_urlsafe(64)
+            self.issue_access_token()
+        elif not self.access_token_digest:
+            self.access_token_digest = digest_access_token(self.access_token)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Booking {self.booking_id} ({self.customer_email})"
+
+
+class OutboxStatus(Enum):
+    Pending = 0
+    Sent = 1
+    Failed = 2
+
+OutboxStatus_Choices = [(status.value, status.name) for status in OutboxStatus]
+
+class EmailOutbox(models.Model):
+    """
+    Transactional outbox for customer emails.
+
+    Rows are written in the same transaction as the booking change that triggers
+    them and delivered afterwards by the `drain_outbox` management command.
+    """
+    id = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=32)
+    to_email = models.CharField(max_length=100)
+    template_data = models.JSONField()
+    status = models.IntegerField(choices=OutboxStatus_Choices, default=OutboxStatus.Pending.value)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"EmailOutbox {self.id} ({self.kind} -> {self.to_email})"
+
+
+class BookingRollup(models.Model):
+    """
+    Number and total price of the bookings of one reseller, start day (in TIME_ZONE)
+    and status. Lets reseller reports read a row per day and status instead of grouping
+    bookings. Kept up to date by BookingRepository (create and cancel);
+    rebuild_booking_rollups reconciles it with the bookings.
+    """
+    reseller_id = models.IntegerField()
+    day = models.DateField()
+    status = models.IntegerField(choices=Status_Choices)
+    # Signed, so a write that finds a drifted row never fails on it
+    booking_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            # Also serves the report's WHERE reseller_id = ? AND day BETWEEN ? AND ?
+            models.UniqueConstraint(fields=["reseller_id", "day", "status"], name="booking_rollup_key"),
+        ]
+
+    def __str__(self):
+        return f"Reseller {self.reseller_id} {self.day} {Status(self.status).name}: {self.booking_count}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The stored response of a write request sent with an Idempotency-Key header, replayed
+    to retries of that request until expires_at (see core/service/idempotency_service.py).
+    The row is inserted before the view runs and completed in the same transaction as the
+    view's writes, so other requests only ever see completed rows; a concurrent duplicate
+    waits on the uncommitted row's unique key instead.
+    """
+    # 16-byte BLAKE2b digests of the key and of the request (method, path and body)
+    key_digest = FixedBinaryField(max_length=16, unique=True, editable=False)
+    request_digest = FixedBinaryField(max_length=16, editable=False)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.BinaryField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # purge_idempotency_keys: WHERE expires_at <= ? ORDER BY expires_at
+            models.Index(fields=["expires_at"], name="idempotency_expires_idx"),
+        ]
+
+    def __str__(self):
+        return f"IdempotencyKey {self.key_digest.hex()} ({self.status_code})"
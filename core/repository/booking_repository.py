@@ -1,20 +1,155 @@
-from core.models import Booking, Status
+import copy
+from collections import defaultdict
+from datetime import datetime
+from django.db import connection, transaction
+from core.models import Booking, Product, Status, digest_access_token
 from core.dto.booking_dto import BookingDTO
+from core.repository.booking_rollup_repository import BookingRollupRepository, booking_changes
+
+# Columns returned by the booking read endpoints, in response order
+BOOKING_FIELDS = (
+    "booking_id", "product_id", "customer_email", "reseller_id", "start_date", "end_date", "total_price",
+)
+
+# Bookings in these states hold their product for their dates
+ACTIVE_STATUSES = (Status.Pending.value, Status.Confirmed.value)
+
+
+class BookingConflict(Exception):
+    """Raised when a booking would overlap an active booking of the same product."""
+
 
 class BookingRepository:
+    @staticmethod
+    def has_overlap(product_id: int, start_date: datetime, end_date: datetime) -> bool:
+        """
+        True if an active booking of the product overlaps [start_date, end_date).
+        Served by booking_product_end_idx: the end_date > start_date range only visits
+        bookings that have not ended yet, so the cost does not grow with booking history.
+        """
+        return Booking.objects.filter(
+            product_id=product_id,
+            end_date__gt=start_date,
+            start_date__lt=end_date,
+            status__in=ACTIVE_STATUSES,
+        ).exists()
+
     @staticmethod
     def create_booking(dto: BookingDTO):
-        booking = Booking.objects.create(
-            product_id=dto.product_id,
-            customer_email=dto.customer_email,
-            reseller_id=dto.reseller_id,
-            start_date=dto.start_date,
-            end_date=dto.end_date,
-            total_price=dto.total_price,
-            status=Status.Pending.value
-        )
+        if dto.end_date <= dto.start_date:
+            raise ValueError("end_date must be after start_date")
+
+        # No savepoint: when nested (BookingService), any error here aborts the caller's
+        # transaction anyway, and the savepoint would cost two extra round trips
+        with transaction.atomic(savepoint=False):
+            # Lock the product row so concurrent creates for the same product run one by one
+            locked = list(Product.objects.select_for_update().filter(pk=dto.product_id).values_list("reseller_id", flat=True))
+            if not locked:
+                raise ValueError("Product not found")
+            if locked[0] != dto.reseller_id:
+                raise ValueError("reseller_id does not match the product's reseller")
+
+            if BookingRepository.has_overlap(dto.product_id, dto.start_date, dto.end_date):
+                raise BookingConflict("Product is already booked for these dates")
+
+            booking = Booking.objects.create(
+                product_id=dto.product_id,
+                customer_email=dto.customer_email,
+                reseller_id=dto.reseller_id,
+                start_date=dto.start_date,
+                end_date=dto.end_date,
+                total_price=dto.total_price,
+                status=Status.Pending.value
+            )
+            BookingRollupRepository.apply(booking_changes(added=[booking]))
         return booking
 
+    @staticmethod
+    def lock_products(product_ids) -> dict[int, Product]:
+        """
+        Locks the product rows, in product_id order so concurrent batches cannot deadlock,
+        and returns them by id with the fields bookings use. Call inside a transaction.
+        """
+        rows = (
+            Product.objects.select_for_update().filter(pk__in=product_ids).order_by("pk")
+            .only("product_id", "reseller_id", "type", "price_per_day")
+        )
+        return {product.pk: product for product in rows}
+
+    @staticmethod
+    def create_bookings(dtos: list[BookingDTO], products: dict[int, Product] | None = None) -> list[Booking | Exception]:
+        """
+        Creates many bookings in one transaction with a single bulk insert.
+        Returns, per dto, the created Booking or the error that rejected it (ValueError or
+        BookingConflict); a rejected item does not stop the others. An item whose
+        reseller_id is not its product's reseller is rejected. Datetimes must be aware.
+        `products` are the rows the caller locked with lock_products in its transaction;
+        they are locked here if not given.
+        """
+        results = [None] * len(dtos)
+        with transaction.atomic(savepoint=False):
+            if products is None:
+                products = BookingRepository.lock_products({dto.product_id for dto in dtos})
+            for index, dto in enumerate(dtos):
+                if dto.end_date <= dto.start_date:
+                    results[index] = ValueError("end_date must be after start_date")
+                elif dto.product_id not in products:
+                    results[index] = ValueError("Product not found")
+                elif products[dto.product_id].reseller_id != dto.reseller_id:
+                    results[index] = ValueError("reseller_id does not match the product's reseller")
+
+            valid = [index for index, result in enumerate(results) if result is None]
+            if not valid:
+                return results
+
+            # One range query for every active booking that could overlap the batch
+            taken = defaultdict(list)
+            rows = Booking.objects.filter(
+                product_id__in={dtos[index].product_id for index in valid},
+                end_date__gt=min(dtos[index].start_date for index in valid),
+                start_date__lt=max(dtos[index].end_date for index in valid),
+                status__in=ACTIVE_STATUSES,
+            ).values_list("product_id", "start_date", "end_date")
+            for product_id, start_date, end_date in rows:
+                taken[product_id].append((start_date, end_date))
+
+            created = []
+            for index in valid:
+                dto = dtos[index]
+                periods = taken[dto.product_id]
+                if any(start < dto.end_date and end > dto.start_date for start, end in periods):
+                    results[index] = BookingConflict("Product is already booked for these dates")
+                    continue
+                # Later items in the same batch must not overlap this one either
+                periods.append((dto.start_date, dto.end_date))
+                booking = Booking(
+                    product_id=dto.product_id,
+                    customer_email=dto.customer_email,
+                    reseller_id=dto.reseller_id,
+                    start_date=dto.start_date,
+                    end_date=dto.end_date,
+                    total_price=dto.total_price,
+                    status=Status.Pending.value,
+                )
+                booking.issue_access_token()
+                created.append((index, booking))
+
+            Booking.objects.bulk_create([booking for _, booking in created])
+            if created and not connection.features.can_return_rows_from_bulk_insert:
+                # MySQL does not return ids from a bulk insert; the unique token digests identify the rows
+                ids = dict(
+                    Booking.objects.filter(access_token_digest__in=[booking.access_token_digest for _, booking in created])
+                    .values_list("access_token_digest", "booking_id")
+                )
+                for _, booking in created:
+                    booking.booking_id = ids[bytes(booking.access_token_digest)]
+
+            for index, booking in created:
+                results[index] = booking
+            # One upsert for the whole batch
+            BookingRollupRepository.apply(booking_changes(added=[booking for _, booking in created]))
+        return results
+
     @staticmethod
     def get_bookings(email: str):
         try:
@@ -22,6 +157,53 @@ class BookingRepository:
         except Booking.DoesNotExist:
             raise ValueError("No bookings found for email")
 
+    @staticmethod
+    def _bookings_batch(email: str, after_id: int, batch: int):
+        return (
+            Booking.objects.filter(customer_email=email, booking_id__gt=after_id)
+            .order_by("booking_id")
+            .values_list(*BOOKING_FIELDS)[:batch]
+        )
+
+    @staticmethod
+    def iter_bookings(email: str, after_id: int = 0, limit: int | None = None, chunk_size: int = 500):
+        """
+        Yields BOOKING_FIELDS tuples of the customer's bookings in booking_id order, starting
+        after `after_id`. Rows are read in keyset batches of chunk_size over
+        booking_email_id_idx, so memory stays flat however long the history is.
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            batch = chunk_size if remaining is None else min(chunk_size, remaining)
+            count = 0
+            for row in BookingRepository._bookings_batch(email, after_id, batch).iterator(chunk_size=batch):
+                count += 1
+                after_id = row[0]
+                yield row
+            if remaining is not None:
+                remaining -= count
+            if count < batch:
+                return
+
+    @staticmethod
+    async def aiter_bookings(email: str, after_id: int = 0, limit: int | None = None, chunk_size: int = 500):
+        """
+        Async counterpart of iter_bookings. Each batch is fetched whole (values_list
+        aiterator() opens its cursor in the event loop), which the batch size keeps bounded.
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            batch = chunk_size if remaining is None else min(chunk_size, remaining)
+            count = 0
+            async for row in BookingRepository._bookings_batch(email, after_id, batch):
+                count += 1
+                after_id = row[0]
+                yield row
+            if remaining is not None:
+                remaining -= count
+            if count < batch:
+                return
+
     @staticmethod
     def get_booking(booking_id:int):
         try:
@@ -30,15 +212,53 @@ class BookingRepository:
             raise ValueError("Booking not found")
 
     @staticmethod
-    def cancel_booking(booking_id: int) -> Booking:
+    def access_tokens(booking_ids: list[int]) -> dict[int, str]:
+        """Maps booking ids to their access tokens, with one query."""
+        return dict(Booking.objects.filter(booking_id__in=booking_ids).values_list("booking_id", "access_token"))
+
+    @staticmethod
+    async def _abooking_row(**lookup) -> tuple:
+        row = await Booking.objects.filter(**lookup).values_list(*BOOKING_FIELDS, "updated_at").afirst()
+        if row is None:
+            raise ValueError("Booking not found")
+        return row
+
+    @staticmethod
+    async def aget_booking_row(booking_id: int) -> tuple:
+        """BOOKING_FIELDS of the booking followed by its updated_at."""
+        return await BookingRepository._abooking_row(booking_id=booking_id)
+
+    @staticmethod
+    async def aget_booking_row_by_token(token: str) -> tuple:
+        """Like aget_booking_row, for the booking with this access token (found by its digest)."""
+        return await BookingRepository._abooking_row(access_token_digest=digest_access_token(token))
+
+    @staticmethod
+    def cancel_booking(booking_id: int) -> tuple[Booking, bool]:
+        """
+        Cancels the booking. Returns the booking and whether its status changed,
+        so callers can skip side effects for bookings that were already cancelled.
+        """
+        return BookingRepository._cancel(pk=booking_id)
+
+    @staticmethod
+    def cancel_booking_by_token(token: str) -> tuple[Booking, bool]:
+        """Like cancel_booking, for the booking with this access token."""
+        return BookingRepository._cancel(access_token_digest=digest_access_token(token))
+
+    @staticmethod
+    def _cancel(**lookup) -> tuple[Booking, bool]:
         try:
-            booking = Booking.objects.get(pk=booking_id)
+            booking = Booking.objects.select_for_update().get(**lookup)
         except Booking.DoesNotExist:
             raise ValueError("Booking not found")
 
         if booking.status == Status.Cancelled.value:
-            return booking
+            return booking, False
 
+        # The booking moves from its status's rollup row to the Cancelled one
+        before = copy.copy(booking)
         booking.status = Status.Cancelled.value
         booking.save()
-        return booking
+        BookingRollupRepository.apply(booking_changes(added=[booking], removed=[before]))
+        return booking, True
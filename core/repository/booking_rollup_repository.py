@@ -0,0 +1,115 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from django.utils import timezone
+from core.models import Booking, BookingRollup
+
+# (reseller_id, day, status) of a rollup row
+RollupKey = tuple[int, date, int]
+
+# Rows per upsert statement, well below SQLite's bound parameter limit
+UPSERT_BATCH_SIZE = 1000
+
+
+def rollup_key(reseller_id: int, start_date, status: int) -> RollupKey:
+    """The rollup row a booking counts in: its start day in TIME_ZONE."""
+    return reseller_id, timezone.localtime(start_date).date(), status
+
+
+def booking_changes(added=(), removed=()) -> dict[RollupKey, list]:
+    """{key: [count delta, revenue delta]} for bookings that were added or removed."""
+    changes = defaultdict(lambda: [0, Decimal(0)])
+    for delta, bookings in ((1, added), (-1, removed)):
+        for booking in bookings:
+            change = changes[rollup_key(booking.reseller_id, booking.start_date, booking.status)]
+            change[0] += delta
+            change[1] += delta * Decimal(booking.total_price)
+    return changes
+
+
+class BookingRollupRepository:
+    @staticmethod
+    def apply(changes: dict[RollupKey, list]):
+        """
+        Adds {key: (count delta, revenue delta)} to the rollup rows with one upsert
+        (per UPSERT_BATCH_SIZE rows), creating missing rows. The increments happen in the
+        database, so concurrent bookings never lose counts.
+        """
+        changes = [(key, change) for key, change in changes.items() if any(change)]
+        for start in range(0, len(changes), UPSERT_BATCH_SIZE):
+            BookingRollupRepository._upsert(changes[start:start + UPSERT_BATCH_SIZE])
+
+    @staticmethod
+    def _upsert(changes: list[tuple[RollupKey, list]]):
+        ops = connection.ops
+        table = ops.quote_name(BookingRollup._meta.db_table)
+        params = []
+        for (reseller_id, day, status), (count, revenue) in changes:
+            params += [reseller_id, ops.adapt_datefield_value(day), status, count, ops.adapt_decimalfield_value(revenue)]
+        values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(changes))
+        if connection.vendor == "mysql":
+            on_conflict = (
+                "ON DUPLICATE KEY UPDATE booking_count = booking_count + VALUES(booking_count), "
+                "revenue = revenue + VALUES(revenue)"
+            )
+        else:
+            on_conflict = (
+                "ON CONFLICT (reseller_id, day, status) DO UPDATE SET "
+                "booking_count = booking_count + excluded.booking_count, revenue = revenue + excluded.revenue"
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (reseller_id, day, status, booking_count, revenue) VALUES {values} {on_conflict}",
+                params,
+            )
+
+    @staticmethod
+    def _report_query(reseller_id: int, start: date, end: date):
+        return (
+            BookingRollup.objects.filter(reseller_id=reseller_id, day__gte=start, day__lte=end)
+            .exclude(booking_count=0)
+            .order_by("day", "status")
+            .values_list("day", "status", "booking_count", "revenue")
+        )
+
+    @staticmethod
+    def report(reseller_id: int, start: date, end: date) -> list[tuple]:
+        """(day, status, booking_count, revenue) rows of the reseller from start to end, inclusive."""
+        return list(BookingRollupRepository._report_query(reseller_id, start, end))
+
+    @staticmethod
+    async def areport(reseller_id: int, start: date, end: date) -> list[tuple]:
+        return [row async for row in BookingRollupRepository._report_query(reseller_id, start, end)]
+
+    @staticmethod
+    def stored() -> dict[RollupKey, tuple[int, Decimal]]:
+        """Non-empty rollup rows as {key: (booking_count, revenue)}."""
+        return {
+            (reseller_id, day, status): (count, revenue)
+            for reseller_id, day, status, count, revenue in BookingRollup.objects.exclude(
+                booking_count=0, revenue=0
+            ).values_list("reseller_id", "day", "status", "booking_count", "revenue")
+        }
+
+    @staticmethod
+    def actual(chunk_size: int = 10_000) -> dict[RollupKey, tuple[int, Decimal]]:
+        """
+        Like stored(), computed from the bookings. They are read in booking_id chunks, so
+        memory holds one chunk plus the totals, and no statement runs long.
+        """
+        totals = defaultdict(lambda: [0, Decimal(0)])
+        last_id = 0
+        while True:
+            rows = list(
+                Booking.objects.filter(booking_id__gt=last_id).order_by("booking_id")
+                .values_list("booking_id", "reseller_id", "start_date", "status", "total_price")[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for _, reseller_id, start_date, status, total_price in rows:
+                total = totals[rollup_key(reseller_id, start_date, status)]
+                total[0] += 1
+                total[1] += total_price
+        return {key: (count, revenue) for key, (count, revenue) in totals.items()}
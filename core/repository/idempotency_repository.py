@@ -0,0 +1,64 @@
+import hashlib
+from datetime import datetime, timedelta
+from django.utils import timezone
+from core.models import IdempotencyKey
+
+
+def _digest(*parts: bytes) -> bytes:
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        # Length-prefixed, so ("ab", "c") and ("a", "bc") differ
+        hasher.update(len(part).to_bytes(8, "big"))
+        hasher.update(part)
+    return hasher.digest()
+
+
+def digest_idempotency_key(key: str) -> bytes:
+    return _digest(key.encode())
+
+
+def digest_request(method: str, path: str, body: bytes) -> bytes:
+    """What a retry must repeat to be replayed: the method, path and body."""
+    return _digest(method.encode(), path.encode(), body)
+
+
+class IdempotencyRepository:
+    @staticmethod
+    def get(key_digest: bytes) -> IdempotencyKey | None:
+        """The key's row, expired or not (expired rows stay until they are purged)."""
+        return IdempotencyKey.objects.filter(key_digest=key_digest).first()
+
+    @staticmethod
+    def claim(key_digest: bytes, request_digest: bytes, ttl_seconds: int,
+              expired: IdempotencyKey | None = None) -> IdempotencyKey:
+        """
+        Inserts the key's row, after deleting the `expired` one. Call it inside the
+        transaction of the request's writes: while that is open the row blocks other
+        inserts of the key, and once it commits they fail with an IntegrityError.
+        """
+        now = timezone.now()
+        if expired is not None:
+            IdempotencyKey.objects.filter(pk=expired.pk, expires_at__lte=now).delete()
+        return IdempotencyKey.objects.create(
+            key_digest=key_digest,
+            request_digest=request_digest,
+            expires_at=now + timedelta(seconds=ttl_seconds),
+        )
+
+    @staticmethod
+    def complete(key: IdempotencyKey, status_code: int, body: bytes):
+        IdempotencyKey.objects.filter(pk=key.pk).update(status_code=status_code, response_body=body)
+
+    @staticmethod
+    def purge_expired(batch_size: int, now: datetime | None = None) -> int:
+        """Deletes up to `batch_size` expired keys, oldest first; returns how many."""
+        now = now or timezone.now()
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now)
+            .order_by("expires_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        deleted, _ = IdempotencyKey.objects.filter(pk__in=ids).delete()
+        return deleted
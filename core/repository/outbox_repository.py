@@ -0,0 +1,74 @@
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from core.models import EmailOutbox, OutboxStatus
+
+
+class OutboxRepository:
+    @staticmethod
+    def enqueue(kind: str, to_email: str, template_data: dict) -> EmailOutbox:
+        return EmailOutbox.objects.create(
+            kind=kind,
+            to_email=to_email,
+            template_data=template_data,
+            status=OutboxStatus.Pending.value,
+        )
+
+    @staticmethod
+    def enqueue_many(messages: list[tuple[str, str, dict]]) -> list[EmailOutbox]:
+        """Queues (kind, to_email, template_data) messages with one bulk insert."""
+        return EmailOutbox.objects.bulk_create([
+            EmailOutbox(kind=kind, to_email=to_email, template_data=template_data, status=OutboxStatus.Pending.value)
+            for kind, to_email, template_data in messages
+        ])
+
+    @staticmethod
+    def claim_batch(limit: int, lease_seconds: int) -> list[EmailOutbox]:
+        """
+        Claims up to `limit` due messages. Claimed rows get their next_attempt_at pushed
+        out by the lease so concurrent workers skip them while they are being sent.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            messages = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True)
+                .filter(status=OutboxStatus.Pending.value, next_attempt_at__lte=now)
+                .order_by("next_attempt_at", "id")[:limit]
+            )
+            if messages:
+                EmailOutbox.objects.filter(pk__in=[m.id for m in messages]).update(
+                    next_attempt_at=now + timedelta(seconds=lease_seconds)
+                )
+        return messages
+
+    @staticmethod
+    def mark_sent(message: EmailOutbox):
+        EmailOutbox.objects.filter(pk=message.id).update(
+            status=OutboxStatus.Sent.value,
+            attempts=message.attempts + 1,
+            sent_at=timezone.now(),
+            last_error="",
+        )
+
+    @staticmethod
+    def mark_retry(message: EmailOutbox, delay_seconds: float, error: str):
+        EmailOutbox.objects.filter(pk=message.id).update(
+            attempts=message.attempts + 1,
+            next_attempt_at=timezone.now() + timedelta(seconds=delay_seconds),
+            last_error=error,
+        )
+
+    @staticmethod
+    def mark_failed(message: EmailOutbox, error: str):
+        EmailOutbox.objects.filter(pk=message.id).update(
+            status=OutboxStatus.Failed.value,
+            attempts=message.attempts + 1,
+            last_error=error,
+        )
+
+    @staticmethod
+    def release(messages: list[EmailOutbox], delay_seconds: float):
+        """Makes claimed messages due again after the delay without counting an attempt."""
+        EmailOutbox.objects.filter(pk__in=[m.id for m in messages]).update(
+            next_attempt_at=timezone.now() + timedelta(seconds=delay_seconds)
+        )
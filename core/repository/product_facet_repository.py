@@ -0,0 +1,107 @@
+from decimal import Decimal
+from django.db.models import Count, F, Max, Min, Subquery
+from core.models import Product, ProductFacet
+
+# Product fields with a facet, by the ProductFacet field they are stored in
+FACET_FIELDS = ('type', 'reseller_id')
+
+_CENT = Decimal('0.01')
+
+
+def _price(value) -> Decimal | None:
+    # SQLite returns aggregated decimals unscaled (10 rather than 10.00)
+    return value.quantize(_CENT) if value is not None else None
+
+
+def facet_changes(before: tuple | None, after: tuple | None) -> dict[tuple[str, object], int]:
+    """
+    {(field, value): product count delta} for a product that changed from `before` to
+    `after`, each a (type, reseller_id, price_per_day) tuple or None for no product.
+    Facets whose price range may have moved are included with a delta of 0.
+    """
+    changes = {}
+    for index, field in enumerate(FACET_FIELDS):
+        if before is not None:
+            key = (field, before[index])
+            changes[key] = changes.get(key, 0) - 1
+        if after is not None:
+            key = (field, after[index])
+            changes[key] = changes.get(key, 0) + 1
+    if before is not None and after is not None and before[2] == after[2]:
+        changes = {key: delta for key, delta in changes.items() if delta}
+    return changes
+
+
+class ProductFacetRepository:
+    @staticmethod
+    def apply(changes: dict[tuple[str, object], int]):
+        """
+        Applies facet_changes() style {(field, value): delta} changes: adjusts the counts
+        and reads each touched facet's price range again, from the first and last entry
+        of its (type|reseller, price_per_day) index.
+        """
+        if not changes:
+            return
+        # Facets for a new type or reseller; existing rows are left alone
+        ProductFacet.objects.bulk_create(
+            [ProductFacet(**{field: value}) for (field, value), delta in changes.items() if delta > 0],
+            ignore_conflicts=True,
+        )
+        for (field, value), delta in changes.items():
+            products = Product.objects.filter(**{field: value})
+            ProductFacet.objects.filter(**{field: value}).update(
+                product_count=F('product_count') + delta,
+                min_price=Subquery(products.order_by('price_per_day').values('price_per_day')[:1]),
+                max_price=Subquery(products.order_by('-price_per_day').values('price_per_day')[:1]),
+            )
+
+    @staticmethod
+    def _listing():
+        return ProductFacet.objects.filter(product_count__gt=0).order_by('type', 'reseller_id').values(
+            'type', 'reseller_id', 'reseller__name', 'product_count', 'min_price', 'max_price'
+        )
+
+    @staticmethod
+    def facets() -> list[dict]:
+        """Facets that have products, in one query (reseller names are joined in)."""
+        return list(ProductFacetRepository._listing())
+
+    @staticmethod
+    async def afacets() -> list[dict]:
+        return [row async for row in ProductFacetRepository._listing()]
+
+    @staticmethod
+    def stored() -> dict[tuple[str, object], tuple]:
+        """{(field, value): (product_count, min_price, max_price)} of the facets with products."""
+        rows = ProductFacet.objects.filter(product_count__gt=0).values_list(
+            'type', 'reseller_id', 'product_count', 'min_price', 'max_price'
+        )
+        return {
+            ('type', type) if type is not None else ('reseller_id', reseller_id): (count, low, high)
+            for type, reseller_id, count, low, high in rows
+        }
+
+    @staticmethod
+    def actual() -> dict[tuple[str, object], tuple]:
+        """Like stored(), aggregated from the Product table."""
+        facets = {}
+        for field in FACET_FIELDS:
+            rows = (
+                Product.objects.values(field)
+                .annotate(n=Count('product_id'), low=Min('price_per_day'), high=Max('price_per_day'))
+                .order_by()
+            )
+            for row in rows:
+                facets[(field, row[field])] = (row['n'], _price(row['low']), _price(row['high']))
+        return facets
+
+    @staticmethod
+    def rebuild() -> dict[tuple[str, object], tuple]:
+        """Replaces every facet with the values from the Product table."""
+        facets = ProductFacetRepository.actual()
+        ProductFacet.objects.all().delete()
+        ProductFacet.objects.bulk_create([
+            ProductFacet(**{field: value}, product_count=count, min_price=low, max_price=high)
+            for (field, value), (count, low, high) in facets.items()
+        ])
+        return facets
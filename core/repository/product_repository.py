@@ -0,0 +1,187 @@
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Q
+from core.dto.product_search_dto import ProductSearchDTO
+from core.models import Product
+from core.repository.rating_histogram_repository import RatingHistogramRepository
+
+PRODUCT_FIELDS = ('product_id', 'reseller_id', 'name', 'type', 'price_per_day', 'rating')
+
+# Stable listing order, served by the product_rating_id_idx index
+PRODUCT_LIST_ORDER = ('-rating', '-product_id')
+
+# Product search sort keys and the columns they order by, each followed by product_id.
+# Every key has an index of its own and one behind each equality filter (type, reseller).
+SEARCH_SORT_COLUMNS = {'price': 'price_per_day', 'rating': 'rating', 'name': 'name_key'}
+
+
+def prefix_upper_bound(prefix: str) -> str | None:
+    """
+    The smallest string greater than every string starting with prefix, in code point
+    order (name_key has a binary collation), or None if there is none.
+    """
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    following = ord(prefix[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        # Surrogates cannot be stored
+        following = 0xE000
+    return prefix[:-1] + chr(following)
+
+
+class ProductRepository:
+    @staticmethod
+    def get_product(product_id: int) -> dict | None:
+        """Product fields plus `updated_at` (used for ETags)."""
+        return Product.objects.filter(product_id=product_id).values(*PRODUCT_FIELDS, 'updated_at').first()
+
+    @staticmethod
+    async def aget_product(product_id: int) -> dict | None:
+        return await Product.objects.filter(product_id=product_id).values(*PRODUCT_FIELDS, 'updated_at').afirst()
+
+    @staticmethod
+    def create_product(**fields) -> Product:
+        # Atomic so the rating histogram update (post_save signal) commits with the row
+        with transaction.atomic():
+            return Product.objects.create(**fields)
+
+    @staticmethod
+    def get_prices(product_ids) -> dict[int, Decimal]:
+        """price_per_day of each existing product in product_ids, in one query."""
+        return dict(
+            Product.objects.filter(pk__in=list(product_ids)).values_list('product_id', 'price_per_day')
+        )
+
+    @staticmethod
+    def count_products(min_rating: Decimal) -> int:
+        """Number of products rated at least min_rating, read from the rating histogram."""
+        return RatingHistogramRepository.count_at_least(min_rating)
+
+    @staticmethod
+    def _list_query(min_rating: Decimal, offset: int, limit: int):
+        qs = Product.objects.filter(rating__gte=min_rating).order_by(*PRODUCT_LIST_ORDER)
+        return qs.values(*PRODUCT_FIELDS)[offset:offset + limit]
+
+    @staticmethod
+    def list_products(min_rating: Decimal, offset: int, limit: int) -> list[dict]:
+        """OFFSET pagination, kept for clients that still page with ?page=."""
+        return list(ProductRepository._list_query(min_rating, offset, limit))
+
+    @staticmethod
+    async def alist_products(min_rating: Decimal, offset: int, limit: int) -> list[dict]:
+        return [row async for row in ProductRepository._list_query(min_rating, offset, limit)]
+
+    @staticmethod
+    def _after_query(min_rating: Decimal, after: tuple[Decimal, int] | None, limit: int):
+        qs = Product.objects.filter(rating__gte=min_rating)
+        if after is not None:
+            rating, product_id = after
+            qs = qs.filter(rating__lte=rating).filter(
+                Q(rating__lt=rating) | Q(rating=rating, product_id__lt=product_id)
+            )
+        return qs.order_by(*PRODUCT_LIST_ORDER).values(*PRODUCT_FIELDS)[:limit]
+
+    @staticmethod
+    def list_products_after(min_rating: Decimal, after: tuple[Decimal, int] | None, limit: int) -> list[dict]:
+        """
+        Keyset pagination: returns the next `limit` products after the (rating, product_id)
+        key of the previous page, seeking in the index instead of skipping rows with OFFSET.
+        """
+        return list(ProductRepository._after_query(min_rating, after, limit))
+
+    @staticmethod
+    async def alist_products_after(min_rating: Decimal, after: tuple[Decimal, int] | None, limit: int) -> list[dict]:
+        return [row async for row in ProductRepository._after_query(min_rating, after, limit)]
+
+    @staticmethod
+    def _search_filters(search: ProductSearchDTO):
+        qs = Product.objects.all()
+        if search.type is not None:
+            qs = qs.filter(type=search.type)
+        if search.reseller_id is not None:
+            qs = qs.filter(reseller_id=search.reseller_id)
+        if search.min_price is not None:
+            qs = qs.filter(price_per_day__gte=search.min_price)
+        if search.max_price is not None:
+            qs = qs.filter(price_per_day__lte=search.max_price)
+        if search.min_rating is not None:
+            qs = qs.filter(rating__gte=search.min_rating)
+        if search.name_prefix:
+            # A range rather than LIKE, so it can be an index range on every backend
+            qs = qs.filter(name_key__gte=search.name_prefix)
+            upper = prefix_upper_bound(search.name_prefix)
+            if upper is not None:
+                qs = qs.filter(name_key__lt=upper)
+        return qs
+
+    @staticmethod
+    def _search_query(search: ProductSearchDTO):
+        """
+        The page's query. For a rating sort it reads the rated products only (None once
+        the cursor is past them); _unrated_query follows with the rest.
+        """
+        descending = search.sort.startswith('-')
+        column = SEARCH_SORT_COLUMNS[search.sort.lstrip('-')]
+
+        qs = ProductRepository._search_filters(search)
+        if column == 'rating':
+            if search.after is not None and search.after[0] is None:
+                return None
+            qs = qs.filter(rating__isnull=False)
+        if search.after is not None:
+            value, product_id = search.after
+            if descending:
+                qs = qs.filter(**{f'{column}__lte': value}).filter(
+                    Q(**{f'{column}__lt': value}) | Q(**{column: value, 'product_id__lt': product_id})
+                )
+            else:
+                qs = qs.filter(**{f'{column}__gte': value}).filter(
+                    Q(**{f'{column}__gt': value}) | Q(**{column: value, 'product_id__gt': product_id})
+                )
+
+        order = (f'-{column}', '-product_id') if descending else (column, 'product_id')
+        return qs.order_by(*order).values(*PRODUCT_FIELDS, sort_key=F(column))[:search.limit]
+
+    @staticmethod
+    def _unrated_query(search: ProductSearchDTO, limit: int):
+        """
+        Unrated products, which a rating sort lists after the rated ones in either
+        direction, ordered by product_id. None for other sorts or with min_rating.
+        """
+        if search.sort.lstrip('-') != 'rating' or search.min_rating is not None:
+            return None
+        descending = search.sort.startswith('-')
+        qs = ProductRepository._search_filters(search).filter(rating__isnull=True)
+        if search.after is not None and search.after[0] is None:
+            product_id = search.after[1]
+            qs = qs.filter(product_id__lt=product_id) if descending else qs.filter(product_id__gt=product_id)
+        order = '-product_id' if descending else 'product_id'
+        return qs.order_by(order).values(*PRODUCT_FIELDS, sort_key=F('rating'))[:limit]
+
+    @staticmethod
+    def search_products(search: ProductSearchDTO) -> list[dict]:
+        """
+        One keyset page of products matching the search, in its sort order. Rows carry
+        their sort value as `sort_key` for the next page's cursor. The filters are
+        plain conditions, so the planner chooses between walking the sort index and
+        reading the range of a selective filter. A rating sort takes a second query
+        when the page reaches the unrated products.
+        """
+        query = ProductRepository._search_query(search)
+        rows = list(query) if query is not None else []
+        if len(rows) < search.limit:
+            unrated = ProductRepository._unrated_query(search, search.limit - len(rows))
+            if unrated is not None:
+                rows += list(unrated)
+        return rows
+
+    @staticmethod
+    async def asearch_products(search: ProductSearchDTO) -> list[dict]:
+        query = ProductRepository._search_query(search)
+        rows = [row async for row in query] if query is not None else []
+        if len(rows) < search.limit:
+            unrated = ProductRepository._unrated_query(search, search.limit - len(rows))
+            if unrated is not None:
+                rows += [row async for row in unrated]
+        return rows
@@ -0,0 +1,107 @@
+from decimal import Decimal, ROUND_CEILING
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from core.models import Product, RatingBucket
+
+# Buckets for ratings 0.0, 0.1, ... 5.0
+RATING_BUCKETS = 51
+
+
+def rating_bucket(rating) -> int | None:
+    """
+    Bucket of a product rating, or None if the product can never match a min_rating filter.
+    Ratings above 5.0 share the top bucket, because min_rating is clamped to 5.
+    """
+    if rating is None:
+        return None
+    # Normalise like the DecimalField does on save, so floats/strings land in the stored bucket
+    rating = Product._meta.get_field("rating").to_python(rating).quantize(Decimal("0.1"))
+    if rating < 0:
+        return None
+    return min(int(rating * 10), RATING_BUCKETS - 1)
+
+
+def min_rating_bucket(min_rating: Decimal) -> int:
+    """First bucket whose ratings satisfy rating >= min_rating."""
+    return int((min_rating * 10).to_integral_value(rounding=ROUND_CEILING))
+
+
+class RatingHistogramRepository:
+    @staticmethod
+    def adjust(rating, delta: int):
+        bucket = rating_bucket(rating)
+        if bucket is not None:
+            RatingHistogramRepository.adjust_many({bucket: delta})
+
+    @staticmethod
+    def adjust_many(deltas: dict[int, int]):
+        """
+        Applies {bucket: delta} changes, one UPDATE per touched bucket. A bucket whose row
+        is missing (e.g. after a flush) is created with its count from the Product table,
+        which must already include the change.
+        """
+        for bucket, delta in deltas.items():
+            if delta and not RatingBucket.objects.filter(bucket=bucket).update(product_count=F("product_count") + delta):
+                RatingHistogramRepository._create_bucket(bucket, delta)
+
+    @staticmethod
+    def _create_bucket(bucket: int, delta: int):
+        try:
+            with transaction.atomic():
+                RatingBucket.objects.create(bucket=bucket, product_count=RatingHistogramRepository._count_bucket(bucket))
+        except IntegrityError:
+            # Created concurrently, from rows that did not include this change yet
+            RatingBucket.objects.filter(bucket=bucket).update(product_count=F("product_count") + delta)
+
+    @staticmethod
+    def _count_bucket(bucket: int) -> int:
+        products = Product.objects.filter(rating__gte=Decimal(bucket) / 10)
+        if bucket < RATING_BUCKETS - 1:
+            products = products.filter(rating__lt=Decimal(bucket + 1) / 10)
+        return products.count()
+
+    @staticmethod
+    def _suffix(counts: dict[int, int]) -> list[int]:
+        suffix = [0] * (RATING_BUCKETS + 1)
+        for bucket in range(RATING_BUCKETS - 1, -1, -1):
+            suffix[bucket] = suffix[bucket + 1] + counts.get(bucket, 0)
+        return suffix
+
+    @staticmethod
+    def suffix_counts() -> list[int]:
+        """suffix[b] is the number of products in bucket b or higher; suffix[51] is 0."""
+        return RatingHistogramRepository._suffix(dict(RatingBucket.objects.values_list("bucket", "product_count")))
+
+    @staticmethod
+    async def asuffix_counts() -> list[int]:
+        rows = RatingBucket.objects.values_list("bucket", "product_count")
+        return RatingHistogramRepository._suffix({bucket: count async for bucket, count in rows})
+
+    @staticmethod
+    def count_at_least(min_rating: Decimal) -> int:
+        bucket = min(max(min_rating_bucket(min_rating), 0), RATING_BUCKETS)
+        return RatingHistogramRepository.suffix_counts()[bucket]
+
+    @staticmethod
+    def stored_counts() -> list[int]:
+        counts = dict(RatingBucket.objects.values_list("bucket", "product_count"))
+        return [counts.get(bucket, 0) for bucket in range(RATING_BUCKETS)]
+
+    @staticmethod
+    def actual_counts() -> list[int]:
+        """Counts per bucket computed from the Product table."""
+        counts = [0] * RATING_BUCKETS
+        rows = Product.objects.filter(rating__isnull=False).values("rating").annotate(n=Count("product_id"))
+        for row in rows.order_by():
+            bucket = rating_bucket(row["rating"])
+            if bucket is not None:
+                counts[bucket] += row["n"]
+        return counts
+
+    @staticmethod
+    def rebuild() -> list[int]:
+        """Overwrites every bucket with the counts from the Product table."""
+        counts = RatingHistogramRepository.actual_counts()
+        for bucket, count in enumerate(counts):
+            RatingBucket.objects.update_or_create(bucket=bucket, defaults={"product_count": count})
+        return counts
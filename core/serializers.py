@@ -0,0 +1,12 @@
+"""Row serializers shared by the read endpoints."""
+from core.repository.booking_repository import BOOKING_FIELDS
+from utilities.serializerutility import RowSerializer, decimal_str, isoformat
+
+_CONVERTERS = {
+    "start_date": isoformat,
+    "end_date": isoformat,
+    "total_price": decimal_str,
+}
+
+# Booking as returned by getbooking and getbookings, from a BOOKING_FIELDS tuple
+booking_serializer = RowSerializer((name, _CONVERTERS.get(name)) for name in BOOKING_FIELDS)
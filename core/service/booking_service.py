@@ -1,19 +1,115 @@
+from dataclasses import replace
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from core.models import Booking, Reseller, Status
 from core.repository.booking_repository import BookingRepository
+from core.repository.booking_rollup_repository import BookingRollupRepository
 from core.dto.booking_dto import BookingDTO
+from core.service.notification_service import NotificationService
+from core.service.quote_service import QuoteService
 
 class BookingService:
     @staticmethod
     def create_booking(dto: BookingDTO):
-        return BookingRepository.create_booking(dto)
+        QuoteService.verify_total(dto)
+        with transaction.atomic():
+            booking = BookingRepository.create_booking(dto)
+            NotificationService.queue_confirmation(booking)
+        return booking
+
+    @staticmethod
+    def create_bookings(dtos: list[BookingDTO]) -> list[Booking | Exception]:
+        """
+        Creates a batch of bookings in one transaction: the products are locked once and
+        those rows serve the price check (quote engine) and the emails, the bookings are
+        written with one bulk insert and all confirmation emails are queued together.
+        Returns the created Booking or the rejecting error for each dto. The dtos are not
+        changed; naive datetimes are made aware on copies.
+        """
+        dtos = [
+            replace(dto, start_date=BookingService._aware(dto.start_date), end_date=BookingService._aware(dto.end_date))
+            for dto in dtos
+        ]
+
+        results = [None] * len(dtos)
+        with transaction.atomic():
+            products = BookingRepository.lock_products({dto.product_id for dto in dtos})
+            if settings.BOOKING_VERIFY_PRICE:
+                prices = {product_id: product.price_per_day for product_id, product in products.items()}
+                for index, error in enumerate(QuoteService.check_totals(dtos, prices)):
+                    if error:
+                        results[index] = ValueError(error)
+
+            pending = [index for index, result in enumerate(results) if result is None]
+            created = BookingRepository.create_bookings([dtos[index] for index in pending], products)
+            for index, result in zip(pending, created):
+                results[index] = result
+
+            bookings = [result for result in results if isinstance(result, Booking)]
+            if bookings:
+                resellers = Reseller.objects.in_bulk({booking.reseller_id for booking in bookings})
+                NotificationService.queue_confirmations(bookings, products, resellers)
+        return results
+
+    @staticmethod
+    def _aware(value):
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
 
     @staticmethod
     def get_bookings(email: str):
         return BookingRepository.get_bookings(email)
 
+    @staticmethod
+    def iter_bookings(email: str, after_id: int = 0, limit: int | None = None):
+        return BookingRepository.iter_bookings(email, after_id, limit)
+
+    @staticmethod
+    def aiter_bookings(email: str, after_id: int = 0, limit: int | None = None):
+        return BookingRepository.aiter_bookings(email, after_id, limit)
+
     @staticmethod
     def get_booking(booking_id: int):
         return BookingRepository.get_booking(booking_id)
 
+    @staticmethod
+    async def aget_booking_row(booking_id: int) -> tuple:
+        return await BookingRepository.aget_booking_row(booking_id)
+
+    @staticmethod
+    async def aget_booking_row_by_token(token: str) -> tuple:
+        return await BookingRepository.aget_booking_row_by_token(token)
+
+    @staticmethod
+    async def areseller_report(reseller_id: int, start, end) -> dict:
+        """
+        Booking counts and revenue of the reseller per start day and status, and their
+        totals per status, from the booking rollups (one indexed range read).
+        """
+        days, totals = {}, {}
+        for day, status, count, revenue in await BookingRollupRepository.areport(reseller_id, start, end):
+            name = Status(status).name.lower()
+            days.setdefault(day, {})[name] = {"count": count, "revenue": revenue}
+            total = totals.setdefault(name, {"count": 0, "revenue": 0})
+            total["count"] += count
+            total["revenue"] += revenue
+        return {
+            "days": [{"day": day, "statuses": statuses} for day, statuses in days.items()],
+            "totals": totals,
+        }
+
     @staticmethod
     def cancel_booking(booking_id: int):
-        return BookingRepository.cancel_booking(booking_id)
+        with transaction.atomic():
+            booking, cancelled = BookingRepository.cancel_booking(booking_id)
+            if cancelled:
+                NotificationService.queue_cancellation(booking)
+        return booking
+
+    @staticmethod
+    def cancel_booking_by_token(token: str):
+        with transaction.atomic():
+            booking, cancelled = BookingRepository.cancel_booking_by_token(token)
+            if cancelled:
+                NotificationService.queue_cancellation(booking)
+        return booking
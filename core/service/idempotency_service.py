@@ -0,0 +1,104 @@
+import functools
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from core.models import IdempotencyKey
+from core.repository.idempotency_repository import IdempotencyRepository, digest_idempotency_key, digest_request
+from utilities.metricsutility import registry
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+registry.describe("idempotent_replays_total", "counter", "Responses replayed for a repeated Idempotency-Key, by route.")
+
+
+class _Duplicate(Exception):
+    """Another request inserted the key first; its transaction has committed."""
+
+
+def _error(message: str, status: int) -> JsonResponse:
+    return JsonResponse({
+        "status": "error",
+        "data": message
+    }, status=status)
+
+
+class IdempotencyService:
+    @staticmethod
+    def run(request, key: str, call) -> HttpResponse:
+        """
+        Runs `call` (the view) at most once per key within settings.IDEMPOTENCY_TTL_SECONDS.
+
+        - The key's row is inserted in the transaction that `call` runs in and holds the
+          final response when it commits. A retry of a completed request gets that
+          response back (with the Idempotent-Replayed header) from one query, without the
+          view or the booking tables.
+        - A duplicate sent while the first request is still running blocks on the row's
+          unique key until the first one commits, then replays its response. If the
+          first one rolls back, the duplicate's insert goes through and it runs itself.
+        - 5xx responses and exceptions roll back the view's writes together with the key,
+          so the request can be retried. The wrapped views re-raise DatabaseError (a lock
+          wait timeout, a lost connection) rather than answering 400, so only their
+          intentional answers (2xx, 404, 409, validation errors) are stored.
+        - A key sent with a different method, path or body gets a 422.
+        """
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return _error(f"{IDEMPOTENCY_HEADER} must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters", 400)
+
+        key_digest = digest_idempotency_key(key)
+        request_digest = digest_request(request.method, request.path, request.body)
+
+        stored = IdempotencyRepository.get(key_digest)
+        if stored is not None and stored.expires_at > timezone.now():
+            return IdempotencyService._replay(request, stored, request_digest)
+
+        try:
+            with transaction.atomic():
+                try:
+                    claimed = IdempotencyRepository.claim(
+                        key_digest, request_digest, settings.IDEMPOTENCY_TTL_SECONDS, expired=stored,
+                    )
+                except IntegrityError:
+                    raise _Duplicate()
+
+                response = call()
+                if response.status_code >= 500 or response.streaming:
+                    transaction.set_rollback(True)
+                    return response
+                IdempotencyRepository.complete(claimed, response.status_code, response.content)
+                return response
+        except _Duplicate:
+            pass
+
+        stored = IdempotencyRepository.get(key_digest)
+        if stored is None:
+            # The winner's row was purged in the meantime
+            return _error(f"{IDEMPOTENCY_HEADER} is in use by another request, retry later", 409)
+        return IdempotencyService._replay(request, stored, request_digest)
+
+    @staticmethod
+    def _replay(request, stored: IdempotencyKey, request_digest: bytes) -> HttpResponse:
+        if bytes(stored.request_digest) != request_digest:
+            return _error(f"{IDEMPOTENCY_HEADER} was already used for a different request", 422)
+
+        match = getattr(request, "resolver_match", None)
+        registry.inc("idempotent_replays_total", {"route": match.route if match is not None else "unmatched"})
+        response = HttpResponse(bytes(stored.response_body), status=stored.status_code, content_type="application/json")
+        response[REPLAYED_HEADER] = "true"
+        return response
+
+
+def idempotent(view):
+    """
+    Lets clients retry a (sync) write view safely by sending an Idempotency-Key header;
+    requests without one run as before. See IdempotencyService.run.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return view(request, *args, **kwargs)
+        return IdempotencyService.run(request, key, lambda: view(request, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,65 @@
+from datetime import datetime
+from core.models import Booking, Reseller
+from core.service.outbox_service import OutboxService
+from core.service.product_service import ProductService
+
+
+class NotificationService:
+    """
+    Builds the customer email template models for booking events and queues them in
+    the email outbox. Call these inside the transaction that changes the booking so
+    the email is queued if and only if the change commits. The booking's access token
+    is not queued; the outbox worker adds it when the confirmation is sent.
+    """
+
+    @staticmethod
+    def _reseller_name(reseller_id: int) -> str:
+        reseller = Reseller.objects.filter(pk=reseller_id).first()
+        return reseller.name if reseller else ""
+
+    @staticmethod
+    def _confirmation_template(booking: Booking, parking_type: str, reseller_name: str) -> dict:
+        return {
+            "subject": "Your booking is confirmed",
+            "email": booking.customer_email,
+            "booking_id": booking.booking_id,
+            "reseller_name": reseller_name,
+            "start_date": booking.start_date.strftime('%Y-%m-%d %H:%M'),
+            "end_date": booking.end_date.strftime('%Y-%m-%d %H:%M'),
+            "parking_type": parking_type,
+            "CURRENT_YEAR": datetime.now().year,
+        }
+
+    @staticmethod
+    def queue_confirmation(booking: Booking):
+        product = ProductService.get_product(booking.product_id)
+        if product is None:
+            raise ValueError("Product not found")
+        return OutboxService.enqueue("confirmation", booking.customer_email, NotificationService._confirmation_template(
+            booking, product["type"], NotificationService._reseller_name(booking.reseller_id)
+        ))
+
+    @staticmethod
+    def queue_confirmations(bookings: list[Booking], products: dict, resellers: dict):
+        """
+        Queues confirmations for many bookings with one insert.
+        `products` and `resellers` map ids to the model instances (as returned by in_bulk).
+        """
+        return OutboxService.enqueue_many([
+            ("confirmation", booking.customer_email, NotificationService._confirmation_template(
+                booking,
+                products[booking.product_id].type if booking.product_id in products else "",
+                resellers[booking.reseller_id].name if booking.reseller_id in resellers else "",
+            ))
+            for booking in bookings
+        ])
+
+    @staticmethod
+    def queue_cancellation(booking: Booking):
+        return OutboxService.enqueue("cancellation", booking.customer_email, {
+            "subject": "Your booking has been cancelled",
+            "customer_email": booking.customer_email,
+            "booking_id": booking.booking_id,
+            "reseller_name": NotificationService._reseller_name(booking.reseller_id),
+            "CURRENT_YEAR": datetime.now().year,
+        })
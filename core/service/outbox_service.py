@@ -0,0 +1,114 @@
+import logging
+import random
+from itertools import groupby
+from django.conf import settings
+from django.utils.module_loading import import_string
+from core.repository.booking_repository import BookingRepository
+from core.repository.outbox_repository import OutboxRepository
+from utilities.circuitbreaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    @staticmethod
+    def enqueue(kind: str, to_email: str, template_data: dict):
+        return OutboxRepository.enqueue(kind, to_email, template_data)
+
+    @staticmethod
+    def enqueue_many(messages: list[tuple[str, str, dict]]):
+        return OutboxRepository.enqueue_many(messages)
+
+    @staticmethod
+    def backoff_seconds(attempts: int) -> float:
+        """Exponential backoff with jitter for a message that has failed `attempts` times."""
+        delay = min(
+            settings.OUTBOX_BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)),
+            settings.OUTBOX_BACKOFF_MAX_SECONDS,
+        )
+        return delay * random.uniform(0.8, 1.2)
+
+    @staticmethod
+    def _add_access_tokens(messages: list):
+        """
+        Adds each booking's access token to the confirmation template data of the
+        claimed messages, in memory only. Outbox rows never store the token.
+        """
+        tokens = BookingRepository.access_tokens([m.template_data.get("booking_id") for m in messages])
+        for message in messages:
+            token = tokens.get(message.template_data.get("booking_id"))
+            if token:
+                message.template_data = {**message.template_data, "access_token": token}
+
+    @staticmethod
+    def _deliver(kind: str, messages: list, sender, bulk_sender) -> tuple[list, float]:
+        """
+        Sends messages of one kind. Returns a (delivered, error) pair per message, where
+        delivered is None for messages that were not attempted because the mail circuit
+        is open, plus the number of seconds until the circuit may close again.
+        """
+        if bulk_sender is not None:
+            try:
+                flags = bulk_sender(kind, [(m.to_email, m.template_data) for m in messages])
+            except CircuitOpenError as e:
+                return [(None, str(e))] * len(messages), e.retry_after
+            except Exception as e:
+                return [(False, str(e) or e.__class__.__name__)] * len(messages), 0.0
+            return [(flag, "" if flag else "send failed") for flag in flags], 0.0
+
+        outcomes = []
+        for index, message in enumerate(messages):
+            try:
+                delivered = sender(message.kind, message.to_email, message.template_data)
+                outcomes.append((delivered, "" if delivered else "send failed"))
+            except CircuitOpenError as e:
+                outcomes.extend([(None, str(e))] * (len(messages) - index))
+                return outcomes, e.retry_after
+            except Exception as e:
+                outcomes.append((False, str(e) or e.__class__.__name__))
+        return outcomes, 0.0
+
+    @staticmethod
+    def drain(batch_size: int | None = None, sender=None) -> dict:
+        """
+        Delivers one batch of due outbox messages, grouped per email kind so the bulk
+        sender can use one SES call per template.
+        Returns counts of sent, retried, permanently failed and deferred messages.
+        Messages are deferred without using up an attempt while the mail circuit is open.
+        """
+        batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        bulk_sender = None
+        if sender is None:
+            sender = import_string(settings.MAIL_SENDER)
+            if settings.MAIL_BULK_SENDER:
+                bulk_sender = import_string(settings.MAIL_BULK_SENDER)
+        result = {"sent": 0, "retried": 0, "failed": 0, "deferred": 0}
+
+        messages = OutboxRepository.claim_batch(batch_size, settings.OUTBOX_LEASE_SECONDS)
+        messages.sort(key=lambda m: m.kind)
+        for kind, group in groupby(messages, key=lambda m: m.kind):
+            group = list(group)
+            if kind == "confirmation":
+                OutboxService._add_access_tokens(group)
+            outcomes, retry_after = OutboxService._deliver(kind, group, sender, bulk_sender)
+
+            deferred = [m for m, (delivered, _) in zip(group, outcomes) if delivered is None]
+            if deferred:
+                OutboxRepository.release(deferred, max(retry_after, 1.0))
+                result["deferred"] += len(deferred)
+
+            for message, (delivered, error) in zip(group, outcomes):
+                if delivered is None:
+                    continue
+                if delivered:
+                    OutboxRepository.mark_sent(message)
+                    result["sent"] += 1
+                elif message.attempts + 1 >= settings.OUTBOX_MAX_ATTEMPTS:
+                    OutboxRepository.mark_failed(message, error)
+                    logger.error("Outbox message %s failed permanently: %s", message.id, error)
+                    result["failed"] += 1
+                else:
+                    OutboxRepository.mark_retry(message, OutboxService.backoff_seconds(message.attempts + 1), error)
+                    result["retried"] += 1
+
+        return result
@@ -0,0 +1,204 @@
+import csv
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from core.models import Product, Reseller
+from core.repository.product_facet_repository import FACET_FIELDS, ProductFacetRepository
+from core.repository.rating_histogram_repository import RatingHistogramRepository, rating_bucket
+from core.service.product_service import ProductService
+
+CSV_COLUMNS = ("reseller_id", "name", "type", "price_per_day", "rating")
+MAX_PRICE = Decimal("99999999.99")
+
+
+class ProductImportService:
+    """
+    Streams a reseller catalog (NDJSON or CSV) into Product rows.
+    Rows are parsed one at a time, validated, and written in chunks with bulk_create, so
+    memory use depends on the chunk size and not on the size of the upload.
+    """
+
+    CHUNK_SIZE = 5000
+    MAX_REPORTED_REJECTIONS = 1000
+
+    @staticmethod
+    def _decode(lines):
+        """Yields (line_number, text or ValueError) for each line; bad UTF-8 only fails its own line."""
+        for number, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                try:
+                    line = line.decode("utf-8-sig" if number == 1 else "utf-8")
+                except UnicodeDecodeError as e:
+                    line = ValueError(f"Invalid UTF-8: {e}")
+            yield number, line
+
+    @staticmethod
+    def parse_ndjson(lines):
+        """Yields (line_number, row dict or parse error) for each non-blank line."""
+        for number, line in ProductImportService._decode(lines):
+            if isinstance(line, ValueError):
+                yield number, line
+                continue
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError("Expected a JSON object")
+                yield number, row
+            except ValueError as e:
+                yield number, ValueError(f"Invalid JSON: {e}")
+
+    @staticmethod
+    def parse_csv(lines):
+        """
+        Yields (line_number, row dict or parse error) for each data row; the first row must
+        be a header. Lines that are not UTF-8 and rows the csv module rejects (NUL bytes,
+        oversized fields) are reported as errors, and parsing continues after them.
+        """
+        numbered = ProductImportService._decode(lines)
+        line_numbers = []
+        undecodable = []
+
+        def text():
+            for number, line in numbered:
+                if isinstance(line, ValueError):
+                    undecodable.append((number, line))
+                    continue
+                line_numbers.append(number)
+                yield line
+
+        reader = csv.DictReader(text())
+        try:
+            fieldnames = reader.fieldnames or []
+        except csv.Error as e:
+            raise ValueError(f"Invalid CSV header: {e}")
+        if undecodable:
+            raise ValueError(f"CSV header: {undecodable[0][1]}")
+        missing = [column for column in CSV_COLUMNS if column != "rating" and column not in fieldnames]
+        if missing:
+            raise ValueError(f"CSV header is missing column(s): {', '.join(missing)}")
+
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as e:
+                row = ValueError(f"Invalid CSV: {e}")
+            yield from undecodable
+            undecodable.clear()
+            if isinstance(row, ValueError):
+                yield line_numbers[-1], row
+            else:
+                yield line_numbers[-1], {key: (value if value != "" else None) for key, value in row.items()}
+        yield from undecodable
+
+    @staticmethod
+    def _validate(row: dict, resellers: set) -> Product:
+        try:
+            reseller_id = int(row.get("reseller_id"))
+        except (TypeError, ValueError):
+            raise ValueError("reseller_id must be an integer")
+        if reseller_id not in resellers:
+            raise ValueError(f"Reseller {reseller_id} does not exist")
+
+        name = row.get("name")
+        if not name or len(str(name)) > 150:
+            raise ValueError("name is required (max 150 characters)")
+        product_type = row.get("type")
+        if not product_type or len(str(product_type)) > 50:
+            raise ValueError("type is required (max 50 characters)")
+
+        try:
+            price = Decimal(str(row.get("price_per_day")))
+        except InvalidOperation:
+            raise ValueError("price_per_day must be a number")
+        if not price.is_finite() or price < 0 or price > MAX_PRICE:
+            raise ValueError("price_per_day must be between 0 and 99999999.99")
+
+        rating = row.get("rating")
+        if rating is not None:
+            try:
+                rating = Decimal(str(rating))
+            except InvalidOperation:
+                raise ValueError("rating must be a number")
+            if not rating.is_finite() or rating < 0 or rating > 5:
+                raise ValueError("rating must be between 0 and 5")
+
+        return Product(
+            reseller_id=reseller_id,
+            name=str(name),
+            type=str(product_type),
+            price_per_day=price.quantize(Decimal("0.01")),
+            rating=rating.quantize(Decimal("0.1")) if rating is not None else None,
+        )
+
+    @staticmethod
+    def _write_chunk(products: list[Product]):
+        with transaction.atomic():
+            Product.objects.bulk_create(products)
+            # bulk_create bypasses the Product signals, so maintain the summaries here
+            RatingHistogramRepository.adjust_many(Counter(
+                bucket for bucket in (rating_bucket(p.rating) for p in products) if bucket is not None
+            ))
+            ProductFacetRepository.apply(Counter(
+                (field, getattr(p, field)) for p in products for field in FACET_FIELDS
+            ))
+
+    @staticmethod
+    def import_rows(rows, chunk_size: int | None = None) -> dict:
+        """
+        Imports (line_number, row dict or error) pairs. Valid rows are written in chunks;
+        invalid ones are skipped and reported. Returns an import summary.
+        """
+        chunk_size = chunk_size or ProductImportService.CHUNK_SIZE
+        resellers = set(Reseller.objects.values_list("id", flat=True))
+        summary = {"received": 0, "created": 0, "rejected_count": 0, "rejected": []}
+        chunk = []
+
+        def reject(line, error):
+            summary["rejected_count"] += 1
+            if len(summary["rejected"]) < ProductImportService.MAX_REPORTED_REJECTIONS:
+                summary["rejected"].append({"line": line, "error": str(error)})
+
+        try:
+            for line, row in rows:
+                summary["received"] += 1
+                if isinstance(row, Exception):
+                    reject(line, row)
+                    continue
+                try:
+                    chunk.append(ProductImportService._validate(row, resellers))
+                except ValueError as e:
+                    reject(line, e)
+                    continue
+
+                if len(chunk) >= chunk_size:
+                    ProductImportService._write_chunk(chunk)
+                    summary["created"] += len(chunk)
+                    chunk = []
+
+            if chunk:
+                ProductImportService._write_chunk(chunk)
+                summary["created"] += len(chunk)
+        finally:
+            # Chunks commit one by one, so an import that fails halfway has changed the
+            # catalog too
+            if summary["created"]:
+                ProductService.invalidate_catalog()
+
+        summary["rejected_truncated"] = summary["rejected_count"] > len(summary["rejected"])
+        return summary
+
+    @staticmethod
+    def import_stream(lines, fmt: str, chunk_size: int | None = None) -> dict:
+        """Imports a line iterator (bytes or str) in "ndjson" or "csv" format."""
+        if fmt == "ndjson":
+            rows = ProductImportService.parse_ndjson(lines)
+        elif fmt == "csv":
+            rows = ProductImportService.parse_csv(lines)
+        else:
+            raise ValueError("format must be 'ndjson' or 'csv'")
+        return ProductImportService.import_rows(rows, chunk_size)
@@ -0,0 +1,165 @@
+import hashlib
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from core.db import routing
+from core.dto.product_search_dto import ProductSearchDTO
+from core.repository.product_facet_repository import ProductFacetRepository
+from core.repository.product_repository import ProductRepository
+from core.repository.rating_histogram_repository import RatingHistogramRepository, RATING_BUCKETS, min_rating_bucket
+from utilities.cacheutility import TieredCache
+from utilities.etagutility import make_etag
+
+catalog_cache = TieredCache(
+    "catalog",
+    ttl=settings.CATALOG_CACHE_TTL,
+    local_max_entries=settings.CATALOG_CACHE_LOCAL_MAX_ENTRIES,
+    local_ttl=settings.CATALOG_CACHE_LOCAL_TTL,
+    # Replicas may lag behind a change just made; fill from the primary until they caught up
+    fill_context=routing.after_change,
+)
+
+
+class ProductService:
+    """
+    Read-through cached access to the product catalog.
+    Any product change must call invalidate_catalog() (the Product signals do).
+    """
+
+    @staticmethod
+    def invalidate_catalog():
+        # After commit, so no reader can cache pre-change rows under the new generation
+        transaction.on_commit(catalog_cache.bump)
+
+    @staticmethod
+    def create_product(**fields):
+        return ProductRepository.create_product(**fields)
+
+    @staticmethod
+    def _load_product_entry(product_id: int) -> tuple[dict, str] | None:
+        product = ProductRepository.get_product(product_id)
+        if product is None:
+            return None
+        updated_at = product.pop("updated_at")
+        return product, make_etag("product", product_id, updated_at.isoformat())
+
+    @staticmethod
+    def get_product_with_etag(product_id: int) -> tuple[dict | None, str | None]:
+        entry = catalog_cache.get_or_set(
+            f"product:{product_id}",
+            lambda: ProductService._load_product_entry(product_id),
+        )
+        return entry if entry is not None else (None, None)
+
+    @staticmethod
+    async def _aload_product_entry(product_id: int) -> tuple[dict, str] | None:
+        product = await ProductRepository.aget_product(product_id)
+        if product is None:
+            return None
+        updated_at = product.pop("updated_at")
+        return product, make_etag("product", product_id, updated_at.isoformat())
+
+    @staticmethod
+    async def aget_product_with_etag(product_id: int) -> tuple[dict | None, str | None]:
+        entry = await catalog_cache.aget_or_set(
+            f"product:{product_id}",
+            lambda: ProductService._aload_product_entry(product_id),
+        )
+        return entry if entry is not None else (None, None)
+
+    @staticmethod
+    def get_product(product_id: int) -> dict | None:
+        return ProductService.get_product_with_etag(product_id)[0]
+
+    @staticmethod
+    def catalog_etag(*parts) -> str:
+        """ETag for a catalog listing; changes whenever any product changes."""
+        return make_etag("catalog", catalog_cache.generation(), *parts)
+
+    @staticmethod
+    async def acatalog_etag(*parts) -> str:
+        return make_etag("catalog", await catalog_cache.ageneration(), *parts)
+
+    @staticmethod
+    def count_products(min_rating: Decimal) -> int:
+        suffix = catalog_cache.get_or_set("rating_suffix", RatingHistogramRepository.suffix_counts)
+        return suffix[min(max(min_rating_bucket(min_rating), 0), RATING_BUCKETS)]
+
+    @staticmethod
+    async def acount_products(min_rating: Decimal) -> int:
+        suffix = await catalog_cache.aget_or_set("rating_suffix", RatingHistogramRepository.asuffix_counts)
+        return suffix[min(max(min_rating_bucket(min_rating), 0), RATING_BUCKETS)]
+
+    @staticmethod
+    def list_products(min_rating: Decimal, offset: int, limit: int) -> list[dict]:
+        return catalog_cache.get_or_set(
+            f"list:{min_rating}:{offset}:{limit}",
+            lambda: ProductRepository.list_products(min_rating, offset, limit),
+        )
+
+    @staticmethod
+    async def alist_products(min_rating: Decimal, offset: int, limit: int) -> list[dict]:
+        return await catalog_cache.aget_or_set(
+            f"list:{min_rating}:{offset}:{limit}",
+            lambda: ProductRepository.alist_products(min_rating, offset, limit),
+        )
+
+    @staticmethod
+    def list_products_after(min_rating: Decimal, after: tuple[Decimal, int] | None, limit: int) -> list[dict]:
+        after_key = f"{after[0]}:{after[1]}" if after else "start"
+        return catalog_cache.get_or_set(
+            f"after:{min_rating}:{after_key}:{limit}",
+            lambda: ProductRepository.list_products_after(min_rating, after, limit),
+        )
+
+    @staticmethod
+    async def alist_products_after(min_rating: Decimal, after: tuple[Decimal, int] | None, limit: int) -> list[dict]:
+        after_key = f"{after[0]}:{after[1]}" if after else "start"
+        return await catalog_cache.aget_or_set(
+            f"after:{min_rating}:{after_key}:{limit}",
+            lambda: ProductRepository.alist_products_after(min_rating, after, limit),
+        )
+
+    @staticmethod
+    async def _asearch_page(search: ProductSearchDTO) -> tuple[list[dict], tuple | None]:
+        rows = await ProductRepository.asearch_products(search)
+        after = (rows[-1]["sort_key"], rows[-1]["product_id"]) if len(rows) == search.limit else None
+        for row in rows:
+            del row["sort_key"]
+        return rows, after
+
+    @staticmethod
+    async def asearch_products(search: ProductSearchDTO) -> tuple[list[dict], tuple | None]:
+        """
+        A page of search results and the (sort value, product_id) key of its last row,
+        None on the last page.
+        """
+        # Hashed: name prefixes are client input and may not be valid cache key characters
+        key = hashlib.blake2b(repr(search).encode(), digest_size=16).hexdigest()
+        return await catalog_cache.aget_or_set(f"search:{key}", lambda: ProductService._asearch_page(search))
+
+    @staticmethod
+    async def _aload_facets() -> dict:
+        types, resellers = [], []
+        for row in await ProductFacetRepository.afacets():
+            facet = {"count": row["product_count"], "min_price": row["min_price"], "max_price": row["max_price"]}
+            if row["type"] is not None:
+                types.append({"type": row["type"], **facet})
+            else:
+                resellers.append({"reseller_id": row["reseller_id"], "name": row["reseller__name"], **facet})
+        # Every product has exactly one type, so the type facets cover the whole catalog
+        return {
+            "total": sum(facet["count"] for facet in types),
+            "min_price": min((facet["min_price"] for facet in types), default=None),
+            "max_price": max((facet["max_price"] for facet in types), default=None),
+            "types": types,
+            "resellers": resellers,
+        }
+
+    @staticmethod
+    async def aproduct_facets() -> dict:
+        return await catalog_cache.aget_or_set("facets", ProductService._aload_facets)
+
+    @staticmethod
+    def cache_stats() -> dict:
+        return catalog_cache.stats()
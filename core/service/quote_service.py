@@ -0,0 +1,82 @@
+import math
+from decimal import Decimal, ROUND_HALF_UP
+from django.conf import settings
+from core.dto.booking_dto import BookingDTO
+from core.dto.quote_dto import QuoteItemDTO
+from core.repository.product_repository import ProductRepository
+
+CENT = Decimal("0.01")
+SECONDS_PER_DAY = 86400
+
+
+class QuoteService:
+    MAX_ITEMS = 500
+
+    @staticmethod
+    def billable_days(item: QuoteItemDTO) -> int:
+        """
+        Every started 24 hours is billed as a full day. Raises ValueError unless end_date
+        is after start_date.
+        """
+        seconds = (item.end_date - item.start_date).total_seconds()
+        if seconds <= 0:
+            raise ValueError("end_date must be after start_date")
+        return math.ceil(seconds / SECONDS_PER_DAY)
+
+    @staticmethod
+    def price_items(items: list[QuoteItemDTO], prices: dict[int, Decimal]) -> list[dict]:
+        """Prices every item against the given price_per_day map in one pass."""
+        priced = []
+        for item in items:
+            price = prices.get(item.product_id)
+            if price is None:
+                priced.append({"product_id": item.product_id, "error": "Product not found"})
+                continue
+            try:
+                days = QuoteService.billable_days(item)
+            except ValueError as e:
+                priced.append({"product_id": item.product_id, "error": str(e)})
+                continue
+            priced.append({
+                "product_id": item.product_id,
+                "days": days,
+                "price_per_day": price,
+                "total_price": (price * days).quantize(CENT, rounding=ROUND_HALF_UP),
+            })
+        return priced
+
+    @staticmethod
+    def quote(items: list[QuoteItemDTO]) -> list[dict]:
+        """Prices many (product, date range) items with a single product query."""
+        if len(items) > QuoteService.MAX_ITEMS:
+            raise ValueError(f"At most {QuoteService.MAX_ITEMS} items can be quoted at once")
+        prices = ProductRepository.get_prices({item.product_id for item in items})
+        return QuoteService.price_items(items, prices)
+
+    @staticmethod
+    def check_totals(dtos: list[BookingDTO], prices: dict[int, Decimal] | None = None) -> list[str | None]:
+        """
+        Compares each booking's total_price with its quote. Returns an error message per
+        booking, or None where the price is correct. Loads prices in one query if not given.
+        """
+        items = [QuoteItemDTO(dto.product_id, dto.start_date, dto.end_date) for dto in dtos]
+        if prices is None:
+            prices = ProductRepository.get_prices({item.product_id for item in items})
+        errors = []
+        for dto, quoted in zip(dtos, QuoteService.price_items(items, prices)):
+            if "error" in quoted:
+                errors.append(quoted["error"])
+            elif Decimal(dto.total_price) != quoted["total_price"]:
+                errors.append(f"total_price does not match the quoted price of {quoted['total_price']}")
+            else:
+                errors.append(None)
+        return errors
+
+    @staticmethod
+    def verify_total(dto: BookingDTO):
+        """Raises ValueError if the booking's total_price differs from the quoted price."""
+        if not settings.BOOKING_VERIFY_PRICE:
+            return
+        error = QuoteService.check_totals([dto])[0]
+        if error:
+            raise ValueError(error)
@@ -0,0 +1,62 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from core.models import Product
+from core.repository.product_facet_repository import ProductFacetRepository, facet_changes
+from core.repository.rating_histogram_repository import RatingHistogramRepository, rating_bucket
+from core.service.product_service import ProductService
+from utilities import querycountutility
+
+# Keep the derived product summaries and the catalog cache in sync with Product rows.
+# Note: queryset.update() and bulk_create() bypass these signals; code using them must
+# update the summaries itself (or run the matching rebuild command).
+
+
+def _facet_values(product) -> tuple:
+    # The price normalised like the stored row, so an unchanged price compares equal
+    return product.type, product.reseller_id, Product._meta.get_field("price_per_day").to_python(product.price_per_day)
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_values(sender, instance, raw=False, **kwargs):
+    instance._previous_rating = None
+    instance._previous_facet_values = None
+    if not raw and not instance._state.adding and instance.pk is not None:
+        previous = (
+            Product.objects.filter(pk=instance.pk)
+            .values_list("rating", "type", "reseller_id", "price_per_day").first()
+        )
+        if previous is not None:
+            instance._previous_rating, *facet_values = previous
+            instance._previous_facet_values = tuple(facet_values)
+
+
+@receiver(post_save, sender=Product)
+def update_summaries_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    ProductService.invalidate_catalog()
+    current = _facet_values(instance)
+    if created:
+        RatingHistogramRepository.adjust(instance.rating, 1)
+        ProductFacetRepository.apply(facet_changes(None, current))
+        return
+
+    previous = getattr(instance, "_previous_rating", None)
+    if rating_bucket(previous) != rating_bucket(instance.rating):
+        RatingHistogramRepository.adjust(previous, -1)
+        RatingHistogramRepository.adjust(instance.rating, 1)
+    ProductFacetRepository.apply(facet_changes(getattr(instance, "_previous_facet_values", None), current))
+
+
+@receiver(post_delete, sender=Product)
+def update_summaries_on_delete(sender, instance, **kwargs):
+    ProductService.invalidate_catalog()
+    RatingHistogramRepository.adjust(instance.rating, -1)
+    ProductFacetRepository.apply(facet_changes(_facet_values(instance), None))
+
+
+@receiver(connection_created)
+def count_queries(sender, connection, **kwargs):
+    # Per-request query accounting (QueryCountMiddleware)
+    querycountutility.install(connection)
@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+from unittest import mock
+from django.test import SimpleTestCase
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class _Connections:
+    """connect() for the pool: in-memory SQLite connections, remembering every one opened."""
+
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self.opened.append(connection)
+        return connection
+
+
+def _closed(connection) -> bool:
+    try:
+        connection.execute("SELECT 1")
+        return False
+    except sqlite3.ProgrammingError:
+        return True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.connect = _Connections()
+
+    def _freeze_clock(self):
+        """The pool's clock reads self.now from here on."""
+        self.now = 1000.0
+        clock = mock.patch("core.db.pool.time.monotonic", lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def _pool(self, **options) -> ConnectionPool:
+        options = {"size": 2, "max_overflow": 1, "timeout": 0.05, "recycle": 600, "pre_ping_after": 30, **options}
+        return ConnectionPool("test", self.connect, **options)
+
+    def test_released_connections_are_reused(self):
+        pool = self._pool()
+        first, fresh = pool.acquire()
+        self.assertTrue(fresh)
+        pool.release(first)
+        again, fresh = pool.acquire()
+        self.assertIs(again, first)
+        self.assertFalse(fresh)
+        self.assertEqual(len(self.connect.opened), 1)
+
+    def test_overflow_connections_are_closed_on_release(self):
+        pool = self._pool()
+        connections = [pool.acquire()[0] for _ in range(3)]
+        self.assertEqual(pool.stats()["in_use"], 3)
+        for connection in connections:
+            pool.release(connection)
+        self.assertEqual(pool.stats(), {"size": 2, "max_overflow": 1, "idle": 2, "in_use": 0, "open": 2})
+        self.assertEqual(sum(map(_closed, connections)), 1)
+
+    def test_acquire_times_out_when_exhausted(self):
+        pool = self._pool(timeout=0)
+        for _ in range(3):
+            pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+    def test_waiter_gets_a_released_connection(self):
+        pool = self._pool(size=1, max_overflow=0, timeout=5)
+        held, _ = pool.acquire()
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire()[0]))
+        waiter.start()
+        pool.release(held)
+        waiter.join(5)
+        self.assertEqual(got, [held])
+
+    def test_old_connections_are_recycled(self):
+        self._freeze_clock()
+        pool = self._pool(recycle=600)
+        first, _ = pool.acquire()
+        pool.release(first)
+        self.now += 601
+        second, fresh = pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(fresh)
+        self.assertTrue(_closed(first))
+        self.assertEqual(pool.stats()["open"], 1)
+
+    def test_idle_connections_are_pinged_and_replaced_when_dead(self):
+        alive = {"ok": True}
+
+        def ping(connection):
+            if not alive["ok"]:
+                raise sqlite3.OperationalError("server has gone away")
+
+        self._freeze_clock()
+        pool = self._pool(ping=ping, pre_ping_after=30)
+        first, _ = pool.acquire()
+        pool.release(first)
+        # Idle below the threshold: no ping, even if the server is gone
+        alive["ok"] = False
+        self.now += 10
+        self.assertIs(pool.acquire()[0], first)
+        pool.release(first)
+        self.now += 31
+        second, fresh = pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertTrue(fresh)
+
+    def test_discarded_connections_free_their_slot(self):
+        pool = self._pool(size=1, max_overflow=0, timeout=0)
+        first, _ = pool.acquire()
+        pool.release(first, discard=True)
+        self.assertTrue(_closed(first))
+        second, fresh = pool.acquire()
+        self.assertTrue(fresh)
+        self.assertIsNot(second, first)
+
+    def test_failed_connect_frees_its_slot(self):
+        def refuse():
+            raise sqlite3.OperationalError("connection refused")
+
+        pool = ConnectionPool("test", refuse, size=1, max_overflow=0, timeout=0)
+        for _ in range(2):
+            with self.assertRaises(sqlite3.OperationalError):
+                pool.acquire()
+        self.assertEqual(pool.stats()["open"], 0)
@@ -0,0 +1,45 @@
+import os
+import unittest
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+from core.db.pool import close_pools
+from core.testsuite.utils.benchmark import benchmark, summarize, time_calls
+
+# Needs a real MySQL server (the test database is SQLite), e.g. the docker-compose one:
+#   BENCHMARK_MYSQL_HOST, BENCHMARK_MYSQL_PORT, BENCHMARK_MYSQL_NAME, BENCHMARK_MYSQL_USER,
+#   BENCHMARK_MYSQL_PASS; BENCHMARK_MYSQL_SSL=1 to connect with TLS like production.
+MYSQL = {
+    "NAME": os.getenv("BENCHMARK_MYSQL_NAME"),
+    "USER": os.getenv("BENCHMARK_MYSQL_USER"),
+    "PASSWORD": os.getenv("BENCHMARK_MYSQL_PASS"),
+    "HOST": os.getenv("BENCHMARK_MYSQL_HOST"),
+    "PORT": os.getenv("BENCHMARK_MYSQL_PORT", "3306"),
+    "OPTIONS": {"charset": "utf8mb4", **({"ssl_mode": "REQUIRED"} if os.getenv("BENCHMARK_MYSQL_SSL") == "1" else {})},
+}
+REQUESTS = 500
+
+
+def _request(connection):
+    """What a request costs the database layer at the least: connect, one query, close."""
+    connection.ensure_connection()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+    connection.close()
+
+
+@benchmark
+@unittest.skipUnless(MYSQL["HOST"], "set BENCHMARK_MYSQL_HOST to benchmark against MySQL")
+class ConnectionPoolBenchmark(SimpleTestCase):
+    """Per-request connect (CONN_MAX_AGE=0) against a pooled checkout, on a real MySQL server."""
+
+    def test_pool_removes_the_handshake(self):
+        connections = ConnectionHandler({
+            "direct": {**MYSQL, "ENGINE": "django.db.backends.mysql"},
+            "pooled": {**MYSQL, "ENGINE": "core.db.backends.mysqlpool", "POOL": {"size": 1, "max_overflow": 0}},
+        })
+        self.addCleanup(close_pools)
+        direct = summarize(time_calls(lambda: _request(connections["direct"]), REQUESTS))
+        pooled = summarize(time_calls(lambda: _request(connections["pooled"]), REQUESTS))
+        print(f"\nConnect per request: {direct}\nPooled connection:   {pooled}")
+        self.assertLess(pooled["p50_ms"], direct["p50_ms"])
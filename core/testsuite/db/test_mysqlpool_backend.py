@@ -0,0 +1,144 @@
+import unittest
+from unittest import mock
+from django.core.exceptions import ImproperlyConfigured
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+from core.db import pool
+
+try:
+    from django.db.backends.mysql import base as mysql
+except ImproperlyConfigured:
+    # mysqlclient is not installed
+    mysql = None
+
+
+class _FakeConnection:
+    """The parts of a MySQLdb connection the pooled backend uses, recording the calls."""
+
+    def __init__(self):
+        self.encoders = {}
+        self.autocommit_mode = True
+        self.calls = []
+        self.closed = False
+        self.fail_rollback = False
+        self.fail_ping = False
+
+    def get_autocommit(self):
+        return self.autocommit_mode
+
+    def autocommit(self, value):
+        self.calls.append(("autocommit", value))
+        self.autocommit_mode = value
+
+    def rollback(self):
+        self.calls.append("rollback")
+        if self.fail_rollback:
+            raise mysql.Database.OperationalError(2013, "Lost connection to MySQL server during query")
+
+    def ping(self):
+        self.calls.append("ping")
+        if self.fail_ping:
+            raise mysql.Database.OperationalError(2006, "MySQL server has gone away")
+
+    def close(self):
+        self.closed = True
+
+
+@unittest.skipUnless(mysql, "needs mysqlclient")
+class PooledBackendTests(SimpleTestCase):
+    """
+    core.db.backends.mysqlpool.DatabaseWrapper against a fake MySQLdb.connect: what
+    Django's connect()/close() per request do to the pooled connections.
+    """
+
+    def setUp(self):
+        self.opened = []
+        patches = [
+            mock.patch.object(mysql.Database, "connect", self._connect),
+            # The session SETs need a server; count the calls instead
+            mock.patch.object(mysql.DatabaseWrapper, "init_connection_state"),
+            mock.patch.dict(pool._pools, clear=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.init_connection_state = mysql.DatabaseWrapper.init_connection_state
+        self.handler = ConnectionHandler({
+            "default": {"ENGINE": "django.db.backends.sqlite3"},
+            "pooled": {
+                "ENGINE": "core.db.backends.mysqlpool", "NAME": "roosh", "USER": "roosh", "HOST": "db",
+                "POOL": {"size": 1, "max_overflow": 0, "timeout": 0.05, "recycle": 600, "pre_ping_after": 30},
+            },
+        })
+
+    def _connect(self, **params):
+        connection = _FakeConnection()
+        self.opened.append(connection)
+        return connection
+
+    def _request(self):
+        """Django's connection handling around one request: connect, then close."""
+        wrapper = self.handler["pooled"]
+        wrapper.connect()
+        return wrapper
+
+    def test_connections_are_reused_without_repeating_the_session_setup(self):
+        wrapper = self._request()
+        first = wrapper.connection
+        wrapper.close()
+        self.assertFalse(first.closed)
+
+        wrapper.connect()
+        self.assertIs(wrapper.connection, first)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(self.init_connection_state.call_count, 1)
+        # Already in autocommit mode, so connect() did not send it again
+        self.assertEqual(first.calls, [])
+        wrapper.close()
+
+    def test_a_connection_closed_in_a_transaction_is_rolled_back_before_reuse(self):
+        wrapper = self._request()
+        connection = wrapper.connection
+        wrapper.set_autocommit(False)
+        wrapper.close()
+        self.assertEqual(connection.calls, [("autocommit", False), "rollback", ("autocommit", True)])
+
+        wrapper.connect()
+        self.assertIs(wrapper.connection, connection)
+        self.assertTrue(connection.get_autocommit())
+        wrapper.close()
+
+    def test_a_connection_whose_rollback_fails_is_discarded(self):
+        wrapper = self._request()
+        connection = wrapper.connection
+        wrapper.set_autocommit(False)
+        connection.fail_rollback = True
+        wrapper.close()
+        self.assertTrue(connection.closed)
+
+        wrapper.connect()
+        self.assertIsNot(wrapper.connection, connection)
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(self.init_connection_state.call_count, 2)
+        wrapper.close()
+
+    def test_after_an_error_the_connection_is_pinged_and_discarded_if_dead(self):
+        wrapper = self._request()
+        alive = wrapper.connection
+        wrapper.errors_occurred = True
+        wrapper.close()
+        self.assertEqual(alive.calls, ["ping"])
+        self.assertFalse(alive.closed)
+
+        wrapper.connect()
+        dead = wrapper.connection
+        self.assertIs(dead, alive)
+        wrapper.errors_occurred = True
+        dead.fail_ping = True
+        wrapper.close()
+        self.assertTrue(dead.closed)
+        self.assertEqual(pool._pools["pooled"].stats()["open"], 0)
+
+        wrapper.connect()
+        self.assertEqual(len(self.opened), 2)
+        wrapper.close()
@@ -0,0 +1,119 @@
+import json
+import os
+import time
+from datetime import timedelta
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.test import AsyncClient, Client, TransactionTestCase, override_settings
+from core.db import routing
+from core.models import Booking, Product, RatingBucket, Reseller
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.seed import SEED_START, seed_bookings, seed_catalog
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    The "replica" test database is a second SQLite database with no replication: rows
+    written after _replicate() exist only on the primary, so every read shows which
+    database answered it.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        with routing.primary():
+            self.products = seed_catalog(resellers=1, products_per_reseller=3)
+            seed_bookings(5, self.products)
+        self._replicate(Reseller, Product, RatingBucket, Booking)
+        cache.clear()
+        catalog_cache.clear_local()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+        self.product = self.products[0]
+
+    @staticmethod
+    def _replicate(*models):
+        for model in models:
+            model.objects.using("replica").all().delete()
+            model.objects.using("replica").bulk_create(model.objects.using("default").all())
+
+    def _create_booking(self, client, email="sticky@example.com"):
+        start = SEED_START + timedelta(days=3000)
+        response = client.post("/v1/createbooking/", json.dumps({
+            "product_id": self.product.product_id,
+            "customer_email": email,
+            "reseller_id": self.product.reseller_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=2)).isoformat(),
+            "total_price": str(self.product.price_per_day * 2),
+        }), content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response
+
+    def test_reads_go_to_the_replica(self):
+        replicated = Booking.objects.using("default").first()
+        primary_only = Booking.objects.create(
+            product_id=self.product.product_id, reseller_id=self.product.reseller_id, customer_email="new@example.com",
+            start_date=SEED_START, end_date=SEED_START + timedelta(days=1), total_price=1,
+        )
+        self.assertEqual(self.client.get(f"/v1/getbooking/{replicated.booking_id}/").status_code, 200)
+        self.assertEqual(self.client.get(f"/v1/getbooking/{primary_only.booking_id}/").status_code, 400)
+
+    def test_writes_go_to_the_primary_and_pin_the_client(self):
+        booking_id = self._create_booking(self.client).json()["data"]["booking_id"]
+        self.assertTrue(Booking.objects.using("default").filter(pk=booking_id).exists())
+        self.assertFalse(Booking.objects.using("replica").filter(pk=booking_id).exists())
+
+        # The test client keeps the db_pin cookie
+        self.assertEqual(self.client.get(f"/v1/getbooking/{booking_id}/").status_code, 200)
+        # Other clients read the (lagging) replica
+        other = Client(HTTP_X_API_KEY="test-key")
+        self.assertEqual(other.get(f"/v1/getbooking/{booking_id}/").status_code, 400)
+
+    def test_pin_header_and_streamed_reads(self):
+        pin = self._create_booking(Client(HTTP_X_API_KEY="test-key"), email="stream@example.com")["X-DB-Pin"]
+        pinned = Client(HTTP_X_API_KEY="test-key", HTTP_X_DB_PIN=pin)
+        body = b"".join(pinned.get("/v1/getbookings/stream@example.com/").streaming_content)
+        self.assertEqual(len(json.loads(body)["data"]), 1)
+        body = b"".join(Client(HTTP_X_API_KEY="test-key").get("/v1/getbookings/stream@example.com/").streaming_content)
+        self.assertEqual(json.loads(body)["data"], [])
+
+    async def test_pinned_async_stream(self):
+        response = await sync_to_async(self._create_booking)(Client(HTTP_X_API_KEY="test-key"), "async@example.com")
+        streamed = await AsyncClient().get(
+            "/v1/getbookings/async@example.com/", headers={"X-API-Key": "test-key", "X-DB-Pin": response["X-DB-Pin"]},
+        )
+        body = b"".join([chunk async for chunk in streamed.streaming_content])
+        self.assertEqual(len(json.loads(body)["data"]), 1)
+
+    def test_expired_or_forged_pins_are_ignored(self):
+        booking_id = self._create_booking(Client(HTTP_X_API_KEY="test-key")).json()["data"]["booking_id"]
+        with mock.patch("time.time", return_value=time.time() - 60):
+            expired = routing.make_pin_token()
+        for pin in (expired, "primary:forged:signature"):
+            client = Client(HTTP_X_API_KEY="test-key", HTTP_X_DB_PIN=pin)
+            self.assertEqual(client.get(f"/v1/getbooking/{booking_id}/").status_code, 400)
+
+    def test_catalog_refills_from_the_primary_right_after_a_change(self):
+        response = self.client.post("/v1/createproduct/", json.dumps({
+            "reseller_id": self.product.reseller_id, "name": "New", "type": "garage",
+            "price_per_day": "10.00", "rating": "4.0",
+        }), content_type="application/json")
+        product_id = response.json()["data"]["product_id"]
+        # Not pinned, but the catalog generation is younger than REPLICA_STICKY_SECONDS
+        other = Client(HTTP_X_API_KEY="test-key")
+        self.assertEqual(other.get(f"/v1/getproduct/{product_id}/").status_code, 200)
+
+    def test_reads_inside_a_transaction_use_the_primary(self):
+        router = routing.ReplicaRouter()
+        self.assertEqual(router.db_for_read(Booking), "replica")
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Booking), "default")
+        with routing.primary():
+            self.assertEqual(router.db_for_read(Booking), "default")
+        self.assertEqual(router.db_for_write(Booking), "default")
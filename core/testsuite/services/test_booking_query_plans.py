@@ -0,0 +1,81 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from core.dto.booking_dto import BookingDTO
+from core.models import Booking
+from core.repository.booking_repository import BookingRepository
+from core.testsuite.utils.queryplan import QueryPlanTestCase
+from core.testsuite.utils.seed import SEED_START, seed_bookings, seed_catalog
+
+
+class BookingRepositoryQueryPlanTests(QueryPlanTestCase):
+    """Every BookingRepository lookup must be served by an index, not a scan of core_booking."""
+
+    @classmethod
+    def setUpTestData(cls):
+        products = seed_catalog(resellers=20, products_per_reseller=25)
+        seed_bookings(20_000, products)
+        cls.analyze()
+        cls.booking = Booking.objects.order_by("booking_id")[5000]
+
+    def test_get_bookings_uses_email_index(self):
+        statements = self.assertNoTableScan(
+            BookingRepository.get_bookings, self.booking.customer_email, tables=["core_booking"]
+        )
+        self.assertIn("booking_email_id_idx", " ".join(statements[0][1]))
+
+    def test_get_booking_uses_primary_key(self):
+        self.assertNoTableScan(BookingRepository.get_booking, self.booking.booking_id, tables=["core_booking"])
+
+    def test_cancel_booking_uses_primary_key(self):
+        def cancel():
+            with transaction.atomic():
+                BookingRepository.cancel_booking(self.booking.booking_id)
+
+        self.assertNoTableScan(cancel, tables=["core_booking"])
+
+    def test_cancel_booking_by_token_uses_digest_index(self):
+        def cancel():
+            with transaction.atomic():
+                BookingRepository.cancel_booking_by_token(self.booking.access_token)
+
+        statements = self.assertNoTableScan(cancel, tables=["core_booking"])
+        self.assertIn("access_token_digest", " ".join(statements[0][1]))
+
+    def test_create_booking_does_not_scan(self):
+        dto = BookingDTO(
+            product_id=self.booking.product_id,
+            customer_email="new@example.com",
+            reseller_id=self.booking.reseller_id,
+            start_date=SEED_START - timedelta(days=30),
+            end_date=SEED_START - timedelta(days=28),
+            total_price=Decimal("40.00"),
+        )
+
+        def create():
+            with transaction.atomic():
+                BookingRepository.create_booking(dto)
+
+        # The INSERT itself has no plan; any lookups added around it must use an index
+        self.assertNoTableScan(create, tables=["core_booking"], allow_no_reads=True)
+
+    def test_overlap_check_uses_product_end_index(self):
+        statements = self.assertNoTableScan(
+            BookingRepository.has_overlap,
+            self.booking.product_id,
+            self.booking.start_date,
+            self.booking.end_date,
+            tables=["core_booking"],
+        )
+        self.assertIn("booking_product_end_idx", " ".join(statements[0][1]))
+
+    def test_bookings_of_reseller_in_date_range_use_index(self):
+        def reseller_range():
+            return Booking.objects.filter(
+                reseller_id=self.booking.reseller_id,
+                start_date__gte=SEED_START,
+                start_date__lt=SEED_START + timedelta(days=60),
+            )
+
+        statements = self.assertNoTableScan(reseller_range, tables=["core_booking"])
+        self.assertIn("booking_reseller_start_idx", " ".join(statements[0][1]))
@@ -0,0 +1,159 @@
+import os
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.utils import timezone
+from core.dto.booking_dto import BookingDTO
+from core.models import Booking, BookingRollup, Status
+from core.repository.booking_repository import BookingRepository
+from core.repository.booking_rollup_repository import BookingRollupRepository, booking_changes
+from core.testsuite.utils.queryplan import QueryPlanTestCase
+from core.testsuite.utils.seed import SEED_START, seed_bookings, seed_catalog
+
+
+class BookingRollupTests(TestCase):
+    def setUp(self):
+        self.product = seed_catalog(resellers=1, products_per_reseller=2)[0]
+
+    def _dto(self, start: datetime, price: str = "40.00") -> BookingDTO:
+        return BookingDTO(
+            product_id=self.product.product_id,
+            customer_email="rollup@example.com",
+            reseller_id=self.product.reseller_id,
+            start_date=start,
+            end_date=start + timedelta(days=2),
+            total_price=Decimal(price),
+        )
+
+    def assertRollupsInSync(self):
+        self.assertEqual(BookingRollupRepository.stored(), BookingRollupRepository.actual(chunk_size=2))
+
+    def test_creates_and_cancellations_move_counts_and_revenue(self):
+        with transaction.atomic():
+            first = BookingRepository.create_booking(self._dto(SEED_START, "40.00"))
+            BookingRepository.create_bookings([
+                self._dto(SEED_START + timedelta(days=10), "30.00"),
+                self._dto(SEED_START + timedelta(days=20), "50.00"),
+                # Overlaps the first: rejected, so not counted
+                self._dto(SEED_START + timedelta(days=1), "10.00"),
+            ])
+        self.assertRollupsInSync()
+
+        with transaction.atomic():
+            BookingRepository.cancel_booking(first.booking_id)
+            # Already cancelled: nothing moves
+            BookingRepository.cancel_booking(first.booking_id)
+        self.assertRollupsInSync()
+        key = (self.product.reseller_id, SEED_START.date())
+        self.assertEqual(BookingRollupRepository.stored()[(*key, Status.Cancelled.value)], (1, Decimal("40.00")))
+        self.assertNotIn((*key, Status.Pending.value), BookingRollupRepository.stored())
+
+    def test_days_are_in_the_configured_time_zone(self):
+        # 23:30 UTC is already the next day in Amsterdam
+        late = datetime(2025, 3, 1, 23, 30, tzinfo=timezone.get_fixed_timezone(0))
+        with transaction.atomic():
+            BookingRepository.create_booking(self._dto(late))
+        self.assertEqual(BookingRollup.objects.get().day, date(2025, 3, 2))
+
+    def test_rebuild_command_reports_and_fixes_drift(self):
+        seed_bookings(20, [self.product])
+        call_command("rebuild_booking_rollups", "--check", stdout=StringIO())
+
+        # Writes that bypass BookingRepository
+        Booking.objects.filter(status=Status.Pending.value).update(status=Status.Confirmed.value)
+        BookingRollup.objects.create(reseller_id=999, day=date(2025, 1, 1), status=0, booking_count=3, revenue=60)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_booking_rollups", "--check", stdout=out)
+        self.assertIn("reseller 999 2025-01-01 Pending: stored 3 bookings / 60.00, actual 0 bookings / 0", out.getvalue())
+
+        call_command("rebuild_booking_rollups", "--chunk-size", "3", stdout=StringIO())
+        self.assertRollupsInSync()
+
+
+class RebuildSnapshotTests(TransactionTestCase):
+    def test_both_sides_are_read_and_corrected_in_one_transaction(self):
+        product = seed_catalog(resellers=1, products_per_reseller=1)[0]
+        seed_bookings(5, [product])
+        BookingRollup.objects.update(booking_count=0)
+
+        transactions = []
+
+        def inside(method):
+            def call(*args, **kwargs):
+                # In the outermost transaction of the command, not in separate ones
+                transactions.append(connection.in_atomic_block and connection.savepoint_ids == [])
+                return method(*args, **kwargs)
+            return call
+
+        with mock.patch.object(BookingRollupRepository, "actual", inside(BookingRollupRepository.actual)), \
+                mock.patch.object(BookingRollupRepository, "stored", inside(BookingRollupRepository.stored)), \
+                mock.patch.object(BookingRollupRepository, "apply", inside(BookingRollupRepository.apply)):
+            call_command("rebuild_booking_rollups", stdout=StringIO())
+        self.assertEqual(transactions, [True, True, True])
+        self.assertEqual(BookingRollupRepository.stored(), BookingRollupRepository.actual())
+
+
+class ResellerReportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = seed_catalog(resellers=2, products_per_reseller=1)[0]
+        with transaction.atomic():
+            for start, price in (("2025-01-01T09:00", "40.00"), ("2025-01-01T15:00", "20.00"),
+                                 ("2025-01-02T09:00", "30.00"), ("2025-02-10T09:00", "10.00")):
+                start = timezone.make_aware(datetime.fromisoformat(start))
+                booking = Booking.objects.create(
+                    product_id=cls.product.product_id, customer_email="report@example.com",
+                    reseller_id=cls.product.reseller_id, start_date=start, end_date=start + timedelta(hours=1),
+                    total_price=Decimal(price),
+                )
+                BookingRollupRepository.apply(booking_changes(added=[booking]))
+            BookingRepository.cancel_booking(booking.booking_id)
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def _report(self, **params):
+        return self.client.get(f"/v1/resellerreport/{self.product.reseller_id}/", params)
+
+    def test_report(self):
+        response = self._report(**{"from": "2025-01-01", "to": "2025-02-28"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"], {
+            "reseller_id": self.product.reseller_id,
+            "from": "2025-01-01",
+            "to": "2025-02-28",
+            "days": [
+                {"day": "2025-01-01", "statuses": {"pending": {"count": 2, "revenue": "60.00"}}},
+                {"day": "2025-01-02", "statuses": {"pending": {"count": 1, "revenue": "30.00"}}},
+                {"day": "2025-02-10", "statuses": {"cancelled": {"count": 1, "revenue": "10.00"}}},
+            ],
+            "totals": {"pending": {"count": 3, "revenue": "90.00"}, "cancelled": {"count": 1, "revenue": "10.00"}},
+        })
+
+    def test_range_is_inclusive_and_validated(self):
+        self.assertEqual(len(self._report(**{"from": "2025-01-02", "to": "2025-01-02"}).json()["data"]["days"]), 1)
+        for params in ({"from": "2025-01-02"}, {"from": "2025-01-02", "to": "2025-01-01"},
+                       {"from": "2024-01-01", "to": "2025-01-01"}, {"from": "yesterday", "to": "2025-01-01"}):
+            self.assertEqual(self._report(**params).status_code, 400, params)
+
+
+class BookingRollupQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_bookings(5_000, seed_catalog(resellers=20, products_per_reseller=10))
+        cls.analyze()
+
+    def test_report_reads_a_range_of_the_rollup_key(self):
+        statements = self.assertNoTableScan(
+            BookingRollupRepository.report, 3, date(2025, 2, 1), date(2025, 4, 30), tables=["core_bookingrollup"],
+        )
+        # SQLite names the unique constraint's index itself
+        self.assertIn("(reseller_id=? AND day>? AND day<?)", " ".join(statements[0][1]))
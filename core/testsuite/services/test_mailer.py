@@ -0,0 +1,178 @@
+import os
+from unittest import mock
+from botocore.exceptions import ClientError, EndpointConnectionError
+from django.test import SimpleTestCase
+from utilities import mailerutility
+from utilities.circuitbreaker import CircuitBreaker, CircuitOpenError
+
+SES_ENV = {
+    "AWS_SES_SENDER": "bookings@example.com",
+    "AWS_SES_CONFIRMATION_TEMPLATE": "confirmation",
+    "AWS_SES_CANCELLATION_TEMPLATE": "cancellation",
+}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        patch = mock.patch("utilities.circuitbreaker.time.monotonic", self.clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=30)
+
+    def _open(self):
+        for _ in range(3):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        for _ in range(2):
+            self.breaker.before_call()
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        # A success resets the count
+        self.breaker.record_success()
+        self._open()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.times_opened, 1)
+
+    def test_rejects_calls_while_open(self):
+        self._open()
+        self.clock.now += 10
+        with self.assertRaises(CircuitOpenError) as raised:
+            self.breaker.before_call()
+        self.assertEqual(raised.exception.retry_after, 20)
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_half_open_lets_one_trial_through(self):
+        self._open()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.before_call()
+
+    def test_a_failed_trial_opens_the_circuit_again(self):
+        self._open()
+        self.clock.now += 30
+        self.breaker.before_call()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.times_opened, 2)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+    def test_snapshot(self):
+        self._open()
+        self.assertEqual(self.breaker.snapshot(), {
+            "name": "test", "state": "open", "consecutive_failures": 3, "times_opened": 1, "rejected": 0,
+        })
+
+
+def _client_error(code: str, status: int) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}, "ResponseMetadata": {"HTTPStatusCode": status}},
+                       "SendTemplatedEmail")
+
+
+class MailerTests(SimpleTestCase):
+    def setUp(self):
+        self.client = mock.Mock()
+        self.clock = _Clock()
+        self.breaker = CircuitBreaker("ses", failure_threshold=2, reset_timeout=30)
+        patches = [
+            mock.patch.dict(os.environ, SES_ENV),
+            mock.patch.object(mailerutility, "_get_ses_client", return_value=self.client),
+            mock.patch.object(mailerutility, "ses_breaker", self.breaker),
+            mock.patch("utilities.circuitbreaker.time.monotonic", self.clock),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _messages(self, count: int) -> list[tuple[str, dict]]:
+        return [(f"customer{n}@example.com", {"booking_id": n}) for n in range(count)]
+
+    def _bulk_success(self, **params):
+        return {"Status": [{"Status": "Success"} for _ in params["Destinations"]]}
+
+    def test_send_mail(self):
+        self.client.send_templated_email.return_value = {"MessageId": "1"}
+        self.assertTrue(mailerutility.send_mail("confirmation", "customer@example.com", {"booking_id": 1}))
+        params = self.client.send_templated_email.call_args.kwargs
+        self.assertEqual((params["Template"], params["Destination"]), ("confirmation", {"ToAddresses": ["customer@example.com"]}))
+
+    def test_rejected_messages_do_not_trip_the_breaker(self):
+        self.client.send_templated_email.side_effect = _client_error("MessageRejected", 400)
+        for _ in range(3):
+            self.assertFalse(mailerutility.send_mail("confirmation", "customer@example.com", {}))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_ses_outages_open_the_breaker(self):
+        self.client.send_templated_email.side_effect = EndpointConnectionError(endpoint_url="https://ses")
+        for _ in range(2):
+            self.assertFalse(mailerutility.send_mail("confirmation", "customer@example.com", {}))
+        with self.assertRaises(CircuitOpenError):
+            mailerutility.send_mail("confirmation", "customer@example.com", {})
+        self.assertEqual(self.client.send_templated_email.call_count, 2)
+
+    def test_an_unexpected_error_in_the_half_open_trial_does_not_wedge_the_breaker(self):
+        self.client.send_templated_email.side_effect = _client_error("Throttling", 400)
+        for _ in range(2):
+            mailerutility.send_mail("confirmation", "customer@example.com", {})
+        self.clock.now += 30
+
+        self.client.send_templated_email.side_effect = ValueError("bad response")
+        self.assertFalse(mailerutility.send_mail("confirmation", "customer@example.com", {}))
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        # The next trial is let through once the timeout has passed again
+        self.clock.now += 30
+        self.client.send_templated_email.side_effect = None
+        self.client.send_templated_email.return_value = {"MessageId": "1"}
+        self.assertTrue(mailerutility.send_mail("confirmation", "customer@example.com", {}))
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_missing_credentials_fail_the_send(self):
+        with mock.patch.object(mailerutility, "_get_ses_client", return_value=None):
+            self.assertFalse(mailerutility.send_mail("confirmation", "customer@example.com", {}))
+            self.assertEqual(mailerutility.send_bulk_mail("confirmation", self._messages(2)), [False, False])
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_bulk_sends_are_split_at_the_ses_destination_limit(self):
+        self.client.send_bulk_templated_email.side_effect = self._bulk_success
+        count = mailerutility.SES_BULK_MAX_DESTINATIONS * 2 + 1
+        self.assertEqual(mailerutility.send_bulk_mail("cancellation", self._messages(count)), [True] * count)
+
+        calls = self.client.send_bulk_templated_email.call_args_list
+        self.assertEqual([len(call.kwargs["Destinations"]) for call in calls], [50, 50, 1])
+        self.assertEqual(calls[2].kwargs["Destinations"][0]["Destination"], {"ToAddresses": ["customer100@example.com"]})
+        self.assertEqual({call.kwargs["Template"] for call in calls}, {"cancellation"})
+
+    def test_bulk_results_per_destination(self):
+        self.client.send_bulk_templated_email.return_value = {
+            "Status": [{"Status": "Success"}, {"Status": "MessageRejected", "Error": "Email address is not verified"}],
+        }
+        self.assertEqual(mailerutility.send_bulk_mail("confirmation", self._messages(3)), [True, False, False])
+
+    def test_bulk_send_stops_when_the_breaker_opens_part_way(self):
+        outage = EndpointConnectionError(endpoint_url="https://ses")
+        self.client.send_bulk_templated_email.side_effect = [self._bulk_success(Destinations=[{}] * 50), outage, outage]
+        results = mailerutility.send_bulk_mail("confirmation", self._messages(200))
+        self.assertEqual(results, [True] * 50 + [False] * 100 + [None] * 50)
+
+        # Nothing is attempted while the breaker is open
+        with self.assertRaises(CircuitOpenError):
+            mailerutility.send_bulk_mail("confirmation", self._messages(1))
@@ -0,0 +1,161 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from core.models import Booking, EmailOutbox, OutboxStatus
+from core.repository.outbox_repository import OutboxRepository
+from core.service.notification_service import NotificationService
+from core.service.outbox_service import OutboxService
+from utilities import fakemailerutility
+from utilities.circuitbreaker import CircuitOpenError
+
+
+@override_settings(
+    MAIL_SENDER="utilities.fakemailerutility.send_mail",
+    MAIL_BULK_SENDER="utilities.fakemailerutility.send_bulk_mail",
+    OUTBOX_MAX_ATTEMPTS=3,
+    OUTBOX_BACKOFF_BASE_SECONDS=30,
+    OUTBOX_BACKOFF_MAX_SECONDS=100,
+    OUTBOX_LEASE_SECONDS=300,
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        fakemailerutility.reset()
+        self.addCleanup(fakemailerutility.reset)
+
+    def _enqueue(self, count: int = 1) -> list[EmailOutbox]:
+        return [
+            OutboxService.enqueue("confirmation", f"customer{n}@example.com", {"booking_id": n})
+            for n in range(count)
+        ]
+
+    def _make_due(self):
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+
+    def test_due_messages_are_delivered(self):
+        messages = self._enqueue(2)
+        self.assertEqual(OutboxService.drain(), {"sent": 2, "retried": 0, "failed": 0, "deferred": 0})
+        self.assertEqual(
+            fakemailerutility.outbox,
+            [("confirmation", m.to_email, m.template_data) for m in messages],
+        )
+        for message in EmailOutbox.objects.all():
+            self.assertEqual((message.status, message.attempts), (OutboxStatus.Sent.value, 1))
+            self.assertIsNotNone(message.sent_at)
+
+        # Nothing is sent twice
+        self.assertEqual(OutboxService.drain(), {"sent": 0, "retried": 0, "failed": 0, "deferred": 0})
+
+    def test_confirmations_get_the_access_token_when_sent_and_never_store_it(self):
+        booking = Booking.objects.create(
+            product_id=1, customer_email="customer@example.com", reseller_id=1,
+            start_date=timezone.now(), end_date=timezone.now() + timedelta(days=1), total_price=10,
+        )
+        NotificationService.queue_confirmations([booking], {}, {})
+        message = EmailOutbox.objects.get()
+        self.assertNotIn("access_token", message.template_data)
+
+        self.assertEqual(OutboxService.drain()["sent"], 1)
+        (kind, to_email, data), = fakemailerutility.outbox
+        self.assertEqual((data["booking_id"], data["access_token"]), (booking.booking_id, booking.access_token))
+        message.refresh_from_db()
+        self.assertNotIn("access_token", message.template_data)
+
+    def test_failures_are_retried_with_exponential_backoff(self):
+        message = self._enqueue()[0]
+        fakemailerutility.fail_next = 2
+
+        with mock.patch("core.service.outbox_service.random.uniform", return_value=1.0):
+            before = timezone.now()
+            self.assertEqual(OutboxService.drain()["retried"], 1)
+            message.refresh_from_db()
+            self.assertEqual((message.status, message.attempts), (OutboxStatus.Pending.value, 1))
+            self.assertEqual(message.last_error, "send failed")
+            self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=30))
+
+            # Not due until the backoff has passed
+            self.assertEqual(OutboxService.drain()["retried"], 0)
+
+            self._make_due()
+            before = timezone.now()
+            self.assertEqual(OutboxService.drain()["retried"], 1)
+            message.refresh_from_db()
+            self.assertEqual(message.attempts, 2)
+            self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=60))
+
+        self._make_due()
+        self.assertEqual(OutboxService.drain()["sent"], 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.last_error), (OutboxStatus.Sent.value, 3, ""))
+
+    def test_backoff_is_capped(self):
+        with mock.patch("core.service.outbox_service.random.uniform", return_value=1.0):
+            self.assertEqual(
+                [OutboxService.backoff_seconds(n) for n in range(1, 6)],
+                [30, 60, 100, 100, 100],
+            )
+        for _ in range(20):
+            self.assertTrue(24 <= OutboxService.backoff_seconds(1) <= 36)
+
+    def test_messages_fail_permanently_after_max_attempts(self):
+        message = self._enqueue()[0]
+        fakemailerutility.fail_next = 10
+        results = []
+        for _ in range(3):
+            results.append(OutboxService.drain())
+            self._make_due()
+        self.assertEqual([r["retried"] for r in results], [1, 1, 0])
+        self.assertEqual(results[-1]["failed"], 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboxStatus.Failed.value, 3))
+
+        # Failed messages are left alone
+        self.assertEqual(OutboxService.drain(), {"sent": 0, "retried": 0, "failed": 0, "deferred": 0})
+        self.assertEqual(fakemailerutility.outbox, [])
+
+    def test_a_sender_exception_counts_as_a_failed_attempt(self):
+        message = self._enqueue()[0]
+        sender = mock.Mock(side_effect=ConnectionError("SES unreachable"))
+        self.assertEqual(OutboxService.drain(sender=sender)["retried"], 1)
+        message.refresh_from_db()
+        self.assertEqual((message.attempts, message.last_error), (1, "SES unreachable"))
+
+    def test_an_open_circuit_defers_without_using_an_attempt(self):
+        message = self._enqueue()[0]
+        sender = mock.Mock(side_effect=CircuitOpenError("ses", retry_after=20.0))
+        self.assertEqual(OutboxService.drain(sender=sender)["deferred"], 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboxStatus.Pending.value, 0))
+        self.assertGreater(message.next_attempt_at, timezone.now() + timedelta(seconds=15))
+
+    def test_claimed_messages_are_leased_and_reclaimed_when_the_lease_expires(self):
+        self._enqueue(2)
+        claimed = OutboxRepository.claim_batch(10, lease_seconds=300)
+        self.assertEqual(len(claimed), 2)
+
+        # Another worker skips them while the lease lasts
+        self.assertEqual(OutboxRepository.claim_batch(10, lease_seconds=300), [])
+
+        # The first worker died without marking them; once the lease runs out they are due again
+        later = timezone.now() + timedelta(seconds=301)
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            reclaimed = OutboxRepository.claim_batch(10, lease_seconds=300)
+        self.assertEqual({m.id for m in reclaimed}, {m.id for m in claimed})
+        self.assertTrue(all(m.attempts == 0 for m in reclaimed))
+
+    def test_claim_batch_takes_the_oldest_due_messages_first(self):
+        messages = self._enqueue(3)
+        EmailOutbox.objects.filter(pk=messages[0].id).update(next_attempt_at=timezone.now() + timedelta(hours=1))
+        claimed = OutboxRepository.claim_batch(1, lease_seconds=300)
+        self.assertEqual([m.id for m in claimed], [messages[1].id])
+
+    def test_drain_outbox_command(self):
+        self._enqueue(3)
+        fakemailerutility.fail_next = 1
+        out = StringIO()
+        call_command("drain_outbox", "--once", "--batch-size", "2", stdout=out)
+        self.assertIn("Outbox drained: {'sent': 2, 'retried': 1, 'failed': 0, 'deferred': 0}", out.getvalue())
+        self.assertEqual(len(fakemailerutility.outbox), 2)
+        self.assertEqual(EmailOutbox.objects.filter(status=OutboxStatus.Pending.value, attempts=1).count(), 1)
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase
+from core.models import Booking, Status
+from core.repository.booking_repository import BookingRepository
+from core.testsuite.utils.benchmark import benchmark, summarize, time_calls
+from core.testsuite.utils.queryplan import capture_sql, explain
+from core.testsuite.utils.seed import SEED_START, seed_catalog
+
+SIZES = (1_000, 10_000, 50_000)
+
+
+@benchmark
+class OverlapCheckBenchmark(TestCase):
+    """
+    Overlap check latency for one product as its booking history grows.
+    The check must stay flat: it should only visit bookings that have not ended yet.
+    """
+
+    def _grow_history(self, product, until: int):
+        bookings = []
+        for _ in range(self.count, until):
+            end = self.next_start + timedelta(days=1)
+            booking = Booking(
+                product_id=product.product_id,
+                customer_email="history@example.com",
+                reseller_id=product.reseller_id,
+                start_date=self.next_start,
+                end_date=end,
+                total_price=Decimal("20.00"),
+                status=Status.Confirmed.value,
+            )
+            booking.issue_access_token()
+            bookings.append(booking)
+            self.next_start = end
+        Booking.objects.bulk_create(bookings, batch_size=2000)
+        self.count = until
+
+    def test_check_latency_is_flat_as_bookings_per_product_grow(self):
+        product = seed_catalog(resellers=1, products_per_reseller=1)[0]
+        self.count = 0
+        self.next_start = SEED_START
+
+        results = {}
+        for size in SIZES:
+            self._grow_history(product, size)
+            # A new booking that overlaps the last few existing ones
+            start = self.next_start - timedelta(days=3)
+            end = self.next_start + timedelta(days=2)
+
+            self.assertTrue(BookingRepository.has_overlap(product.product_id, start, end))
+            results[size] = summarize(time_calls(
+                lambda: BookingRepository.has_overlap(product.product_id, start, end), repeat=300
+            ))
+
+        plan = explain(capture_sql(lambda: BookingRepository.has_overlap(product.product_id, start, end))[0])
+        print("\nOverlap check latency per bookings-per-product:")
+        for size, stats in results.items():
+            print(f"  {size:>7,} bookings: {stats}")
+        print(f"  plan: {plan}")
+
+        self.assertIn("booking_product_end_idx", " ".join(plan))
+        smallest, largest = results[SIZES[0]]["p50_ms"], results[SIZES[-1]]["p50_ms"]
+        self.assertLess(largest, smallest * 3, f"Overlap check grew with history: {results}")
@@ -0,0 +1,135 @@
+import os
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from core.models import Product, ProductFacet, Reseller
+from core.repository.product_facet_repository import ProductFacetRepository, facet_changes
+from core.service.product_import_service import ProductImportService
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.queryplan import QueryPlanTestCase
+from core.testsuite.utils.seed import seed_catalog
+
+
+class ProductFacetTests(TestCase):
+    def setUp(self):
+        self.north, self.south = Reseller.objects.bulk_create([Reseller(name="North"), Reseller(name="South")])
+
+    def _create(self, reseller, type, price) -> Product:
+        return Product.objects.create(reseller=reseller, name="Space", type=type, price_per_day=Decimal(price), rating=Decimal("4.0"))
+
+    def assertFacetsInSync(self):
+        self.assertEqual(ProductFacetRepository.stored(), ProductFacetRepository.actual())
+
+    def test_saves_and_deletes_keep_the_facets_in_sync(self):
+        cheap = self._create(self.north, "garage", "10.00")
+        self._create(self.north, "garage", "20.00")
+        valet = self._create(self.south, "valet", "30.00")
+        self.assertFacetsInSync()
+        self.assertEqual(ProductFacetRepository.stored()[("type", "garage")], (2, Decimal("10.00"), Decimal("20.00")))
+
+        # The cheapest garage gets dearer: the range is read again
+        cheap.price_per_day = Decimal("25.00")
+        cheap.save()
+        self.assertEqual(ProductFacetRepository.stored()[("type", "garage")], (2, Decimal("20.00"), Decimal("25.00")))
+
+        # Moves to another type and reseller
+        valet.type, valet.reseller = "garage", self.north
+        valet.save()
+        self.assertFacetsInSync()
+
+        cheap.delete()
+        self.assertFacetsInSync()
+        self.assertEqual(ProductFacetRepository.stored()[("reseller_id", self.north.id)], (2, Decimal("20.00"), Decimal("30.00")))
+
+    def test_saves_that_do_not_touch_facet_fields_skip_the_facets(self):
+        product = self._create(self.north, "garage", "10.00")
+        product.name = "Renamed"
+        with self.assertNumQueries(2):
+            # Previous values, then the UPDATE
+            product.save()
+
+    def test_import_keeps_the_facets_in_sync(self):
+        self._create(self.north, "garage", "10.00")
+        ProductImportService.import_rows([
+            (n, {"reseller_id": reseller.id, "name": f"Imported {n}", "type": type, "price_per_day": price})
+            for n, (reseller, type, price) in enumerate([
+                (self.north, "garage", "5.00"), (self.south, "valet", "40.00"), (self.south, "parking_space", "12.50"),
+            ])
+        ], chunk_size=2)
+        self.assertFacetsInSync()
+
+    def test_rebuild_command_reports_and_fixes_drift(self):
+        self._create(self.north, "garage", "10.00")
+        call_command("rebuild_product_facets", "--check", stdout=StringIO())
+
+        # bulk_create bypasses the signals
+        Product.objects.bulk_create([Product(reseller=self.south, name="Bulk", type="valet", price_per_day=Decimal("15.00"))])
+        ProductFacet.objects.filter(type="garage").update(product_count=5)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_product_facets", "--check", stdout=out)
+        self.assertIn("type garage: stored 5 products, 10.00-10.00, actual 1 products, 10.00-10.00", out.getvalue())
+        self.assertIn("type valet: stored 0 products, None-None, actual 1 products, 15.00-15.00", out.getvalue())
+
+        call_command("rebuild_product_facets", stdout=StringIO())
+        self.assertFacetsInSync()
+
+
+class ProductFacetsEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        north, south = Reseller.objects.bulk_create([Reseller(name="North"), Reseller(name="South")])
+        for reseller, type, price in ((north, "garage", "10.00"), (north, "valet", "35.00"), (south, "garage", "18.00")):
+            Product.objects.create(reseller=reseller, name="Space", type=type, price_per_day=Decimal(price))
+        cls.north, cls.south = north, south
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.clear_local()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def test_facets(self):
+        response = self.client.get("/v1/productfacets/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"], {
+            "total": 3,
+            "min_price": "10.00",
+            "max_price": "35.00",
+            "types": [
+                {"type": "garage", "count": 2, "min_price": "10.00", "max_price": "18.00"},
+                {"type": "valet", "count": 1, "min_price": "35.00", "max_price": "35.00"},
+            ],
+            "resellers": [
+                {"reseller_id": self.north.id, "name": "North", "count": 2, "min_price": "10.00", "max_price": "35.00"},
+                {"reseller_id": self.south.id, "name": "South", "count": 1, "min_price": "18.00", "max_price": "18.00"},
+            ],
+        })
+        revalidated = self.client.get("/v1/productfacets/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+
+
+class ProductFacetQueryPlanTests(QueryPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(resellers=50, products_per_reseller=100)
+        cls.analyze()
+        cls.product = Product.objects.order_by("product_id")[2500]
+
+    def test_price_ranges_are_read_from_the_ends_of_an_index(self):
+        before = (self.product.type, self.product.reseller_id, self.product.price_per_day)
+        after = ("valet" if self.product.type != "valet" else "garage", self.product.reseller_id, self.product.price_per_day + 1)
+        statements = self.assertNoTableScan(
+            ProductFacetRepository.apply, facet_changes(before, after), tables=["core_product", "core_productfacet"],
+        )
+        # The subqueries alias core_product, so check their plans by index name
+        plans = [" ".join(plan) for sql, plan in statements if sql.startswith("UPDATE")]
+        self.assertEqual(len(plans), 3)
+        for plan in plans:
+            self.assertNotIn("SCAN", plan)
+            self.assertRegex(plan, r"SEARCH U0 USING COVERING INDEX product_(type|reseller)_price_idx")
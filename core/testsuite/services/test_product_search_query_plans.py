@@ -0,0 +1,88 @@
+import itertools
+from decimal import Decimal
+from core.dto.product_search_dto import ProductSearchDTO
+from core.models import Product
+from core.repository.product_repository import SEARCH_SORT_COLUMNS, ProductRepository
+from core.testsuite.utils.queryplan import QueryPlanTestCase
+from core.testsuite.utils.seed import seed_catalog
+
+EQUALITY_FILTERS = ({}, {"type": "garage"}, {"reseller_id": None}, {"type": "garage", "reseller_id": None})
+# Bounds on each sort's own column
+SORT_RANGES = {
+    "price": {"min_price": Decimal("18"), "max_price": Decimal("25")},
+    "rating": {"min_rating": Decimal("3.5")},
+    "name": {"name_prefix": "parking space 1"},
+}
+# Selective bounds on another column than the sort's (prices are 15 to 30)
+SELECTIVE_RANGES = {
+    "price": {"min_price": Decimal("20"), "max_price": Decimal("20.50")},
+    "name": {"name_prefix": "parking space 99"},
+}
+SORTS = [direction + key for key in SEARCH_SORT_COLUMNS for direction in ("", "-")]
+
+
+class ProductSearchQueryPlanTests(QueryPlanTestCase):
+    """
+    Searches filtered on their sort column read products in index order: no scan, no
+    sort. A selective filter on another column is read from its own index range and
+    then sorted, because no index can return a range of one column in the order of
+    another.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(resellers=50, products_per_reseller=100)
+        # A few unrated products, which a rating sort lists last
+        Product.objects.filter(product_id__in=Product.objects.order_by("-product_id").values("product_id")[:3]) \
+            .update(rating=None)
+        cls.analyze()
+        cls.product = Product.objects.order_by("product_id")[2500]
+        cls.unrated = Product.objects.filter(rating=None).order_by("product_id").first()
+
+    def _searches(self, fields: dict):
+        """The first page's search and one of a later page."""
+        if fields.get("reseller_id", 0) is None:
+            fields["reseller_id"] = self.product.reseller_id
+        column = SEARCH_SORT_COLUMNS[fields["sort"].lstrip("-")]
+        yield "first", ProductSearchDTO(**fields)
+        yield "next", ProductSearchDTO(**fields, after=(getattr(self.product, column), self.product.product_id))
+
+    def test_filters_on_the_sort_column(self):
+        for equality, sort in itertools.product(EQUALITY_FILTERS, SORTS):
+            for ranges in ({}, SORT_RANGES[sort.lstrip("-")]):
+                for page, search in self._searches({**equality, **ranges, "sort": sort}):
+                    with self.subTest(page=page, search=search):
+                        self.assertIndexOrdered(ProductRepository.search_products, search, table="core_product")
+
+    def test_selective_filters_on_other_columns_read_their_range(self):
+        # The one case where the search is not served in index order. An index on
+        # (filter column, sort column) orders rows by the sort column only within one
+        # filter value, and the alternative, walking the sort column's index until a page
+        # of rows passes the filter, can read the whole index. Reading the filter's range
+        # and sorting it costs at most the size of the range.
+        for equality, sort in itertools.product(EQUALITY_FILTERS, SORTS):
+            for column, ranges in SELECTIVE_RANGES.items():
+                if column == sort.lstrip("-"):
+                    continue
+                for page, search in self._searches({**equality, **ranges, "sort": sort}):
+                    with self.subTest(page=page, search=search):
+                        self.assertIndexRange(
+                            ProductRepository.search_products, search, table="core_product", sort_outside_index=True,
+                        )
+
+    def test_unrated_products_after_the_rated_ones(self):
+        for equality, sort in itertools.product(EQUALITY_FILTERS, ("rating", "-rating")):
+            fields = {**equality, "sort": sort}
+            if fields.get("reseller_id", 0) is None:
+                fields["reseller_id"] = self.unrated.reseller_id
+            # The last rated page runs on into the unrated products; then a cursor among them
+            rated = Product.objects.filter(rating__isnull=False, **{k: v for k, v in fields.items() if k != "sort"})
+            # The last rated product in the sort's order
+            last_rated = rated.order_by(*(("-rating", "-product_id") if sort == "rating" else ("rating", "product_id"))).first()
+            for search in (
+                ProductSearchDTO(**fields, after=(last_rated.rating, last_rated.product_id)),
+                ProductSearchDTO(**fields, after=(None, self.unrated.product_id)),
+            ):
+                with self.subTest(search=search):
+                    statements = self.assertIndexOrdered(ProductRepository.search_products, search, table="core_product")
+                    self.assertIn("IS NULL", statements[-1][0])
@@ -0,0 +1,102 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from core.models import Product, RatingBucket
+from core.repository.rating_histogram_repository import RatingHistogramRepository
+from core.testsuite.utils.seed import seed_catalog
+
+
+class RatingHistogramTests(TestCase):
+    def setUp(self):
+        self.reseller = seed_catalog(resellers=1, products_per_reseller=20)[0].reseller
+
+    def _create(self, rating, name="Histogram product") -> Product:
+        return Product.objects.create(
+            reseller=self.reseller, name=name, type="garage", price_per_day=Decimal("10"), rating=rating,
+        )
+
+    def _count(self, bucket: int) -> int:
+        return RatingHistogramRepository.stored_counts()[bucket]
+
+    def assertHistogramInSync(self):
+        self.assertEqual(RatingHistogramRepository.stored_counts(), RatingHistogramRepository.actual_counts())
+
+    def test_signals_keep_the_histogram_in_sync(self):
+        before = RatingHistogramRepository.stored_counts()
+        product = self._create(Decimal("4.2"))
+        self.assertEqual(self._count(42), before[42] + 1)
+        self.assertHistogramInSync()
+
+        product.rating = Decimal("3.0")
+        product.save()
+        self.assertEqual((self._count(42), self._count(30)), (before[42], before[30] + 1))
+
+        # Saves that leave the bucket alone change nothing
+        product.name = "Renamed"
+        product.save()
+        self.assertEqual(self._count(30), before[30] + 1)
+
+        product.rating = None
+        product.save()
+        self.assertEqual(RatingHistogramRepository.stored_counts(), before)
+
+        product.rating = Decimal("7.5")
+        product.save()
+        self.assertEqual(self._count(50), before[50] + 1)
+        product.delete()
+        self.assertEqual(RatingHistogramRepository.stored_counts(), before)
+
+        # Negative ratings can never match a min_rating filter
+        self._create(Decimal("-1.0"))
+        self.assertEqual(RatingHistogramRepository.stored_counts(), before)
+        self.assertHistogramInSync()
+
+    def test_a_missing_bucket_row_is_recreated_with_its_count(self):
+        self._create(Decimal("2.5"), name="Existing")
+        RatingBucket.objects.filter(bucket__in=(25, 50)).delete()
+
+        product = self._create(Decimal("2.5"))
+        self.assertEqual(self._count(25), Product.objects.filter(rating=Decimal("2.5")).count())
+        product.rating = Decimal("9.9")
+        product.save()
+        self.assertEqual(self._count(50), Product.objects.filter(rating__gte=5).count())
+        self.assertHistogramInSync()
+
+        RatingBucket.objects.filter(bucket=50).delete()
+        product.delete()
+        self.assertEqual(self._count(50), Product.objects.filter(rating__gte=5).count())
+        self.assertHistogramInSync()
+
+    def test_count_at_least(self):
+        self._create(Decimal("6.0"))
+        self._create(None)
+        for min_rating in ("-1", "0", "1.0", "2.35", "3.4", "5", "7", "9.9"):
+            with self.subTest(min_rating=min_rating):
+                self.assertEqual(
+                    RatingHistogramRepository.count_at_least(Decimal(min_rating)),
+                    # min_rating is clamped to 5 by getproducts, so ratings above 5 count as 5
+                    Product.objects.filter(rating__gte=min(Decimal(min_rating), Decimal("5"))).count()
+                    if Decimal(min_rating) <= 5 else 0,
+                )
+
+    def test_rebuild_command(self):
+        self._create(Decimal("4.0"))
+        out = StringIO()
+        call_command("rebuild_rating_histogram", "--check", stdout=out)
+        self.assertIn("in sync", out.getvalue())
+
+        RatingBucket.objects.filter(bucket=30).update(product_count=999)
+        RatingBucket.objects.filter(bucket=40).delete()
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, "out of sync in 2 bucket(s)"):
+            call_command("rebuild_rating_histogram", "--check", stdout=out)
+        self.assertIn("rating 3.0: stored 999", out.getvalue())
+        # --check does not repair anything
+        self.assertEqual(self._count(30), 999)
+
+        out = StringIO()
+        call_command("rebuild_rating_histogram", stdout=out)
+        self.assertIn("2 bucket(s) corrected", out.getvalue())
+        self.assertHistogramInSync()
+        call_command("rebuild_rating_histogram", "--check", stdout=StringIO())
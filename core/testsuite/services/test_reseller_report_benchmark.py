@@ -0,0 +1,38 @@
+from datetime import timedelta
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.test import TestCase
+from core.models import Booking
+from core.repository.booking_rollup_repository import BookingRollupRepository
+from core.testsuite.utils.benchmark import benchmark, summarize, time_calls
+from core.testsuite.utils.seed import SEED_START, seed_bookings, seed_catalog
+
+BOOKINGS = 200_000
+
+
+@benchmark
+class ResellerReportBenchmark(TestCase):
+    """A year of one reseller's bookings per day and status: rollup rows against grouping bookings."""
+
+    def test_rollup_report_beats_grouping_bookings(self):
+        products = seed_catalog(resellers=10, products_per_reseller=50)
+        seed_bookings(BOOKINGS, products, customers=10_000)
+        reseller_id = products[0].reseller_id
+        start, end = SEED_START, SEED_START + timedelta(days=365)
+
+        def from_bookings():
+            return list(
+                Booking.objects.filter(reseller_id=reseller_id, start_date__gte=start, start_date__lt=end)
+                .annotate(day=TruncDate("start_date"))
+                .values("day", "status")
+                .annotate(n=Count("booking_id"), revenue=Sum("total_price"))
+                .order_by("day", "status")
+            )
+
+        def from_rollups():
+            return BookingRollupRepository.report(reseller_id, start.date(), end.date() - timedelta(days=1))
+
+        grouped = summarize(time_calls(from_bookings, 50))
+        rolled_up = summarize(time_calls(from_rollups, 50))
+        print(f"\nReseller report over {BOOKINGS:,} bookings:\n  grouping bookings: {grouped}\n  rollup rows:       {rolled_up}")
+        self.assertLess(rolled_up["p50_ms"], grouped["p50_ms"] / 5)
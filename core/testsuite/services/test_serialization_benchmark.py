@@ -0,0 +1,76 @@
+from django.http import JsonResponse
+from django.test import TestCase
+from core.models import Booking
+from core.repository.booking_repository import BOOKING_FIELDS
+from core.serializers import booking_serializer
+from core.testsuite.utils.benchmark import benchmark, summarize, time_calls
+from core.testsuite.utils.seed import seed_bookings, seed_catalog
+from utilities import serializerutility
+from utilities.serializerutility import FastJsonResponse
+
+ROWS = 1_000
+
+
+def _model_path(bookings):
+    """The previous path: model instances, hand-built dicts, JsonResponse."""
+    data = [{
+        "booking_id": booking.booking_id,
+        "product_id": booking.product_id,
+        "customer_email": booking.customer_email,
+        "reseller_id": booking.reseller_id,
+        "start_date": booking.start_date.isoformat(),
+        "end_date": booking.end_date.isoformat(),
+        "total_price": str(booking.total_price),
+    } for booking in bookings]
+    return JsonResponse({"status": "ok", "data": data}).content
+
+
+def _row_path(rows):
+    return FastJsonResponse(raw=booking_serializer.dumps_rows(rows)).content
+
+
+@benchmark
+class SerializationBenchmark(TestCase):
+    """Encoding a 1k-booking payload: the old dict/JsonResponse path against RowSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_bookings(ROWS, seed_catalog(resellers=5, products_per_reseller=20))
+
+    def test_row_serializer_beats_model_dicts(self):
+        bookings = list(Booking.objects.order_by("booking_id"))
+        rows = list(Booking.objects.order_by("booking_id").values_list(*BOOKING_FIELDS))
+        self.assertEqual(len(rows), ROWS)
+
+        # Encoding only: both paths start from rows already in memory
+        results = {"model dicts + JsonResponse": summarize(time_calls(lambda: _model_path(bookings), repeat=200))}
+        for backend, dumps in (("json", serializerutility._json_dumps), ("orjson", serializerutility._orjson_dumps)):
+            if backend == "orjson" and serializerutility.orjson is None:
+                continue
+            original = serializerutility.dumps
+            serializerutility.dumps = dumps
+            try:
+                results[f"RowSerializer ({backend})"] = summarize(time_calls(lambda: _row_path(rows), repeat=200))
+            finally:
+                serializerutility.dumps = original
+
+        # End to end: query plus encoding
+        results["query + model path"] = summarize(time_calls(
+            lambda: _model_path(Booking.objects.order_by("booking_id")), repeat=50
+        ))
+        results["query + row path"] = summarize(time_calls(
+            lambda: _row_path(Booking.objects.order_by("booking_id").values_list(*BOOKING_FIELDS)), repeat=50
+        ))
+
+        print(f"\nSerializing {ROWS:,} bookings (backend in use: {serializerutility.BACKEND}):")
+        for name, stats in results.items():
+            print(f"  {name:<28} {stats}")
+
+        # With the standard library encoder the encoding itself dominates, so only the
+        # end-to-end path and the orjson backend are expected to be clearly faster
+        if serializerutility.BACKEND == "orjson":
+            self.assertLess(
+                results["RowSerializer (orjson)"]["p50_ms"],
+                results["model dicts + JsonResponse"]["p50_ms"] / 1.5,
+            )
+        self.assertLess(results["query + row path"]["p50_ms"], results["query + model path"]["p50_ms"])
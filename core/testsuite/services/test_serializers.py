@@ -0,0 +1,81 @@
+import json
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from core.models import Booking
+from core.repository.booking_repository import BOOKING_FIELDS
+from core.serializers import booking_serializer
+from core.testsuite.services.test_serialization_benchmark import _model_path, _row_path
+from core.testsuite.utils.seed import seed_bookings, seed_catalog
+from utilities import serializerutility
+from utilities.serializerutility import RowSerializer, decimal_str, isoformat
+
+BACKENDS = {
+    "json": (serializerutility._json_dumps, set()),
+    "orjson": (serializerutility._orjson_dumps, {isoformat}),
+}
+
+ROW = (
+    7, Decimal("12.50"), Decimal("0.10"), datetime(2024, 3, 1, 9, 30, 15, 120000, tzinfo=timezone.utc),
+    datetime(2024, 3, 1, 9, 30, tzinfo=timezone(timedelta(hours=2))), datetime(2024, 3, 1), None, None,
+)
+FIELDS = (
+    "id", ("price", decimal_str), ("tax", decimal_str), ("utc", isoformat),
+    ("offset", isoformat), ("naive", isoformat), ("no_price", decimal_str), ("no_date", isoformat),
+)
+EXPECTED = (
+    b'{"id":7,"price":"12.50","tax":"0.10","utc":"2024-03-01T09:30:15.120000+00:00",'
+    b'"offset":"2024-03-01T09:30:00+02:00","naive":"2024-03-01T00:00:00","no_price":null,"no_date":null}'
+)
+
+
+class SerializerBackendTests(SimpleTestCase):
+    """The orjson and standard library paths must produce the same bytes."""
+
+    def _backend(self, name):
+        if name == "orjson" and serializerutility.orjson is None:
+            raise unittest.SkipTest("orjson is not installed")
+        dumps, native = BACKENDS[name]
+        patches = [
+            mock.patch.object(serializerutility, "dumps", dumps),
+            mock.patch.object(serializerutility, "_NATIVE_CONVERTERS", native),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        return dumps
+
+    def test_row_serializer(self):
+        for name in BACKENDS:
+            with self.subTest(backend=name):
+                self._backend(name)
+                serializer = RowSerializer(FIELDS)
+                self.assertEqual(serializer.dumps_row(ROW), EXPECTED)
+                self.assertEqual(serializer.dumps_rows([ROW, ROW]), b"[" + EXPECTED + b"," + EXPECTED + b"]")
+                self.doCleanups()
+
+    def test_values_without_a_converter(self):
+        value = {"price": Decimal("12.50"), "at": datetime(2024, 3, 1, 9, 30, tzinfo=timezone.utc),
+                 "day": date(2024, 3, 1), "none": None, "items": [1, "a"]}
+        expected = b'{"price":"12.50","at":"2024-03-01T09:30:00+00:00","day":"2024-03-01","none":null,"items":[1,"a"]}'
+        for name in BACKENDS:
+            with self.subTest(backend=name):
+                dumps = self._backend(name)
+                self.assertEqual(dumps(value), expected)
+                with self.assertRaises(TypeError):
+                    dumps({"value": object()})
+                self.doCleanups()
+
+
+class BookingSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_bookings(20, seed_catalog(resellers=1, products_per_reseller=3))
+
+    def test_matches_the_model_path(self):
+        bookings = list(Booking.objects.order_by("booking_id"))
+        rows = list(Booking.objects.order_by("booking_id").values_list(*BOOKING_FIELDS))
+        self.assertEqual(json.loads(_model_path(bookings)), json.loads(_row_path(rows)))
+        self.assertEqual(json.loads(booking_serializer.dumps_row(rows[0]))["total_price"], str(bookings[0].total_price))
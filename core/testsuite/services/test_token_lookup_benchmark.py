@@ -0,0 +1,63 @@
+import itertools
+from django.db import connection
+from django.test import TestCase
+from core.models import Booking, digest_access_token
+from core.testsuite.utils.benchmark import benchmark, summarize, time_calls
+from core.testsuite.utils.seed import seed_bookings, seed_catalog
+
+BOOKINGS = 50_000
+LOOKUPS = 2_000
+
+
+def _index_on(column: str) -> str:
+    with connection.cursor() as cursor:
+        for _, name, *_ in cursor.execute("PRAGMA index_list(core_booking)").fetchall():
+            columns = [row[2] for row in cursor.execute(f'PRAGMA index_info("{name}")').fetchall()]
+            if columns == [column]:
+                return name
+    raise AssertionError(f"No index on core_booking.{column}")
+
+
+def _index_bytes(name: str) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [name])
+        return cursor.fetchone()[0]
+
+
+@benchmark
+class TokenLookupBenchmark(TestCase):
+    """
+    Booking lookup by access token: a unique index on the 86-character token (the index
+    this column had before the digest) against the unique index on its 16-byte digest.
+    Uses SQLite's dbstat for index sizes; on MySQL compare information_schema.STATISTICS
+    and the index_length of SHOW TABLE STATUS the same way.
+    """
+
+    def test_digest_index_is_smaller_and_not_slower(self):
+        seed_bookings(BOOKINGS, seed_catalog(resellers=10, products_per_reseller=20))
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE UNIQUE INDEX benchmark_access_token_idx ON core_booking (access_token)")
+            cursor.execute("ANALYZE")
+        tokens = list(Booking.objects.values_list("access_token", flat=True)[:LOOKUPS])
+
+        plain, hashed = itertools.cycle(tokens), itertools.cycle(tokens)
+
+        def by_token():
+            return Booking.objects.filter(access_token=next(plain)).values_list("booking_id").first()
+
+        def by_digest():
+            return Booking.objects.filter(access_token_digest=digest_access_token(next(hashed))).values_list("booking_id").first()
+
+        token_bytes = _index_bytes("benchmark_access_token_idx")
+        digest_bytes = _index_bytes(_index_on("access_token_digest"))
+        token = summarize(time_calls(by_token, LOOKUPS))
+        digest = summarize(time_calls(by_digest, LOOKUPS))
+        print(
+            f"\nToken lookups over {BOOKINGS:,} bookings:"
+            f"\n  access_token index:        {token_bytes / 1024:,.0f} KiB, {token}"
+            f"\n  access_token_digest index: {digest_bytes / 1024:,.0f} KiB, {digest}"
+        )
+
+        self.assertLess(digest_bytes, token_bytes / 3)
+        # Hashing the token costs about a microsecond; the smaller index must make up for it
+        self.assertLess(digest["p50_ms"], token["p50_ms"] * 1.2)
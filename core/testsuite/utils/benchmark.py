@@ -0,0 +1,35 @@
+"""Shared helpers for benchmark tests. Benchmarks only run with RUN_BENCHMARKS=1."""
+import os
+import statistics
+import time
+import unittest
+
+benchmark = unittest.skipUnless(
+    os.getenv("RUN_BENCHMARKS") == "1",
+    "benchmark; set RUN_BENCHMARKS=1 to run",
+)
+
+
+def time_calls(func, repeat: int, warmup: int = 10) -> list[float]:
+    """Calls func `repeat` times and returns each call's duration in milliseconds."""
+    for _ in range(warmup):
+        func()
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return durations
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "p50_ms": round(statistics.median(values), 4),
+        "p95_ms": round(percentile(values, 0.95), 4),
+        "max_ms": round(max(values), 4),
+    }
@@ -0,0 +1,321 @@
+"""
+Endpoint load benchmark: drives every route in app/urls.py through the full middleware
+stack with Django's test client, single-threaded and concurrently, and compares the
+results with a stored baseline.
+
+Used by core/testsuite/views/test_endpoint_benchmark.py. Runs on the SQLite test
+database with the fake mailer, so it needs no network.
+"""
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import Client
+from app.urls import urlpatterns
+from core.models import Booking, Product, Status
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.benchmark import percentile
+from core.testsuite.utils.seed import SEED_START, seed_bookings, seed_catalog
+
+API_KEY = "benchmark-key"
+
+# New bookings start after every seeded one, so they never overlap the seed data
+_FUTURE = SEED_START + timedelta(days=50_000)
+
+
+@dataclass
+class Dataset:
+    products: list[Product]
+    booking_ids: list[int]
+    pending_ids: list[int]
+    emails: list[str]
+    tokens: list[str]
+    pending_tokens: list[str]
+
+
+def seed_dataset(resellers: int, products_per_reseller: int, bookings: int, seed: int = 1) -> Dataset:
+    products = seed_catalog(resellers=resellers, products_per_reseller=products_per_reseller, seed=seed)
+    seed_bookings(bookings, products, customers=max(bookings // 20, 1), seed=seed)
+    rows = list(Booking.objects.values_list("booking_id", "status", "customer_email", "access_token"))
+    cache.clear()
+    catalog_cache.clear_local()
+    return Dataset(
+        products=products,
+        booking_ids=[booking_id for booking_id, _, _, _ in rows],
+        pending_ids=[booking_id for booking_id, status, _, _ in rows if status == Status.Pending.value],
+        emails=sorted({email for _, _, email, _ in rows}),
+        tokens=[token for _, _, _, token in rows],
+        pending_tokens=[token for _, status, _, token in rows if status == Status.Pending.value],
+    )
+
+
+class Scenarios:
+    """
+    One request factory per route. Each call builds the i-th request of a run; write
+    scenarios use i to keep their rows unique (e.g. non-overlapping booking windows).
+    """
+
+    # Routes whose requests write. SQLite serializes writers, so they only run single-threaded.
+    WRITES = {
+        "v1/createproduct/", "v1/importproducts/", "v1/createbooking/",
+        "v1/createbookings/", "v1/cancelbooking/<int:booking_id>/", "v1/cancelbooking/token/<str:token>/",
+    }
+
+    def __init__(self, data: Dataset, seed: int = 1):
+        self.data = data
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_window = 0
+        self.routes = {
+            "v1/health/": self.health,
+            "v1/getproducts/": self.getproducts,
+            "v1/searchproducts/": self.searchproducts,
+            "v1/productfacets/": self.productfacets,
+            "v1/createproduct/": self.createproduct,
+            "v1/importproducts/": self.importproducts,
+            "v1/getproduct/<int:product_id>/": self.getproduct,
+            "v1/createbooking/": self.createbooking,
+            "v1/createbookings/": self.createbookings,
+            "v1/cancelbooking/<int:booking_id>/": self.cancelbooking,
+            "v1/cancelbooking/token/<str:token>/": self.cancelbookingbytoken,
+            "v1/getbookings/<str:customer_email>/": self.getbookings,
+            "v1/getbooking/<int:booking_id>/": self.getbooking,
+            "v1/getbooking/token/<str:token>/": self.getbookingbytoken,
+            "v1/resellerreport/<int:reseller_id>/": self.resellerreport,
+            "v1/cachestats/": self.cachestats,
+            "v1/quote/": self.quote,
+            "v1/metrics/": self.metrics,
+        }
+
+    def missing_routes(self) -> list[str]:
+        """Routes in app/urls.py without a scenario; a new route must get one."""
+        return sorted({str(pattern.pattern) for pattern in urlpatterns} - set(self.routes))
+
+    def _choice(self, values):
+        with self._lock:
+            return self.rng.choice(values)
+
+    def _windows(self, count: int) -> list[tuple[Product, object, object]]:
+        """count unused two-day windows, spread over the products."""
+        with self._lock:
+            first = self._next_window
+            self._next_window += count
+        products = self.data.products
+        windows = []
+        for n in range(first, first + count):
+            start = _FUTURE + timedelta(days=3 * (n // len(products)))
+            windows.append((products[n % len(products)], start, start + timedelta(days=2)))
+        return windows
+
+    @staticmethod
+    def _booking(product, start, end) -> dict:
+        return {
+            "product_id": product.product_id,
+            "customer_email": "benchmark@example.com",
+            "reseller_id": product.reseller_id,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "total_price": str(product.price_per_day * 2),
+        }
+
+    @staticmethod
+    def _post_json(client, path, body):
+        return client.post(path, json.dumps(body), content_type="application/json")
+
+    def health(self, client, i):
+        return client.get("/v1/health/")
+
+    def getproducts(self, client, i):
+        # Mix of legacy pages, keyset first pages and rating filters
+        variant = i % 3
+        if variant == 0:
+            return client.get(f"/v1/getproducts/?page={i % 20 + 1}")
+        if variant == 1:
+            return client.get("/v1/getproducts/?cursor=&include_total=0")
+        return client.get(f"/v1/getproducts/?min_rating={i % 5}.5")
+
+    def searchproducts(self, client, i):
+        # Rotates through the sorts, with a different filter each time
+        sort = ("price", "-price", "rating", "-rating", "name", "-name")[i % 6]
+        product = self._choice(self.data.products)
+        filters = (
+            {"type": product.type},
+            {"reseller_id": product.reseller_id},
+            {"min_price": "18", "max_price": "25"},
+            {"q": product.name[:10]},
+        )[i % 4]
+        return client.get("/v1/searchproducts/", {**filters, "sort": sort})
+
+    def productfacets(self, client, i):
+        return client.get("/v1/productfacets/")
+
+    def createproduct(self, client, i):
+        product = self._choice(self.data.products)
+        return self._post_json(client, "/v1/createproduct/", {
+            "reseller_id": product.reseller_id, "name": f"Benchmark {i}", "type": "garage",
+            "price_per_day": "20.00", "rating": f"{i % 50 / 10:.1f}",
+        })
+
+    def importproducts(self, client, i):
+        product = self._choice(self.data.products)
+        rows = "\n".join(json.dumps({
+            "reseller_id": product.reseller_id, "name": f"Imported {i}-{n}", "type": "valet",
+            "price_per_day": "25.00", "rating": "4.0",
+        }) for n in range(20))
+        return client.post("/v1/importproducts/", rows, content_type="application/x-ndjson")
+
+    def getproduct(self, client, i):
+        return client.get(f"/v1/getproduct/{self._choice(self.data.products).product_id}/")
+
+    def createbooking(self, client, i):
+        return self._post_json(client, "/v1/createbooking/", self._booking(*self._windows(1)[0]))
+
+    def createbookings(self, client, i):
+        return self._post_json(client, "/v1/createbookings/", [self._booking(*w) for w in self._windows(10)])
+
+    def cancelbooking(self, client, i):
+        # Cancelling an already cancelled booking is a valid no-op, so ids may repeat
+        pending = self.data.pending_ids
+        return client.post(f"/v1/cancelbooking/{pending[i % len(pending)]}/")
+
+    def cancelbookingbytoken(self, client, i):
+        pending = self.data.pending_tokens
+        return client.post(f"/v1/cancelbooking/token/{pending[-1 - i % len(pending)]}/")
+
+    def getbookings(self, client, i):
+        response = client.get(f"/v1/getbookings/{self._choice(self.data.emails)}/")
+        # Read the whole stream, so its queries are part of the measurement
+        b"".join(response.streaming_content)
+        return response
+
+    def getbooking(self, client, i):
+        return client.get(f"/v1/getbooking/{self._choice(self.data.booking_ids)}/")
+
+    def getbookingbytoken(self, client, i):
+        return client.get(f"/v1/getbooking/token/{self._choice(self.data.tokens)}/")
+
+    def resellerreport(self, client, i):
+        # A month to a year of one reseller's seeded bookings
+        start = SEED_START + timedelta(days=i % 90)
+        end = start + timedelta(days=(30, 90, 365)[i % 3])
+        reseller_id = self._choice(self.data.products).reseller_id
+        return client.get(f"/v1/resellerreport/{reseller_id}/?from={start.date()}&to={end.date()}")
+
+    def cachestats(self, client, i):
+        return client.get("/v1/cachestats/")
+
+    def quote(self, client, i):
+        start = _FUTURE + timedelta(days=i % 30)
+        items = [{
+            "product_id": self._choice(self.data.products).product_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=3)).isoformat(),
+        } for _ in range(10)]
+        return self._post_json(client, "/v1/quote/", {"items": items})
+
+    def metrics(self, client, i):
+        return client.get("/v1/metrics/")
+
+
+def _timed(request, client, i) -> tuple[float, bool]:
+    started = time.perf_counter()
+    response = request(client, i)
+    return (time.perf_counter() - started) * 1000, response.status_code < 400
+
+
+def _summary(durations: list[float], errors: int, wall_seconds: float) -> dict:
+    return {
+        "requests": len(durations),
+        "errors": errors,
+        "p50_ms": round(percentile(durations, 0.50), 3),
+        "p95_ms": round(percentile(durations, 0.95), 3),
+        "p99_ms": round(percentile(durations, 0.99), 3),
+        "rps": round(len(durations) / wall_seconds, 1),
+    }
+
+
+def run_serial(request, requests: int, warmup: int = 5) -> dict:
+    client = Client(HTTP_X_API_KEY=API_KEY)
+    for i in range(warmup):
+        request(client, requests + i)
+    durations, errors = [], 0
+    started = time.perf_counter()
+    for i in range(requests):
+        elapsed, ok = _timed(request, client, i)
+        durations.append(elapsed)
+        errors += not ok
+    return _summary(durations, errors, time.perf_counter() - started)
+
+
+def run_concurrent(request, requests: int, threads: int) -> dict:
+    """Spreads `requests` over `threads` workers, each with its own client (and connection)."""
+    local = threading.local()
+
+    def call(i):
+        if not hasattr(local, "client"):
+            local.client = Client(HTTP_X_API_KEY=API_KEY)
+        return _timed(request, local.client, i)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(call, range(requests)))
+    wall = time.perf_counter() - started
+    return _summary([elapsed for elapsed, _ in results], sum(not ok for _, ok in results), wall)
+
+
+def run(scenarios: Scenarios, requests: int, threads: int) -> dict:
+    """Benchmarks every route; returns {route: {"serial": {...}, "concurrent": {...}}}."""
+    results = {}
+    for route, request in scenarios.routes.items():
+        results[route] = {"serial": run_serial(request, requests)}
+        if route not in Scenarios.WRITES and threads > 1:
+            results[route]["concurrent"] = run_concurrent(request, requests, threads)
+    return results
+
+
+def write_results(results: dict, path: str, settings: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"settings": settings, "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results: dict, baseline: dict, threshold: float, slack_ms: float = 1.0) -> list[str]:
+    """
+    Regressions against a results file written by write_results: a p50 more than
+    `threshold` (a fraction) and `slack_ms` above the baseline, or RPS more than
+    `threshold` below it. p95/p99 are reported but not gated; on a shared machine their
+    run-to-run noise is larger than the regressions worth catching. Routes or modes
+    missing from the baseline are skipped.
+    """
+    regressions = []
+    for route, modes in results.items():
+        for mode, current in modes.items():
+            previous = baseline["results"].get(route, {}).get(mode)
+            if previous is None:
+                continue
+            if current["p50_ms"] > previous["p50_ms"] * (1 + threshold) + slack_ms:
+                regressions.append(f"{route} [{mode}] p50 {previous['p50_ms']}ms -> {current['p50_ms']}ms")
+            if current["rps"] < previous["rps"] * (1 - threshold):
+                regressions.append(f"{route} [{mode}] rps {previous['rps']} -> {current['rps']}")
+    return regressions
+
+
+def format_table(results: dict) -> str:
+    lines = [f"{'route':<40} {'mode':<10} {'req':>5} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8}"]
+    for route, modes in results.items():
+        for mode, r in modes.items():
+            lines.append(
+                f"{route:<40} {mode:<10} {r['requests']:>5} {r['errors']:>4} "
+                f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} {r['rps']:>8}"
+            )
+    return "\n".join(lines)
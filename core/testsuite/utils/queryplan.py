@@ -0,0 +1,100 @@
+"""Helpers to capture the SQL a piece of code runs and inspect its SQLite query plan."""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+
+def explain(sql: str) -> list[str]:
+    """Returns the detail lines of SQLite's EXPLAIN QUERY PLAN for a captured statement."""
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def capture_sql(func, *args, **kwargs) -> list[str]:
+    """Runs func and returns the SQL it executed, with parameters interpolated."""
+    with CaptureQueriesContext(connection) as queries:
+        result = func(*args, **kwargs)
+        # Evaluate lazy querysets inside the capture
+        if hasattr(result, "_fetch_all"):
+            list(result)
+    return [query["sql"] for query in queries.captured_queries]
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Base class for query plan regression tests. Subclasses seed data in setUpTestData and
+    call `analyze()` so SQLite plans with realistic statistics.
+    """
+
+    @staticmethod
+    def analyze():
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def assertNoTableScan(self, func, *args, tables=(), allow_no_reads=False, **kwargs):
+        """
+        Fails if any statement func runs scans one of `tables` end to end instead of
+        searching an index. Returns the captured (sql, plan) pairs.
+        """
+        self.assertEqual(connection.vendor, "sqlite", "Query plan tests run on SQLite")
+        statements = []
+        for sql in capture_sql(func, *args, **kwargs):
+            if sql.lstrip().upper().startswith(("INSERT", "SAVEPOINT", "RELEASE", "ROLLBACK")):
+                continue
+            plan = explain(sql)
+            statements.append((sql, plan))
+            for line in plan:
+                for table in tables:
+                    self.assertFalse(
+                        line.startswith(f"SCAN {table}"),
+                        f"Full scan of {table}:\n  {sql}\n  plan: {plan}",
+                    )
+        if not allow_no_reads:
+            self.assertTrue(statements, "No statements were captured")
+        return statements
+
+    def _explain_all(self, func, *args, **kwargs) -> list[tuple[str, list[str]]]:
+        self.assertEqual(connection.vendor, "sqlite", "Query plan tests run on SQLite")
+        statements = [(sql, explain(sql)) for sql in capture_sql(func, *args, **kwargs)]
+        self.assertTrue(statements, "No statements were captured")
+        return statements
+
+    def assertIndexOrdered(self, func, *args, table: str, **kwargs):
+        """
+        Fails unless every statement func runs reads `table` through an index range and
+        returns rows in index order: no table scan and no temporary b-tree for ORDER BY (a
+        filesort). Walking a whole index in order (SCAN ... USING INDEX) only passes for
+        a statement without a WHERE clause, where the LIMIT stops it after a page; with
+        a filter the walk goes on until enough rows match, up to the whole index.
+        Returns the captured (sql, plan) pairs.
+        """
+        statements = self._explain_all(func, *args, **kwargs)
+        for sql, plan in statements:
+            for line in plan:
+                if line.startswith(f"SCAN {table}"):
+                    self.assertIn("INDEX", line, f"Full scan of {table}:\n  {sql}\n  plan: {plan}")
+                    self.assertNotIn(" WHERE ", sql, f"Filtered walk of an index of {table}:\n  {sql}\n  plan: {plan}")
+                self.assertNotIn("TEMP B-TREE", line, f"Sort outside an index:\n  {sql}\n  plan: {plan}")
+        return statements
+
+    def assertIndexRange(self, func, *args, table: str, sort_outside_index: bool = False, **kwargs):
+        """
+        Fails unless every statement func runs reads `table` from an index range or
+        equality (SEARCH), never a scan or a walk of a whole index. A temporary b-tree
+        for ORDER BY (a filesort) fails too, unless the caller states with
+        sort_outside_index=True that no index can return the range in the requested
+        order; the range then bounds how many rows are sorted. Returns the captured
+        (sql, plan) pairs.
+        """
+        statements = self._explain_all(func, *args, **kwargs)
+        for sql, plan in statements:
+            self.assertTrue(
+                any(line.startswith(f"SEARCH {table}") for line in plan),
+                f"{table} is not read from an index range:\n  {sql}\n  plan: {plan}",
+            )
+            for line in plan:
+                self.assertFalse(line.startswith(f"SCAN {table}"), f"Scan of {table}:\n  {sql}\n  plan: {plan}")
+                if not sort_outside_index:
+                    self.assertNotIn("TEMP B-TREE", line, f"Sort outside an index:\n  {sql}\n  plan: {plan}")
+        return statements
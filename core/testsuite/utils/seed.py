@@ -0,0 +1,62 @@
+"""Deterministic bulk data for tests and benchmarks."""
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.utils import timezone
+from core.models import Booking, Product, Reseller, Status
+from core.repository.booking_rollup_repository import BookingRollupRepository, booking_changes
+from core.repository.product_facet_repository import ProductFacetRepository
+from core.repository.rating_histogram_repository import RatingHistogramRepository
+
+SEED_START = datetime(2025, 1, 1, tzinfo=timezone.get_fixed_timezone(0))
+
+
+def seed_catalog(resellers: int = 50, products_per_reseller: int = 30, seed: int = 1) -> list[Product]:
+    rng = random.Random(seed)
+    reseller_rows = Reseller.objects.bulk_create(
+        [Reseller(name=f"Reseller {i}") for i in range(resellers)]
+    )
+    Product.objects.bulk_create([
+        Product(
+            reseller=reseller,
+            name=f"Parking Space {i}",
+            type=rng.choice(["parking_space", "garage", "valet"]),
+            price_per_day=Decimal(rng.randint(15, 30)),
+            rating=Decimal(rng.randint(10, 50)) / 10,
+        )
+        for reseller in reseller_rows
+        for i in range(products_per_reseller)
+    ], batch_size=1000)
+    # bulk_create skips the signals that maintain the rating histogram and the facets
+    RatingHistogramRepository.rebuild()
+    ProductFacetRepository.rebuild()
+    return list(Product.objects.all())
+
+
+def seed_bookings(count: int, products: list[Product], customers: int = 1000, seed: int = 1) -> None:
+    """
+    Creates `count` bookings spread over the given products. Each product's bookings are
+    laid out back to back so they never overlap.
+    """
+    rng = random.Random(seed)
+    next_start = {product.product_id: SEED_START for product in products}
+    bookings = []
+    for _ in range(count):
+        product = rng.choice(products)
+        start = next_start[product.product_id]
+        end = start + timedelta(days=rng.randint(1, 14))
+        next_start[product.product_id] = end
+        booking = Booking(
+            product_id=product.product_id,
+            customer_email=f"customer{rng.randrange(customers)}@example.com",
+            reseller_id=product.reseller_id,
+            start_date=start,
+            end_date=end,
+            total_price=product.price_per_day * (end - start).days,
+            status=rng.choice([Status.Pending.value, Status.Confirmed.value, Status.Cancelled.value]),
+        )
+        booking.issue_access_token()
+        bookings.append(booking)
+    Booking.objects.bulk_create(bookings, batch_size=1000)
+    # bulk_create bypasses BookingRepository, which maintains the rollups
+    BookingRollupRepository.apply(booking_changes(added=bookings))
@@ -0,0 +1,170 @@
+import json
+import os
+import runpy
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+from django.conf import settings as django_settings
+from django.core.cache import cache
+from django.test import AsyncClient, Client, SimpleTestCase, TransactionTestCase, override_settings
+from core.models import Booking
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.seed import SEED_START, seed_bookings, seed_catalog
+from utilities.admissionutility import SlotLimiter
+from utilities.metricsutility import registry
+
+CLASSES = {"read": (1, 0.05), "write": (1, 0.05), "email_write": (1, 0.05), "import": (1, 0)}
+
+
+@override_settings(ADMISSION_CLASSES=CLASSES, ADMISSION_RETRY_AFTER=3)
+class AdmissionControlTests(TransactionTestCase):
+    """
+    Slots are held from the test through a second SlotLimiter on the same directory,
+    the way another gunicorn worker would hold them.
+    """
+
+    def setUp(self):
+        self.products = seed_catalog(resellers=1, products_per_reseller=3)
+        seed_bookings(5, self.products)
+        cache.clear()
+        catalog_cache.clear_local()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        settings = override_settings(ADMISSION_DIR=directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.directory = directory
+        # Held limiters; a dropped limiter closes its lock files, which frees its slots
+        self.holders = []
+        self.client = Client(HTTP_X_API_KEY="test-key")
+        self.product = self.products[0]
+
+    def _hold(self, name: str) -> tuple[SlotLimiter, int]:
+        limiter = SlotLimiter(name, CLASSES[name][0], self.directory)
+        slot = limiter.try_acquire()
+        self.assertIsNotNone(slot)
+        self.holders.append(limiter)
+        return limiter, slot
+
+    def _product_url(self):
+        return f"/v1/getproduct/{self.product.product_id}/"
+
+    def test_sheds_with_503_and_retry_after_when_the_class_is_full(self):
+        limiter, slot = self._hold("read")
+        response = self.client.get(self._product_url())
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
+        self.assertEqual(response.json(), {
+            "status": "error", "data": {"message": "Server busy, retry later", "code": 503},
+        })
+
+        limiter.release(slot)
+        self.assertEqual(self.client.get(self._product_url()).status_code, 200)
+
+    async def test_async_requests_are_shed_too(self):
+        self._hold("read")
+        response = await AsyncClient().get(self._product_url(), headers={"X-API-Key": "test-key"})
+        self.assertEqual(response.status_code, 503)
+
+    def test_health_and_metrics_are_exempt(self):
+        self._hold("read")
+        self.assertEqual(self.client.get("/v1/health/").status_code, 200)
+        self.assertEqual(self.client.get("/v1/metrics/").status_code, 200)
+
+    def test_classes_are_limited_separately(self):
+        self._hold("read")
+        self._hold("write")
+        start = SEED_START + timedelta(days=3000)
+        response = self.client.post("/v1/createbooking/", json.dumps({
+            "product_id": self.product.product_id,
+            "customer_email": "admitted@example.com",
+            "reseller_id": self.product.reseller_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=2)).isoformat(),
+            "total_price": str(self.product.price_per_day * 2),
+        }), content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_imports_have_their_own_class(self):
+        body = json.dumps({
+            "reseller_id": self.product.reseller_id, "name": "Imported", "type": "garage", "price_per_day": "10",
+        }) + "\n"
+        self._hold("write")
+        response = self.client.post("/v1/importproducts/", body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 201)
+
+        # A running import turns the next one away without waiting
+        self._hold("import")
+        response = self.client.post("/v1/importproducts/", body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, 503)
+
+    @override_settings(ADMISSION_CLASSES={**CLASSES, "read": (1, 2.0)})
+    def test_waits_for_a_slot_within_the_deadline(self):
+        limiter, slot = self._hold("read")
+        threading.Timer(0.05, limiter.release, [slot]).start()
+        self.assertEqual(Client(HTTP_X_API_KEY="test-key").get(self._product_url()).status_code, 200)
+
+    def test_streamed_responses_hold_their_slot_until_the_end(self):
+        email = Booking.objects.first().customer_email
+        response = self.client.get(f"/v1/getbookings/{email}/")
+        other = SlotLimiter("read", 1, self.directory)
+        self.assertIsNone(other.try_acquire())
+        b"".join(response.streaming_content)
+        self.assertIsNotNone(other.try_acquire())
+
+    def test_shed_requests_are_counted_per_class_and_route(self):
+        self._hold("read")
+        self.client.get(self._product_url())
+        self.assertIn(
+            'admission_shed_total{class="read",route="v1/getproduct/<int:product_id>/"}',
+            registry.render(),
+        )
+
+
+class SlotLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def test_limiters_on_one_directory_share_the_slots(self):
+        first = SlotLimiter("read", 2, self.directory)
+        second = SlotLimiter("read", 2, self.directory)
+        slots = [first.try_acquire(), second.try_acquire()]
+        self.assertCountEqual(slots, [0, 1])
+        self.assertIsNone(first.try_acquire())
+        self.assertIsNone(second.acquire(0.01))
+        first.release(slots[0])
+        self.assertEqual(second.acquire(0.01), slots[0])
+
+
+class AdmissionDefaultsTests(SimpleTestCase):
+    """The default limits leave at least one sync worker free for reads."""
+
+    def _settings(self, **env) -> dict:
+        names = ("GUNICORN_WORKERS", "ADMISSION_WRITE_LIMIT", "ADMISSION_EMAIL_WRITE_LIMIT", "ADMISSION_IMPORT_LIMIT")
+        clean = {name: value for name, value in os.environ.items() if name not in names}
+        with mock.patch.dict(os.environ, {**clean, **env}, clear=True):
+            return runpy.run_path(str(Path(django_settings.BASE_DIR) / "app" / "settings.py"))
+
+    def _non_read_slots(self, values: dict) -> int:
+        return sum(limit for name, (limit, _) in values["ADMISSION_CLASSES"].items() if name != "read")
+
+    def test_non_read_limits_stay_below_the_worker_count(self):
+        defaults = self._settings()
+        self.assertLess(self._non_read_slots(defaults), defaults["GUNICORN_WORKERS"])
+        for workers in (4, 6, 16):
+            with self.subTest(workers=workers):
+                values = self._settings(GUNICORN_WORKERS=str(workers))
+                self.assertLess(self._non_read_slots(values), workers)
+                self.assertEqual(self._non_read_slots(values), workers - 1)
+
+    def test_the_entrypoint_starts_the_default_worker_count(self):
+        entrypoint = Path(django_settings.BASE_DIR) / "docker-roosh-api" / "web" / "entrypoint.sh"
+        workers = self._settings()["GUNICORN_WORKERS"]
+        self.assertIn(f"--workers ${{GUNICORN_WORKERS:-{workers}}}", entrypoint.read_text())
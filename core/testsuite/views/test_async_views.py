@@ -0,0 +1,123 @@
+import json
+import os
+from unittest import mock
+from django.core.cache import cache
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from core.models import Booking, Status
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.seed import seed_bookings, seed_catalog
+from utilities.cacheutility import TieredCache
+
+HEADERS = {"X-API-Key": "test-key"}
+
+
+class AsyncViewTests(TestCase):
+    """The read views are async; AsyncClient runs them (and the middleware) natively."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = seed_catalog(resellers=1, products_per_reseller=5)
+        seed_bookings(10, cls.products)
+        cls.booking = Booking.objects.filter(status=Status.Pending.value).first()
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.clear_local()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = AsyncClient()
+
+    async def test_health(self):
+        response = await self.client.get("/v1/health/", headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "ok", "data": "API is up and running!"})
+
+    async def test_api_key_is_required(self):
+        response = await self.client.get("/v1/health/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {"status": "error", "data": {"message": "Invalid API key", "code": 401}})
+
+    async def test_unhandled_errors_become_a_json_500(self):
+        client = AsyncClient(raise_request_exception=False)
+        with mock.patch("core.views.getproducts.ProductService.acatalog_etag", side_effect=RuntimeError("boom")):
+            response = await client.get("/v1/getproducts/", headers=HEADERS)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()["data"], {"message": "Internal server error", "code": 500})
+
+    async def test_cors(self):
+        response = await self.client.options("/v1/getproducts/", headers={"Origin": "https://app.example.com"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Access-Control-Allow-Origin"], "*")
+        self.assertIn("X-API-Key", response["Access-Control-Allow-Headers"])
+
+        response = await self.client.get("/v1/health/", headers={**HEADERS, "Origin": "https://app.example.com"})
+        self.assertEqual(response["Access-Control-Allow-Origin"], "*")
+        self.assertIn("ETag", response["Access-Control-Expose-Headers"])
+
+    async def test_getproduct(self):
+        product = self.products[0]
+        response = await self.client.get(f"/v1/getproduct/{product.product_id}/", headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["product_id"], product.product_id)
+        self.assertTrue(response.has_header("ETag"))
+
+        response = await self.client.get("/v1/getproduct/999999/", headers=HEADERS)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_getproducts(self):
+        response = await self.client.get("/v1/getproducts/", headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["total"], 5)
+        self.assertEqual(len(data["items"]), 5)
+
+        # The second request is answered from the catalog cache
+        again = await self.client.get("/v1/getproducts/", headers=HEADERS)
+        self.assertEqual(again.content, response.content)
+        self.assertGreater(catalog_cache.stats()["local_hits"], 0)
+
+    async def test_getbooking(self):
+        response = await self.client.get(f"/v1/getbooking/{self.booking.booking_id}/", headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["booking_id"], self.booking.booking_id)
+
+        response = await self.client.get("/v1/getbooking/999999/", headers=HEADERS)
+        self.assertEqual(response.status_code, 400)
+
+    async def test_getbookings_streams_an_async_iterator(self):
+        response = await self.client.get(f"/v1/getbookings/{self.booking.customer_email}/", headers=HEADERS)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = json.loads(b"".join([chunk async for chunk in response.streaming_content]))
+        expected = [
+            booking_id async for booking_id in Booking.objects.filter(customer_email=self.booking.customer_email)
+            .order_by("booking_id").values_list("booking_id", flat=True)
+        ]
+        self.assertEqual([item["booking_id"] for item in body["data"]], expected)
+
+
+class TieredCacheAsyncTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = TieredCache("async-test", ttl=60, local_max_entries=10, local_ttl=60)
+
+    async def test_aget_or_set_loads_once(self):
+        calls = []
+
+        async def load():
+            calls.append(1)
+            return {"value": 1}
+
+        self.assertEqual(await self.cache.aget_or_set("key", load), {"value": 1})
+        self.assertEqual(await self.cache.aget_or_set("key", load), {"value": 1})
+        self.assertEqual(len(calls), 1)
+
+        # Another process: empty local tier, same shared cache
+        other = TieredCache("async-test", ttl=60, local_max_entries=10, local_ttl=60)
+        self.assertEqual(await other.aget_or_set("key", load), {"value": 1})
+        self.assertEqual(other.stats()["shared_hits"], 1)
+
+        self.cache.bump()
+        await self.cache.aget_or_set("key", load)
+        self.assertEqual(len(calls), 2)
@@ -0,0 +1,64 @@
+import json
+import os
+from datetime import timedelta
+from unittest import mock
+from django.test import AsyncClient, Client, TransactionTestCase
+from core.models import Booking, Status, digest_access_token
+from core.testsuite.utils.seed import SEED_START, seed_bookings, seed_catalog
+
+
+class BookingTokenTests(TransactionTestCase):
+    def setUp(self):
+        self.products = seed_catalog(resellers=1, products_per_reseller=3)
+        seed_bookings(10, self.products)
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+        self.booking = Booking.objects.filter(status=Status.Pending.value).first()
+
+    def test_created_bookings_return_their_token(self):
+        product = self.products[0]
+        start = SEED_START + timedelta(days=3000)
+        response = self.client.post("/v1/createbooking/", json.dumps({
+            "product_id": product.product_id,
+            "customer_email": "token@example.com",
+            "reseller_id": product.reseller_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=2)).isoformat(),
+            "total_price": str(product.price_per_day * 2),
+        }), content_type="application/json")
+        data = response.json()["data"]
+        booking = Booking.objects.get(pk=data["booking_id"])
+        self.assertEqual(data["access_token"], booking.access_token)
+        self.assertEqual(bytes(booking.access_token_digest), digest_access_token(booking.access_token))
+
+    async def test_get_by_token(self):
+        client = AsyncClient()
+        headers = {"X-API-Key": "test-key"}
+        response = await client.get(f"/v1/getbooking/token/{self.booking.access_token}/", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["booking_id"], self.booking.booking_id)
+
+        by_id = await client.get(f"/v1/getbooking/{self.booking.booking_id}/", headers=headers)
+        self.assertEqual(response["ETag"], by_id["ETag"])
+        response = await client.get(
+            f"/v1/getbooking/token/{self.booking.access_token}/", headers={**headers, "If-None-Match": by_id["ETag"]},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_unknown_and_oversized_tokens_are_not_found(self):
+        for token in ("unknown", "x" * 129):
+            response = await AsyncClient().get(f"/v1/getbooking/token/{token}/", headers={"X-API-Key": "test-key"})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {"status": "error", "data": "Booking not found"})
+
+    def test_cancel_by_token(self):
+        response = self.client.post(f"/v1/cancelbooking/token/{self.booking.access_token}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"], {"booking_id": self.booking.booking_id, "status": Status.Cancelled.value})
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, Status.Cancelled.value)
+
+        self.assertEqual(self.client.post("/v1/cancelbooking/token/unknown/").status_code, 404)
+        self.assertEqual(self.client.post(f"/v1/cancelbooking/token/{'x' * 129}/").status_code, 404)
@@ -0,0 +1,134 @@
+import os
+from unittest import mock
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase
+from django.utils import timezone
+from core.models import Product
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.seed import seed_catalog
+from utilities.cacheutility import _MISSING, LocalLRU, TieredCache, generation_scope
+
+
+class LocalLRUTests(SimpleTestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        lru = LocalLRU(max_entries=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        self.assertEqual(lru.get("a"), 1)
+        lru.set("c", 3)
+        self.assertIs(lru.get("b"), _MISSING)
+        self.assertEqual((lru.get("a"), lru.get("c")), (1, 3))
+        self.assertEqual((len(lru), lru.evictions), (2, 1))
+
+    def test_entries_expire_after_the_ttl(self):
+        lru = LocalLRU(max_entries=2, ttl=10)
+        with mock.patch("utilities.cacheutility.time.monotonic", return_value=100.0):
+            lru.set("a", 1)
+        with mock.patch("utilities.cacheutility.time.monotonic", return_value=110.0):
+            self.assertEqual(lru.get("a"), 1)
+        with mock.patch("utilities.cacheutility.time.monotonic", return_value=110.5):
+            self.assertIs(lru.get("a"), _MISSING)
+        self.assertEqual((len(lru), lru.evictions), (0, 0))
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = TieredCache("tiered-test", ttl=60, local_max_entries=10, local_ttl=30)
+        self.calls = 0
+
+    def _load(self):
+        self.calls += 1
+        return {"items": [{"value": self.calls}]}
+
+    def test_a_bump_invalidates_this_process_at_once(self):
+        self.assertEqual(self.cache.get_or_set("key", self._load), {"items": [{"value": 1}]})
+        before = self.cache.generation()
+        self.cache.bump()
+        self.assertNotEqual(self.cache.generation(), before)
+        self.assertEqual(self.cache.get_or_set("key", self._load), {"items": [{"value": 2}]})
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_other_processes_see_a_bump_at_once(self):
+        other = TieredCache("tiered-test", ttl=60, local_max_entries=10, local_ttl=30)
+        self.assertEqual(other.get_or_set("key", self._load), {"items": [{"value": 1}]})
+        self.cache.bump()
+        self.assertEqual(other.get_or_set("key", self._load), {"items": [{"value": 2}]})
+        self.assertEqual(other.generation(), self.cache.generation())
+
+    def test_a_scope_reads_the_generation_once(self):
+        self.cache.get_or_set("key", self._load)
+        with generation_scope():
+            with mock.patch.object(self.cache.shared, "get", wraps=self.cache.shared.get) as shared_get:
+                for _ in range(3):
+                    self.assertEqual(self.cache.get_or_set("key", self._load), {"items": [{"value": 1}]})
+                    self.cache.generation()
+            self.assertEqual(shared_get.call_count, 1)
+
+            # A bump in the scope applies to the rest of it
+            self.cache.bump()
+            self.assertEqual(self.cache.get_or_set("key", self._load), {"items": [{"value": 2}]})
+        self.assertEqual(self.cache.stats()["local_hits"], 3)
+
+    def test_a_bump_by_another_process_is_seen_by_the_next_scope(self):
+        with generation_scope():
+            self.cache.get_or_set("key", self._load)
+            # What another process's bump leaves in the shared cache
+            cache.set("tiered-test:generation", "another-process", timeout=None)
+            # Consistent within the scope
+            self.assertEqual(self.cache.get_or_set("key", self._load), {"items": [{"value": 1}]})
+        with generation_scope():
+            self.assertEqual(self.cache.get_or_set("key", self._load), {"items": [{"value": 2}]})
+
+    def test_callers_get_copies(self):
+        loaded = self.cache.get_or_set("key", self._load)
+        loaded["items"].append("mutated by the loader's caller")
+        hit = self.cache.get_or_set("key", self._load)
+        hit["items"][0]["value"] = "mutated"
+        self.assertEqual(self.cache.get_or_set("key", self._load), {"items": [{"value": 1}]})
+        self.assertEqual(self.calls, 1)
+
+    def test_none_is_cached(self):
+        self.assertIsNone(self.cache.get_or_set("none", lambda: None))
+        self.cache.clear_local()
+        self.assertIsNone(self.cache.get_or_set("none", self._load))
+        self.assertEqual((self.calls, self.cache.stats()["shared_hits"]), (0, 1))
+
+
+class CacheStatsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = seed_catalog(resellers=1, products_per_reseller=1)[0]
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.clear_local()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def test_counts_the_catalog_lookups(self):
+        before = self.client.get("/v1/cachestats/").json()["data"]["catalog"]
+        for _ in range(3):
+            self.assertEqual(self.client.get(f"/v1/getproduct/{self.product.product_id}/").status_code, 200)
+        response = self.client.get("/v1/cachestats/")
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()["data"]["catalog"]
+        self.assertEqual(stats["misses"] - before["misses"], 1)
+        self.assertEqual(stats["local_hits"] - before["local_hits"], 2)
+        self.assertGreaterEqual(stats["local_entries"], 1)
+        self.assertEqual(
+            set(stats),
+            {"local_hits", "shared_hits", "misses", "hit_ratio", "local_evictions", "local_entries", "local_max_entries"},
+        )
+
+    def test_a_request_sees_a_change_made_by_another_worker(self):
+        path = f"/v1/getproduct/{self.product.product_id}/"
+        before = self.client.get(path)
+        # Another worker saves the product: the row and the shared generation change
+        Product.objects.filter(pk=self.product.pk).update(name="Renamed", updated_at=timezone.now())
+        TieredCache("catalog", ttl=60, local_max_entries=10, local_ttl=60).bump()
+        after = self.client.get(path)
+        self.assertEqual(after.json()["data"]["name"], "Renamed")
+        self.assertNotEqual(after["ETag"], before["ETag"])
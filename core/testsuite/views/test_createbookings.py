@@ -0,0 +1,168 @@
+import json
+import os
+from datetime import timedelta
+from unittest import mock
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+from core.dto.booking_dto import BookingDTO
+from core.models import Booking, EmailOutbox, Reseller, Status, digest_access_token
+from core.service.booking_service import BookingService
+from core.testsuite.utils.seed import SEED_START, seed_catalog
+
+
+class CreateBookingsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product, cls.other = seed_catalog(resellers=2, products_per_reseller=1)
+        cls.start = SEED_START + timedelta(days=100)
+        cls.existing = Booking.objects.create(
+            product_id=cls.product.product_id, customer_email="existing@example.com", reseller_id=cls.product.reseller_id,
+            start_date=cls.start, end_date=cls.start + timedelta(days=2), total_price=cls.product.price_per_day * 2,
+            status=Status.Confirmed.value,
+        )
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def _item(self, product=None, offset_days: int = 10, days: int = 2, **fields) -> dict:
+        product = product or self.product
+        start = self.start + timedelta(days=offset_days)
+        return {
+            "product_id": product.product_id,
+            "customer_email": "batch@example.com",
+            "reseller_id": product.reseller_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=days)).isoformat(),
+            "total_price": str(product.price_per_day * days),
+            **fields,
+        }
+
+    def _post(self, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/v1/createbookings/", json.dumps(body), content_type="application/json")
+
+    def _statuses(self, response) -> list:
+        return [(item["status"], item.get("code")) for item in response.json()["data"]["items"]]
+
+    def test_results_are_reported_per_index(self):
+        other_reseller = Reseller.objects.exclude(pk=self.product.reseller_id).get()
+        response = self._post([
+            self._item(),
+            self._item(offset_days=20, end_date="not a date"),
+            self._item(offset_days=30, days=0),
+            self._item(offset_days=40, product_id=999999),
+            self._item(offset_days=50, reseller_id=other_reseller.pk),
+            self._item(self.other),
+        ])
+        self.assertEqual(response.status_code, 201)
+        data = response.json()["data"]
+        self.assertEqual((data["created"], data["failed"]), (2, 4))
+        self.assertEqual([item["index"] for item in data["items"]], list(range(6)))
+        self.assertEqual(self._statuses(response), [
+            ("ok", None), ("error", 400), ("error", 400), ("error", 400), ("error", 400), ("ok", None),
+        ])
+        self.assertEqual(data["items"][2]["data"], "end_date must be after start_date")
+        self.assertEqual(data["items"][3]["data"], "Product not found")
+        self.assertEqual(data["items"][4]["data"], "reseller_id does not match the product's reseller")
+
+        created = Booking.objects.filter(customer_email="batch@example.com").order_by("booking_id")
+        self.assertEqual(
+            [(b.booking_id, b.product_id) for b in created],
+            [(data["items"][i]["booking_id"], p.product_id) for i, p in ((0, self.product), (5, self.other))],
+        )
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+
+    def test_conflicts_with_existing_bookings_and_within_the_batch(self):
+        cancelled = self._item(offset_days=60)
+        Booking.objects.create(
+            product_id=self.product.product_id, customer_email="cancelled@example.com", reseller_id=self.product.reseller_id,
+            start_date=self.start + timedelta(days=60), end_date=self.start + timedelta(days=62),
+            total_price=1, status=Status.Cancelled.value,
+        )
+        response = self._post([
+            self._item(offset_days=1),
+            self._item(offset_days=10),
+            self._item(offset_days=11),
+            self._item(self.other, offset_days=11),
+            # Back to back with the first batch item is not an overlap
+            self._item(offset_days=12),
+            cancelled,
+        ])
+        self.assertEqual(self._statuses(response), [
+            ("error", 409), ("ok", None), ("error", 409), ("ok", None), ("ok", None), ("ok", None),
+        ])
+        self.assertEqual(response.json()["data"]["items"][0]["data"], "Product is already booked for these dates")
+
+    def test_a_batch_where_every_item_fails_is_a_400(self):
+        response = self._post([self._item(offset_days=0), self._item(offset_days=30, days=-1)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["status"], "error")
+        self.assertEqual(response.json()["data"]["created"], 0)
+        self.assertFalse(Booking.objects.filter(customer_email="batch@example.com").exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_batch_size_and_body_shape(self):
+        with mock.patch("core.views.createbookings.MAX_BOOKINGS", 2):
+            response = self._post([self._item(offset_days=10 * i) for i in range(1, 4)])
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["data"], "At most 2 bookings can be created at once")
+            self.assertEqual(self._post([self._item(offset_days=10 * i) for i in range(1, 3)]).status_code, 201)
+
+        for body in ([], {"product_id": 1}):
+            response = self._post(body)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["data"], "A non-empty JSON array of bookings is required")
+        response = self.client.post("/v1/createbookings/", "[", content_type="application/json")
+        self.assertEqual(response.json(), {"status": "error", "data": "Invalid JSON"})
+
+    def test_a_single_booking_is_checked_against_the_product_reseller_too(self):
+        other_reseller = Reseller.objects.exclude(pk=self.product.reseller_id).get()
+        response = self.client.post(
+            "/v1/createbooking/", json.dumps(self._item(reseller_id=other_reseller.pk)), content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["data"], "reseller_id does not match the product's reseller")
+        self.assertFalse(Booking.objects.filter(customer_email="batch@example.com").exists())
+
+    def test_the_callers_dtos_are_not_changed(self):
+        start = timezone.make_naive(self.start + timedelta(days=10))
+        dto = BookingDTO(
+            product_id=self.product.product_id, customer_email="batch@example.com", reseller_id=self.product.reseller_id,
+            start_date=start, end_date=start + timedelta(days=2), total_price=self.product.price_per_day * 2,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            booking, = BookingService.create_bookings([dto])
+        self.assertTrue(timezone.is_naive(dto.start_date) and timezone.is_naive(dto.end_date))
+        self.assertEqual(booking.start_date, timezone.make_aware(start))
+
+    @override_settings(BOOKING_VERIFY_PRICE=True)
+    def test_mispriced_items_are_rejected(self):
+        response = self._post([self._item(), self._item(offset_days=20, total_price="1.00")])
+        self.assertEqual(self._statuses(response), [("ok", None), ("error", 400)])
+        self.assertEqual(
+            response.json()["data"]["items"][1]["data"],
+            f"total_price does not match the quoted price of {self.product.price_per_day * 2}",
+        )
+
+    @override_settings(BOOKING_VERIFY_PRICE=False)
+    def test_prices_are_not_checked_when_verification_is_off(self):
+        response = self._post([self._item(total_price="1.00")])
+        self.assertEqual(self._statuses(response), [("ok", None)])
+
+    def test_ids_are_recovered_when_the_insert_returns_none(self):
+        # MySQL: bulk_create leaves the primary keys unset
+        features = type(connection.features)
+        with mock.patch.object(features, "can_return_rows_from_bulk_insert", new_callable=mock.PropertyMock) as returns:
+            returns.return_value = False
+            response = self._post([self._item(offset_days=10 * i) for i in range(1, 4)])
+        self.assertEqual(response.status_code, 201)
+        items = response.json()["data"]["items"]
+        # Each item got the id of the row its access token belongs to
+        for item in items:
+            booking = Booking.objects.get(access_token_digest=digest_access_token(item["access_token"]))
+            self.assertEqual(item["booking_id"], booking.booking_id)
+        self.assertEqual(len({item["booking_id"] for item in items}), 3)
@@ -0,0 +1,60 @@
+import os
+from unittest import mock
+from django.conf import settings
+from django.test import TransactionTestCase, override_settings
+from core.testsuite.utils import loadbench
+from core.testsuite.utils.benchmark import benchmark
+from utilities import fakemailerutility
+
+# Tuning knobs, all optional:
+#   BENCHMARK_RESELLERS, BENCHMARK_PRODUCTS_PER_RESELLER, BENCHMARK_BOOKINGS: dataset size
+#   BENCHMARK_REQUESTS: requests per route and mode; BENCHMARK_THREADS: concurrent workers
+#   BENCHMARK_OUTPUT: where to write the results JSON
+#   BENCHMARK_BASELINE: results JSON to compare against; BENCHMARK_THRESHOLD: allowed regression (0.25 = 25%)
+CONFIG = {
+    "resellers": int(os.getenv("BENCHMARK_RESELLERS", "20")),
+    "products_per_reseller": int(os.getenv("BENCHMARK_PRODUCTS_PER_RESELLER", "50")),
+    "bookings": int(os.getenv("BENCHMARK_BOOKINGS", "20000")),
+    "requests": int(os.getenv("BENCHMARK_REQUESTS", "200")),
+    "threads": int(os.getenv("BENCHMARK_THREADS", "8")),
+}
+OUTPUT = os.getenv("BENCHMARK_OUTPUT", os.path.join(settings.BASE_DIR, "benchmark-results.json"))
+BASELINE = os.getenv("BENCHMARK_BASELINE")
+THRESHOLD = float(os.getenv("BENCHMARK_THRESHOLD", "0.25"))
+
+
+@benchmark
+@override_settings(
+    MAIL_SENDER="utilities.fakemailerutility.send_mail",
+    MAIL_BULK_SENDER="utilities.fakemailerutility.send_bulk_mail",
+    QUERY_DEBUG_HEADERS=False,
+)
+class EndpointBenchmark(TransactionTestCase):
+    """
+    Latency and throughput of every route, through the full middleware stack.
+    Committed data (TransactionTestCase), so concurrent clients see the seeded rows.
+    """
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {"API_KEY": loadbench.API_KEY})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(fakemailerutility.reset)
+
+    def test_every_route(self):
+        data = loadbench.seed_dataset(CONFIG["resellers"], CONFIG["products_per_reseller"], CONFIG["bookings"])
+        scenarios = loadbench.Scenarios(data)
+        self.assertEqual(scenarios.missing_routes(), [], "every route in app/urls.py needs a scenario")
+
+        results = loadbench.run(scenarios, CONFIG["requests"], CONFIG["threads"])
+        loadbench.write_results(results, OUTPUT, CONFIG)
+        print(f"\nEndpoint benchmark {CONFIG}:\n{loadbench.format_table(results)}\nWritten to {OUTPUT}")
+
+        failed = {route: modes for route, modes in results.items() if any(m["errors"] for m in modes.values())}
+        self.assertEqual(failed, {}, "requests failed during the benchmark")
+
+        if BASELINE:
+            baseline = loadbench.load_baseline(BASELINE)
+            self.assertEqual(baseline["settings"], CONFIG, "the baseline was recorded with other settings")
+            regressions = loadbench.compare(results, baseline, THRESHOLD)
+            self.assertEqual(regressions, [], f"slower than {BASELINE} by more than {THRESHOLD:.0%}")
@@ -0,0 +1,122 @@
+import os
+from unittest import mock
+from django.core.cache import cache
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+from core.models import Booking, Product, Status
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.seed import seed_bookings, seed_catalog
+from utilities.etagutility import etag_matches, make_etag
+
+
+class EtagMatchingTests(SimpleTestCase):
+    def _matches(self, header, etag='"abc"') -> bool:
+        headers = {} if header is None else {"HTTP_IF_NONE_MATCH": header}
+        return etag_matches(RequestFactory().get("/", **headers), etag)
+
+    def test_weak_comparison(self):
+        self.assertTrue(self._matches('"abc"'))
+        # If-None-Match compares weakly: a weak validator matches the strong tag
+        self.assertTrue(self._matches('W/"abc"'))
+        self.assertTrue(self._matches('"other", W/"abc"'))
+        self.assertTrue(self._matches("*"))
+        self.assertFalse(self._matches('"abcd"'))
+        self.assertFalse(self._matches('W/"other"'))
+        self.assertFalse(self._matches("abc"))
+        self.assertFalse(self._matches(""))
+        self.assertFalse(self._matches(None))
+
+    def test_tags_are_strong_and_identify_their_parts(self):
+        etag = make_etag("product", 1, "2025-01-01T00:00:00")
+        self.assertRegex(etag, r'^"[0-9a-f]{24}"$')
+        self.assertEqual(etag, make_etag("product", 1, "2025-01-01T00:00:00"))
+        self.assertNotEqual(etag, make_etag("product", 1, "2025-01-01T00:00:01"))
+        self.assertNotEqual(etag, make_etag("product", 2, "2025-01-01T00:00:00"))
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = seed_catalog(resellers=1, products_per_reseller=5)
+        seed_bookings(10, cls.products)
+        cls.product = cls.products[0]
+        cls.booking = Booking.objects.filter(status=Status.Pending.value).first()
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.clear_local()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def assertRevalidates(self, path: str) -> str:
+        """Checks the 200/304 cycle for path and returns its ETag."""
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+        for header in (etag, f"W/{etag}", f'"stale", {etag}'):
+            with self.subTest(path=path, if_none_match=header):
+                response = self.client.get(path, headers={"If-None-Match": header})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+                self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(path, headers={"If-None-Match": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content)
+        return etag
+
+    def _save_product(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.get(pk=self.product.pk)
+            product.price_per_day += 1
+            product.save()
+
+    def test_getproduct(self):
+        path = f"/v1/getproduct/{self.product.product_id}/"
+        etag = self.assertRevalidates(path)
+        self.assertNotEqual(self.assertRevalidates(f"/v1/getproduct/{self.products[1].product_id}/"), etag)
+
+        self._save_product()
+        response = self.client.get(path, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["data"]["price_per_day"], str(self.product.price_per_day + 1))
+
+    def test_getproducts(self):
+        etag = self.assertRevalidates("/v1/getproducts/")
+        # Each listing variant has its own tag
+        variants = {etag}
+        for query in ("?page=2", "?cursor=", "?min_rating=3", "?include_total=0"):
+            variants.add(self.assertRevalidates(f"/v1/getproducts/{query}"))
+        self.assertEqual(len(variants), 5)
+
+        # A 304 does not read any product
+        with self.assertNumQueries(0):
+            self.client.get("/v1/getproducts/", headers={"If-None-Match": etag})
+
+        # Any product change moves every listing's tag
+        self._save_product()
+        response = self.client.get("/v1/getproducts/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_getbooking(self):
+        path = f"/v1/getbooking/{self.booking.booking_id}/"
+        etag = self.assertRevalidates(path)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(f"/v1/cancelbooking/{self.booking.booking_id}/").status_code, 200)
+        response = self.client.get(path, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(path, headers={"If-None-Match": response["ETag"]}).status_code, 304)
+
+    def test_errors_have_no_etag(self):
+        for path in ("/v1/getproduct/999999/", "/v1/getbooking/999999/"):
+            response = self.client.get(path, headers={"If-None-Match": "*"})
+            self.assertGreaterEqual(response.status_code, 400)
+            self.assertFalse(response.has_header("ETag"))
@@ -0,0 +1,69 @@
+import json
+import os
+from unittest import mock
+from django.test import Client, TestCase
+from core.models import Booking
+from core.testsuite.utils.seed import seed_bookings, seed_catalog
+from utilities.cursorutility import encode_cursor
+
+
+class GetBookingsPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        products = seed_catalog(resellers=1, products_per_reseller=5)
+        # Few customers, so each has several bookings
+        seed_bookings(40, products, customers=3)
+        cls.email = Booking.objects.order_by("booking_id").first().customer_email
+        cls.booking_ids = list(
+            Booking.objects.filter(customer_email=cls.email).order_by("booking_id").values_list("booking_id", flat=True)
+        )
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def _get(self, **params):
+        response = self.client.get(f"/v1/getbookings/{self.email}/", params)
+        if response.streaming:
+            return response.status_code, json.loads(b"".join(response.streaming_content))
+        return response.status_code, response.json()
+
+    def test_without_limit_data_is_every_booking(self):
+        status, body = self._get()
+        self.assertEqual(status, 200)
+        self.assertEqual([item["booking_id"] for item in body["data"]], self.booking_ids)
+
+    def test_cursor_pages_through_every_booking(self):
+        self.assertGreater(len(self.booking_ids), 3)
+        booking_ids, cursor, pages = [], None, 0
+        while True:
+            status, body = self._get(limit=3, **({"cursor": cursor} if cursor else {}))
+            self.assertEqual(status, 200)
+            self.assertEqual(set(body["data"]), {"items", "next_cursor"})
+            self.assertLessEqual(len(body["data"]["items"]), 3)
+            booking_ids += [item["booking_id"] for item in body["data"]["items"]]
+            cursor, pages = body["data"]["next_cursor"], pages + 1
+            if cursor is None:
+                break
+        self.assertEqual(booking_ids, self.booking_ids)
+        self.assertEqual(pages, -(-len(self.booking_ids) // 3))
+
+    def test_a_page_that_ends_on_the_last_booking_has_no_next_cursor(self):
+        _, body = self._get(limit=len(self.booking_ids))
+        self.assertEqual(len(body["data"]["items"]), len(self.booking_ids))
+        self.assertIsNone(body["data"]["next_cursor"])
+
+        _, body = self._get(limit=2, cursor=encode_cursor(self.booking_ids[-1]))
+        self.assertEqual(body["data"], {"items": [], "next_cursor": None})
+
+    def test_limit_is_clamped(self):
+        _, body = self._get(limit=0)
+        self.assertEqual(len(body["data"]["items"]), 1)
+
+    def test_invalid_limit_or_cursor(self):
+        for params in ({"limit": "x"}, {"cursor": "garbage"}, {"cursor": encode_cursor("x")}, {"cursor": encode_cursor(1, 2)}):
+            status, body = self._get(**params)
+            self.assertEqual(status, 400, params)
+            self.assertEqual(body, {"status": "error", "data": "Invalid limit or cursor"})
@@ -0,0 +1,119 @@
+import base64
+import json
+import os
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.test import Client, TestCase
+from core.models import Product
+from core.repository.rating_histogram_repository import RatingHistogramRepository
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.seed import seed_catalog
+from utilities.cursorutility import decode_cursor, encode_cursor
+
+PAGE_SIZE = 25
+
+
+class GetProductsPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # 60 products with many equal ratings, so pages split runs of ties
+        products = seed_catalog(resellers=2, products_per_reseller=30)
+        # An unrated product is never listed
+        Product.objects.filter(pk=products[0].pk).update(rating=None)
+        RatingHistogramRepository.rebuild()
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.clear_local()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def _expected(self, min_rating="0") -> list[int]:
+        return list(
+            Product.objects.filter(rating__gte=Decimal(min_rating)).order_by("-rating", "-product_id")
+            .values_list("product_id", flat=True)
+        )
+
+    def _get(self, **params) -> dict:
+        response = self.client.get("/v1/getproducts/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["data"]
+
+    def _pages(self, **params) -> list[dict]:
+        pages, cursor = [], ""
+        while cursor is not None:
+            pages.append(self._get(cursor=cursor, **params))
+            cursor = pages[-1]["next_cursor"]
+        return pages
+
+    def test_cursor_pages_cover_the_listing_once(self):
+        pages = self._pages()
+        self.assertEqual([len(page["items"]) for page in pages], [PAGE_SIZE, PAGE_SIZE, 9])
+        ids = [item["product_id"] for page in pages for item in page["items"]]
+        self.assertEqual(ids, self._expected())
+
+        # The cursor holds the sort key of the page's last row
+        last = pages[0]["items"][-1]
+        self.assertEqual(decode_cursor(pages[0]["next_cursor"], 2), [last["rating"], str(last["product_id"])])
+
+    def test_cursor_pages_with_min_rating(self):
+        ids = [item["product_id"] for page in self._pages(min_rating="3.5") for item in page["items"]]
+        self.assertEqual(ids, self._expected("3.5"))
+
+    def test_a_new_product_does_not_shift_the_next_page(self):
+        first = self._get(cursor="")
+        with self.captureOnCommitCallbacks(execute=True):
+            added = Product.objects.create(
+                reseller_id=first["items"][0]["reseller_id"], name="Top rated", type="garage",
+                price_per_day=Decimal("10"), rating=Decimal("5.0"),
+            )
+        second = self._get(cursor=first["next_cursor"])
+        # It sorts before the cursor, so the second page neither repeats nor skips a product
+        self.assertEqual(
+            [item["product_id"] for item in first["items"] + second["items"]],
+            [product_id for product_id in self._expected() if product_id != added.product_id][:2 * PAGE_SIZE],
+        )
+
+    def test_legacy_pages_use_the_same_order(self):
+        ids = []
+        for page in (1, 2, 3):
+            data = self._get(page=page)
+            self.assertNotIn("next_cursor", data)
+            ids += [item["product_id"] for item in data["items"]]
+        self.assertEqual(ids, self._expected())
+        self.assertEqual(self._get(page=4)["items"], [])
+        for page in ("0", "-2", "x"):
+            self.assertEqual(self._get(page=page)["items"], self._get(page=1)["items"])
+
+    def test_include_total(self):
+        for params in ({}, {"cursor": ""}, {"page": 3}):
+            with self.subTest(**params):
+                self.assertEqual(self._get(**params)["total"], len(self._expected()))
+                self.assertEqual(self._get(min_rating="3.5", **params)["total"], len(self._expected("3.5")))
+                for value in ("0", "false", "no"):
+                    data = self._get(include_total=value, **params)
+                    self.assertNotIn("total", data)
+                    self.assertTrue(data["items"])
+
+    def test_tampered_cursors_are_rejected(self):
+        def raw(payload: bytes) -> str:
+            return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+        cursors = [
+            "not a cursor!",
+            raw(b"not json"),
+            raw(json.dumps({"rating": "4.0"}).encode()),
+            encode_cursor("4.0"),
+            encode_cursor("4.0", 1, 2),
+            encode_cursor("high", 1),
+            encode_cursor("4.0", "x"),
+            encode_cursor(None, 1),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/v1/getproducts/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"status": "error", "data": "Invalid cursor"})
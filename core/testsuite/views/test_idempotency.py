@@ -0,0 +1,150 @@
+import json
+import os
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import Client, TransactionTestCase
+from django.utils import timezone
+from core.models import Booking, EmailOutbox, IdempotencyKey, Status
+from core.repository.booking_repository import BookingRepository
+from core.repository.idempotency_repository import IdempotencyRepository, digest_idempotency_key
+from core.testsuite.utils.seed import SEED_START, seed_bookings, seed_catalog
+from utilities.metricsutility import registry
+
+
+class IdempotencyKeyTests(TransactionTestCase):
+    def setUp(self):
+        self.products = seed_catalog(resellers=1, products_per_reseller=3)
+        seed_bookings(5, self.products)
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+        self.product = self.products[0]
+        self.booking = Booking.objects.filter(status=Status.Pending.value).first()
+        self.cancel_path = f"/v1/cancelbooking/{self.booking.booking_id}/"
+
+    def _booking_body(self, email="retry@example.com", offset_days=0) -> str:
+        start = SEED_START + timedelta(days=3000 + offset_days)
+        return json.dumps({
+            "product_id": self.product.product_id,
+            "customer_email": email,
+            "reseller_id": self.product.reseller_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=2)).isoformat(),
+            "total_price": str(self.product.price_per_day * 2),
+        })
+
+    def _create(self, key: str, body: str | None = None):
+        return self.client.post(
+            "/v1/createbooking/", body or self._booking_body(), content_type="application/json",
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retries_get_the_stored_response(self):
+        first = self._create("create-1")
+        self.assertEqual(first.status_code, 201)
+        self.assertFalse(first.has_header("Idempotent-Replayed"))
+
+        with self.assertNumQueries(1):
+            retry = self._create("create-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.filter(customer_email="retry@example.com").count(), 1)
+        self.assertEqual(EmailOutbox.objects.filter(to_email="retry@example.com").count(), 1)
+        self.assertIn('idempotent_replays_total{route="v1/createbooking/"}', registry.render())
+
+    def test_requests_without_a_key_are_not_deduplicated(self):
+        body = self._booking_body()
+        self.client.post("/v1/createbooking/", body, content_type="application/json")
+        # The same window again: the overlap check rejects it rather than a replay
+        response = self.client.post("/v1/createbooking/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(IdempotencyKey.objects.count(), 0)
+
+    def test_errors_below_500_are_stored_too(self):
+        self._create("taken", self._booking_body(email="first@example.com"))
+        conflict = self._create("conflict", self._booking_body(email="second@example.com"))
+        self.assertEqual(conflict.status_code, 409)
+        replay = self._create("conflict", self._booking_body(email="second@example.com"))
+        self.assertEqual((replay.status_code, replay["Idempotent-Replayed"]), (409, "true"))
+
+    def test_a_key_reused_for_another_request_is_rejected(self):
+        self._create("reused")
+        response = self._create("reused", self._booking_body(offset_days=10))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()["status"], "error")
+        # The path is part of the request too
+        response = self.client.post(self.cancel_path, headers={"Idempotency-Key": "reused"})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.get(pk=self.booking.booking_id).status, Status.Pending.value)
+
+    def test_invalid_keys(self):
+        for key in ("", "k" * 256):
+            response = self._create(key)
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.filter(customer_email="retry@example.com").exists())
+
+    def test_the_response_is_stored_in_the_request_transaction(self):
+        # A failure to store the response rolls back the cancellation too, so a retry runs it
+        with mock.patch.object(IdempotencyRepository, "complete", side_effect=RuntimeError("lost")):
+            client = Client(HTTP_X_API_KEY="test-key", raise_request_exception=False)
+            response = client.post(self.cancel_path, headers={"Idempotency-Key": "cancel-1"})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(IdempotencyKey.objects.count(), 0)
+        self.assertEqual(Booking.objects.get(pk=self.booking.booking_id).status, Status.Pending.value)
+        self.assertEqual(EmailOutbox.objects.filter(kind="cancellation").count(), 0)
+
+        response = self.client.post(self.cancel_path, headers={"Idempotency-Key": "cancel-1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(Booking.objects.get(pk=self.booking.booking_id).status, Status.Cancelled.value)
+
+    def test_database_errors_are_not_stored(self):
+        # E.g. a lock wait timeout inside the service's transaction: a 500 the retry can fix
+        client = Client(HTTP_X_API_KEY="test-key", raise_request_exception=False)
+        with mock.patch.object(BookingRepository, "create_booking", side_effect=OperationalError("Lock wait timeout")):
+            response = client.post(
+                "/v1/createbooking/", self._booking_body(), content_type="application/json",
+                headers={"Idempotency-Key": "transient"},
+            )
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(IdempotencyKey.objects.count(), 0)
+
+        response = self._create("transient")
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(Booking.objects.filter(customer_email="retry@example.com").count(), 1)
+
+    def test_a_duplicate_that_loses_the_insert_race_replays_the_winner(self):
+        first = self._create("raced")
+        # As if the duplicate read the key before the first request committed it
+        get = IdempotencyRepository.get
+        with mock.patch.object(IdempotencyRepository, "get", side_effect=[None, get(digest_idempotency_key("raced"))]):
+            duplicate = self._create("raced")
+        self.assertEqual((duplicate.status_code, duplicate.content), (201, first.content))
+        self.assertEqual(duplicate["Idempotent-Replayed"], "true")
+        self.assertEqual(Booking.objects.filter(customer_email="retry@example.com").count(), 1)
+
+    def test_expired_keys_run_again_and_are_purged(self):
+        self._create("old", self._booking_body(email="old@example.com"))
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self._create("old", self._booking_body(email="old@example.com", offset_days=10))
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(Booking.objects.filter(customer_email="old@example.com").count(), 2)
+
+        for i in range(5):
+            self._create(f"purge-{i}", self._booking_body(email="purge@example.com", offset_days=20 + 10 * i))
+        IdempotencyKey.objects.exclude(key_digest=digest_idempotency_key("purge-4")).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        out = StringIO()
+        call_command("purge_idempotency_keys", "--batch-size", "2", stdout=out)
+        self.assertIn("Idempotency keys purged: 5 in 3 batch(es).", out.getvalue())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key_digest", flat=True)), [digest_idempotency_key("purge-4")]
+        )
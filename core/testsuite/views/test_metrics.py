@@ -0,0 +1,205 @@
+import atexit
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import mock
+from django.test import Client, SimpleTestCase, override_settings
+from utilities import metricsutility
+from utilities.metricsutility import EXITED_FILE, MetricsRegistry, registry
+
+
+class MetricsTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        patch = override_settings(METRICS_DIR=self.directory, METRICS_FLUSH_SECONDS=0)
+        patch.enable()
+        self.addCleanup(patch.disable)
+
+    def _registry(self) -> MetricsRegistry:
+        metrics = MetricsRegistry()
+        atexit.unregister(metrics.flush)
+        metrics.describe("jobs_total", "counter", "Jobs run.")
+        metrics.describe("busy", "gauge", "Busy workers.")
+        metrics.describe("job_seconds", "histogram", "Job time.", buckets=(0.1, 1.0))
+        return metrics
+
+    def _process_file(self, pid: int, counters=(), gauges=(), histograms=()):
+        """The snapshot file another worker would have written."""
+        with open(os.path.join(self.directory, f"metrics-{pid}-1.json"), "w") as f:
+            json.dump({"counters": list(counters), "gauges": list(gauges), "histograms": list(histograms)}, f)
+
+
+class MetricsRegistryTests(MetricsTestCase):
+    def test_render(self):
+        metrics = self._registry()
+        metrics.inc("jobs_total", {"kind": "email"})
+        metrics.inc("jobs_total", {"kind": "email"}, amount=2)
+        metrics.set_gauge("busy", 3)
+        metrics.observe("job_seconds", 0.05)
+        metrics.observe("job_seconds", 0.5)
+        metrics.observe("job_seconds", 5)
+        self.assertEqual(metrics.render(), "\n".join([
+            "# HELP busy Busy workers.",
+            "# TYPE busy gauge",
+            "busy 3",
+            "# HELP job_seconds Job time.",
+            "# TYPE job_seconds histogram",
+            'job_seconds_bucket{le="0.1"} 1',
+            'job_seconds_bucket{le="1"} 2',
+            'job_seconds_bucket{le="+Inf"} 3',
+            "job_seconds_sum 5.55",
+            "job_seconds_count 3",
+            "# HELP jobs_total Jobs run.",
+            "# TYPE jobs_total counter",
+            'jobs_total{kind="email"} 3',
+        ]) + "\n")
+
+    def test_label_values_are_escaped(self):
+        metrics = self._registry()
+        metrics.inc("jobs_total", {"kind": 'a"b\\c\nd'})
+        self.assertIn('jobs_total{kind="a\\"b\\\\c\\nd"} 1', metrics.render())
+
+    def test_processes_are_merged(self):
+        metrics = self._registry()
+        metrics.inc("jobs_total", {"kind": "email"}, amount=2)
+        metrics.set_gauge("busy", 1)
+        metrics.observe("job_seconds", 0.5)
+        other = os.getppid()
+        self._process_file(
+            other,
+            counters=[["jobs_total", [["kind", "email"]], 5]],
+            gauges=[["busy", [], 2]],
+            histograms=[["job_seconds", [], [1, 0, 0], 0.05, 1]],
+        )
+        collected = metrics.collect()
+        self.assertEqual(collected["counter"][("jobs_total", (("kind", "email"),))], 7)
+        self.assertEqual(collected["gauge"][("busy", ())], 3)
+        self.assertEqual(collected["histogram"][("job_seconds", ())], [[1, 1, 0], 0.55, 2])
+
+    def test_exited_processes_keep_their_counters_but_not_their_gauges(self):
+        metrics = self._registry()
+        metrics.inc("jobs_total", amount=1)
+        self._process_file(
+            999_999,
+            counters=[["jobs_total", [], 5]],
+            gauges=[["busy", [], 4]],
+            histograms=[["job_seconds", [], [0, 1, 0], 0.5, 1]],
+        )
+        with mock.patch.object(metricsutility, "_pid_alive", return_value=False):
+            collected = metrics.collect()
+        self.assertEqual(collected["counter"][("jobs_total", ())], 6)
+        self.assertEqual(collected["histogram"][("job_seconds", ())], [[0, 1, 0], 0.5, 1])
+        self.assertNotIn(("busy", ()), collected["gauge"])
+
+        # The file was folded into the exited totals and deleted, so it is counted once
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "metrics-999999-1.json")))
+        self.assertEqual(metrics.collect()["counter"][("jobs_total", ())], 6)
+
+        # Counters stay monotonic as more workers exit
+        self._process_file(999_998, counters=[["jobs_total", [], 2]])
+        with mock.patch.object(metricsutility, "_pid_alive", return_value=False):
+            self.assertEqual(metrics.collect()["counter"][("jobs_total", ())], 8)
+
+    def test_a_file_left_under_a_reused_pid_is_folded(self):
+        exited = self._registry()
+        exited.inc("jobs_total", amount=5)
+        exited.set_gauge("busy", 1)
+        exited.flush()
+
+        # A new worker with the same pid: its first write folds the old file
+        restarted = self._registry()
+        restarted.inc("jobs_total", amount=1)
+        self.assertEqual(len([f for f in os.listdir(self.directory) if f.startswith("metrics-")]), 1)
+        collected = restarted.collect()
+        self.assertEqual(collected["counter"][("jobs_total", ())], 6)
+        self.assertNotIn(("busy", ()), collected["gauge"])
+
+    def test_a_file_that_was_folded_but_not_deleted_is_not_counted_twice(self):
+        metrics = self._registry()
+        metrics.flush()
+        self._process_file(999_999, counters=[["jobs_total", [], 5]])
+        with open(os.path.join(self.directory, EXITED_FILE), "w") as f:
+            json.dump({"counters": [["jobs_total", [], 5]], "histograms": [], "folded": ["metrics-999999-1.json"]}, f)
+        with mock.patch.object(metricsutility, "_pid_alive", return_value=False):
+            self.assertEqual(metrics.collect()["counter"][("jobs_total", ())], 5)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "metrics-999999-1.json")))
+
+    def test_the_last_updates_of_an_idle_worker_are_written(self):
+        context = multiprocessing.get_context("fork")
+        recorded, done = context.Event(), context.Event()
+
+        def worker():
+            metrics = self._registry()
+            # The first update is written at once, the rest fall inside the flush window
+            for _ in range(3):
+                metrics.inc("jobs_total")
+                metrics.observe("job_seconds", 0.5)
+            recorded.set()
+            # Idle, but alive: its file is read as a live worker's
+            done.wait(10)
+
+        with override_settings(METRICS_FLUSH_SECONDS=0.2):
+            process = context.Process(target=worker)
+            process.start()
+            self.addCleanup(process.join)
+            self.addCleanup(done.set)
+            self.assertTrue(recorded.wait(10))
+            time.sleep(0.5)
+            collected = self._registry().collect()
+        self.assertEqual(collected["counter"][("jobs_total", ())], 3)
+        self.assertEqual(collected["histogram"][("job_seconds", ())][2], 3)
+
+    def test_gauge_changes_are_written_at_once(self):
+        with override_settings(METRICS_FLUSH_SECONDS=60):
+            metrics = self._registry()
+            metrics.inc("jobs_total")
+            metrics.set_gauge("busy", 1)
+            metrics.set_gauge("busy", 0)
+            metrics.inc("jobs_total")
+        path = os.path.join(self.directory, metrics._filename)
+        with open(path) as f:
+            snapshot = json.load(f)
+        self.assertEqual(snapshot["gauges"], [["busy", [], 0]])
+        # Written with the gauge; the counter update after it waits for the window
+        self.assertEqual(snapshot["counters"], [["jobs_total", [], 1]])
+
+    def test_an_unwritable_directory_does_not_raise(self):
+        with override_settings(METRICS_DIR="/proc/roosh-metrics"):
+            metrics = self._registry()
+            metrics.inc("jobs_total")
+            self.assertEqual(metrics.collect()["counter"], {})
+
+
+class MetricsEndpointTests(MetricsTestCase):
+    def setUp(self):
+        super().setUp()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def _value(self, text: str, series: str) -> int:
+        for line in text.splitlines():
+            if line.startswith(series + " "):
+                return int(line.rsplit(" ", 1)[1])
+        return 0
+
+    def test_requests_are_counted_per_route(self):
+        before = registry.render()
+        health = 'http_requests_total{method="GET",route="v1/health/",status="200"}'
+        unmatched = 'http_requests_total{method="GET",route="unmatched",status="401"}'
+
+        self.client.get("/v1/health/")
+        Client().get("/v1/health/")
+        response = self.client.get("/v1/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        text = response.content.decode()
+        self.assertEqual(self._value(text, health), self._value(before, health) + 1)
+        self.assertEqual(self._value(text, unmatched), self._value(before, unmatched) + 1)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="v1/health/"}', text)
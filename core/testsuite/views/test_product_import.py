@@ -0,0 +1,130 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from core.models import Product
+from core.service.product_import_service import ProductImportService
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.seed import seed_catalog
+
+
+class ProductImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reseller_id = seed_catalog(resellers=1, products_per_reseller=1)[0].reseller_id
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.clear_local()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def _row(self, name: str, **fields) -> dict:
+        return {"reseller_id": self.reseller_id, "name": name, "type": "garage", "price_per_day": "12.50",
+                "rating": "4.5", **fields}
+
+    def _ndjson(self, *rows) -> bytes:
+        return b"".join(row if isinstance(row, bytes) else json.dumps(row).encode() + b"\n" for row in rows)
+
+    def _import(self, body: bytes, content_type="application/x-ndjson"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/v1/importproducts/", body, content_type=content_type)
+
+    def test_ndjson(self):
+        response = self._import(self._ndjson(self._row("Imported A"), self._row("Imported B", rating=None)))
+        self.assertEqual(response.status_code, 201)
+        data = response.json()["data"]
+        self.assertEqual((data["received"], data["created"], data["rejected_count"]), (2, 2, 0))
+        product = Product.objects.get(name="Imported B")
+        self.assertEqual((str(product.price_per_day), product.rating), ("12.50", None))
+
+    def test_csv(self):
+        body = (
+            "reseller_id,name,type,price_per_day,rating\n"
+            f"{self.reseller_id},Imported CSV,garage,10,\n"
+            f'{self.reseller_id},"Quoted, name",garage,11.5,3\n'
+        ).encode()
+        response = self._import(body, "text/csv")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["data"]["created"], 2)
+        self.assertTrue(Product.objects.filter(name="Quoted, name", rating=3).exists())
+
+    def test_csv_without_required_columns_is_rejected_before_any_write(self):
+        response = self._import(b"name,type\nA,garage\n", "text/csv")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("reseller_id", response.json()["data"])
+
+    def test_invalid_rows_are_reported_and_the_rest_imported(self):
+        response = self._import(self._ndjson(
+            self._row("Good"),
+            b"{not json}\n",
+            b"\n",
+            self._row("Bad price", price_per_day="-1"),
+            self._row("Bad reseller", reseller_id=999999),
+            self._row("Bad rating", rating="6"),
+        ))
+        self.assertEqual(response.status_code, 201)
+        data = response.json()["data"]
+        self.assertEqual((data["received"], data["created"], data["rejected_count"]), (5, 1, 4))
+        self.assertEqual([r["line"] for r in data["rejected"]], [2, 4, 5, 6])
+        self.assertIn("Invalid JSON", data["rejected"][0]["error"])
+        self.assertFalse(data["rejected_truncated"])
+
+    def test_a_bad_line_in_the_middle_of_the_stream_is_only_that_line(self):
+        before = catalog_cache.generation()
+        body = self._ndjson(self._row("First"), b'{"name": "\xff\xfe"}\n', self._row("Last"))
+        with mock.patch.object(ProductImportService, "CHUNK_SIZE", 1):
+            response = self._import(body)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()["data"]
+        self.assertEqual((data["created"], data["rejected_count"]), (2, 1))
+        self.assertEqual(data["rejected"][0]["line"], 2)
+        self.assertIn("Invalid UTF-8", data["rejected"][0]["error"])
+        self.assertNotEqual(catalog_cache.generation(), before)
+
+        body = (
+            "reseller_id,name,type,price_per_day,rating\n"
+            f"{self.reseller_id},CSV first,garage,10,\n"
+            f"{self.reseller_id},Bad \xff,garage,10,\n"
+        ).encode("latin-1") + (
+            # Over csv.field_size_limit()
+            f"{self.reseller_id},{'x' * 200_000},garage,10,\n{self.reseller_id},CSV last,garage,10,\n"
+        ).encode()
+        response = self._import(body, "text/csv")
+        data = response.json()["data"]
+        self.assertEqual((data["created"], data["rejected_count"]), (2, 2))
+        self.assertEqual([r["line"] for r in data["rejected"]], [3, 4])
+        self.assertIn("Invalid CSV", data["rejected"][1]["error"])
+
+    def test_the_catalog_is_invalidated_when_an_import_fails_halfway(self):
+        before = catalog_cache.generation()
+        write_chunk = ProductImportService._write_chunk
+
+        def fail_on_second_chunk(products):
+            if Product.objects.filter(name="Chunk 0").exists():
+                raise RuntimeError("database went away")
+            write_chunk(products)
+
+        rows = [(n, self._row(f"Chunk {n}")) for n in range(2)]
+        with mock.patch.object(ProductImportService, "_write_chunk", side_effect=fail_on_second_chunk):
+            with self.captureOnCommitCallbacks(execute=True), self.assertRaises(RuntimeError):
+                ProductImportService.import_rows(iter(rows), chunk_size=1)
+        self.assertTrue(Product.objects.filter(name="Chunk 0").exists())
+        self.assertNotEqual(catalog_cache.generation(), before)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("wb", suffix=".ndjson", delete=False) as handle:
+            handle.write(self._ndjson(self._row("From file"), b"\xff\n"))
+        self.addCleanup(os.unlink, handle.name)
+        out, err = StringIO(), StringIO()
+        call_command("import_products", handle.name, "--chunk-size", "1", stdout=out, stderr=err)
+        summary = json.loads(out.getvalue())
+        self.assertEqual((summary["created"], summary["rejected_count"]), (1, 1))
+        self.assertIn("line 2: Invalid UTF-8", err.getvalue())
+        self.assertTrue(Product.objects.filter(name="From file").exists())
@@ -0,0 +1,132 @@
+import os
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.test import Client, TestCase
+from core.models import Product, Reseller
+from core.service.product_service import catalog_cache
+
+
+class ProductSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        resellers = Reseller.objects.bulk_create([Reseller(name="North"), Reseller(name="South")])
+        rows = [
+            (resellers[0], "Airport Garage", "garage", "30.00", "4.5"),
+            (resellers[0], "airport valet", "valet", "45.00", "4.9"),
+            (resellers[0], "City Parking", "parking_space", "12.00", "3.1"),
+            (resellers[1], "Airport Parking", "parking_space", "18.00", None),
+            (resellers[1], "Harbour Garage", "garage", "22.00", "4.5"),
+            (resellers[1], "Airside Garage", "garage", "26.00", "2.0"),
+        ]
+        Product.objects.bulk_create([
+            Product(reseller=reseller, name=name, type=type, price_per_day=Decimal(price),
+                    rating=Decimal(rating) if rating else None)
+            for reseller, name, type, price, rating in rows
+        ])
+        cls.resellers = resellers
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache.clear_local()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def _search(self, **params):
+        response = self.client.get("/v1/searchproducts/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["data"]
+
+    def _names(self, **params):
+        return [item["name"] for item in self._search(**params)["items"]]
+
+    def test_defaults_to_rating_order_with_unrated_products_last(self):
+        self.assertEqual(self._names(), [
+            "airport valet", "Harbour Garage", "Airport Garage", "City Parking", "Airside Garage", "Airport Parking",
+        ])
+        self.assertEqual(self._names(sort="rating"), [
+            "Airside Garage", "City Parking", "Airport Garage", "Harbour Garage", "airport valet", "Airport Parking",
+        ])
+        # min_rating leaves them out
+        self.assertNotIn("Airport Parking", self._names(min_rating="0"))
+
+    def test_cursor_pages_through_the_unrated_products(self):
+        Product.objects.bulk_create([
+            Product(reseller=self.resellers[0], name=f"Unrated {n}", type="garage", price_per_day=Decimal("10.00"))
+            for n in range(3)
+        ])
+        for sort in ("rating", "-rating"):
+            names, cursor = [], None
+            while True:
+                data = self._search(sort=sort, limit=4, **({"cursor": cursor} if cursor else {}))
+                names += [item["name"] for item in data["items"]]
+                cursor = data["next_cursor"]
+                if cursor is None:
+                    break
+            unrated = ["Airport Parking", "Unrated 0", "Unrated 1", "Unrated 2"]
+            self.assertEqual(names[5:], unrated if sort == "rating" else unrated[::-1], sort)
+
+    def test_name_prefixes_match_by_code_point(self):
+        Product.objects.bulk_create([
+            Product(reseller=self.resellers[0], name=name, type="garage", price_per_day=Decimal("10.00"))
+            for name in ("Café Parking", "Cafe Garage", "Caff Lot", "\U0010ffff Lot")
+        ])
+        self.assertEqual(self._names(q="café"), ["Café Parking"])
+        self.assertEqual(self._names(q="cafe"), ["Cafe Garage"])
+        # Sorted by code point: "é" comes after "f"
+        self.assertEqual(self._names(q="caf"), ["Cafe Garage", "Caff Lot", "Café Parking"])
+        self.assertEqual(self._names(q="\U0010ffff"), ["\U0010ffff Lot"])
+
+    def test_filters(self):
+        self.assertEqual(self._names(type="garage", sort="price"), ["Harbour Garage", "Airside Garage", "Airport Garage"])
+        self.assertEqual(
+            self._names(reseller_id=self.resellers[1].id, min_price="20", max_price="30", sort="-price"),
+            ["Airside Garage", "Harbour Garage"],
+        )
+        self.assertEqual(self._names(min_rating="4.5", sort="name"), ["Airport Garage", "airport valet", "Harbour Garage"])
+
+    def test_name_prefix_is_case_insensitive_and_sorts_by_name(self):
+        self.assertEqual(self._names(q="AIRPORT"), ["Airport Garage", "Airport Parking", "airport valet"])
+        self.assertEqual(self._names(q="air", sort="-price"), [
+            "airport valet", "Airport Garage", "Airside Garage", "Airport Parking",
+        ])
+        self.assertEqual(self._names(q="airport ", type="garage"), ["Airport Garage"])
+
+    def test_cursor_pages_through_every_sort(self):
+        for sort in ("price", "-price", "rating", "-rating", "name", "-name"):
+            expected = self._names(sort=sort, limit=100)
+            names, cursor = [], None
+            while True:
+                data = self._search(sort=sort, limit=2, **({"cursor": cursor} if cursor else {}))
+                names += [item["name"] for item in data["items"]]
+                cursor = data["next_cursor"]
+                if cursor is None:
+                    break
+            self.assertEqual(names, expected, sort)
+
+    def test_etag_changes_with_the_catalog(self):
+        first = self.client.get("/v1/searchproducts/", {"type": "garage"})
+        self.assertEqual(self.client.get("/v1/searchproducts/", {"type": "garage"}, HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        # The catalog generation is bumped on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(reseller=self.resellers[0], name="New Garage", type="garage",
+                                   price_per_day=Decimal("10.00"), rating=Decimal("5.0"))
+        self.assertNotEqual(self.client.get("/v1/searchproducts/", {"type": "garage"})["ETag"], first["ETag"])
+
+    def test_invalid_parameters(self):
+        for params, message in (
+            ({"sort": "updated_at"}, "sort must be one of price, rating, name, optionally prefixed with -"),
+            ({"min_price": "cheap"}, "min_price must be a number"),
+            ({"max_price": "-1"}, "max_price must be a non-negative number"),
+            ({"reseller_id": "x"}, "reseller_id must be an integer"),
+            ({"limit": "0"}, "limit must be between 1 and 100"),
+            ({"cursor": "garbage"}, "Invalid cursor"),
+        ):
+            response = self.client.get("/v1/searchproducts/", params)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {"status": "error", "data": message})
+
+        cursor = self._search(sort="price", limit=1)["next_cursor"]
+        self.assertEqual(self.client.get("/v1/searchproducts/", {"sort": "name", "cursor": cursor}).status_code, 400)
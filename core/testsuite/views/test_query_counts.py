@@ -0,0 +1,179 @@
+import json
+import os
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TransactionTestCase, override_settings
+from core.models import Booking, Status
+from core.service.product_service import catalog_cache
+from core.testsuite.utils.seed import SEED_START, seed_bookings, seed_catalog
+from utilities.querycountutility import QueryBudgetExceeded, statement_shape
+
+
+@override_settings(BOOKING_VERIFY_PRICE=True)
+class EndpointQueryCountTests(TransactionTestCase):
+    """
+    Pins the number of queries each endpoint runs (read from the X-DB-Queries header).
+    TransactionTestCase, so transactions open and commit as they do in production
+    (SQLite adds one BEGIN statement per write transaction). Price verification is on,
+    so the booking counts include its price query.
+    If a change adds a query on purpose, update the count here and the view's @query_budget.
+    """
+
+    def setUp(self):
+        self.products = seed_catalog(resellers=2, products_per_reseller=5)
+        seed_bookings(50, self.products)
+        cache.clear()
+        catalog_cache.clear_local()
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+        self.product = self.products[0]
+        self.booking = Booking.objects.filter(status=Status.Pending.value).first()
+        self.start = SEED_START + timedelta(days=3000)
+
+    def assertQueries(self, expected: int, response):
+        self.assertLess(response.status_code, 400, response)
+        self.assertEqual(int(response["X-DB-Queries"]), expected)
+
+    @override_settings(QUERY_LOG=True)
+    def assertStreamedQueries(self, expected: int, response):
+        # Streamed responses are counted when the stream ends, so read the log line
+        self.assertTrue(response.streaming)
+        with self.assertLogs("core.queries", "INFO") as logs:
+            b"".join(response.streaming_content)
+        self.assertEqual(json.loads(logs.records[-1].getMessage())["queries"], expected)
+
+    def _booking_body(self, offset_days: int = 0) -> dict:
+        start = self.start + timedelta(days=offset_days)
+        return {
+            "product_id": self.product.product_id,
+            "customer_email": "pinned@example.com",
+            "reseller_id": self.product.reseller_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=2)).isoformat(),
+            "total_price": str(self.product.price_per_day * 2),
+        }
+
+    def _post(self, path: str, body, content_type: str = "application/json"):
+        return self.client.post(path, body if isinstance(body, str) else json.dumps(body), content_type=content_type)
+
+    def test_health(self):
+        self.assertQueries(0, self.client.get("/v1/health/"))
+
+    def test_getproducts(self):
+        # Histogram count and one page; then both come from the catalog cache
+        self.assertQueries(2, self.client.get("/v1/getproducts/"))
+        self.assertQueries(0, self.client.get("/v1/getproducts/"))
+        self.assertQueries(1, self.client.get("/v1/getproducts/?cursor=&include_total=0"))
+
+    def test_getproduct(self):
+        self.assertQueries(1, self.client.get(f"/v1/getproduct/{self.product.product_id}/"))
+        self.assertQueries(0, self.client.get(f"/v1/getproduct/{self.product.product_id}/"))
+
+    def test_searchproducts(self):
+        # One page query, then the page comes from the catalog cache
+        self.assertQueries(1, self.client.get("/v1/searchproducts/?type=garage&min_price=20&sort=name"))
+        self.assertQueries(0, self.client.get("/v1/searchproducts/?type=garage&min_price=20&sort=name"))
+        # A rating sort whose page runs into the unrated products reads them separately
+        self.assertQueries(2, self.client.get("/v1/searchproducts/?type=garage&sort=-rating&limit=100"))
+
+    def test_productfacets(self):
+        self.assertQueries(1, self.client.get("/v1/productfacets/"))
+        self.assertQueries(0, self.client.get("/v1/productfacets/"))
+
+    def test_createproduct(self):
+        # BEGIN, INSERT, histogram UPDATE, facet INSERT (ignored if present), one facet UPDATE
+        # for the type and one for the reseller
+        self.assertQueries(6, self._post("/v1/createproduct/", {
+            "reseller_id": self.product.reseller_id, "name": "New", "type": "garage",
+            "price_per_day": "10.00", "rating": "4.0",
+        }))
+
+    def test_importproducts(self):
+        rows = "\n".join(json.dumps({
+            "reseller_id": self.product.reseller_id, "name": f"Imported {i}", "type": "garage",
+            "price_per_day": "10.00", "rating": "4.0",
+        }) for i in range(25))
+        # Reseller ids, then BEGIN, bulk INSERT, histogram UPDATE, facet INSERT and one facet
+        # UPDATE per type and reseller in the chunk
+        self.assertQueries(7, self._post("/v1/importproducts/", rows, "application/x-ndjson"))
+
+    def test_createbooking(self):
+        # Price check; BEGIN, product lock, overlap check, INSERT, rollup upsert; product and
+        # reseller for the email; outbox INSERT
+        self.assertQueries(9, self._post("/v1/createbooking/", self._booking_body()))
+
+    def test_createbookings(self):
+        # The same number of queries for any batch size: BEGIN, product lock (the locked
+        # rows also price the items), overlap range read, INSERT, rollup upsert, resellers
+        # for the emails, outbox INSERT
+        for size in (1, 20):
+            body = [self._booking_body(offset_days=10 * (i + 1) + 1000 * size) for i in range(size)]
+            self.assertQueries(7, self._post("/v1/createbookings/", body))
+
+    def test_cancelbooking(self):
+        # BEGIN, locked read, UPDATE, rollup upsert, reseller for the email, outbox INSERT
+        self.assertQueries(6, self.client.post(f"/v1/cancelbooking/{self.booking.booking_id}/"))
+
+    def test_cancelbooking_by_token(self):
+        # The same statements as by id, locked through the token digest
+        self.assertQueries(6, self.client.post(f"/v1/cancelbooking/token/{self.booking.access_token}/"))
+
+    def test_idempotency_keys(self):
+        # Five more than without a key: the key lookup, then the key INSERT and the response
+        # UPDATE in the view's transaction, where the service's transaction becomes a
+        # SAVEPOINT and its RELEASE
+        keyed = {"headers": {"Idempotency-Key": "pinned"}}
+        body = json.dumps(self._booking_body())
+        self.assertQueries(14, self.client.post("/v1/createbooking/", body, content_type="application/json", **keyed))
+        # A retry only reads the key
+        self.assertQueries(1, self.client.post("/v1/createbooking/", body, content_type="application/json", **keyed))
+        path = f"/v1/cancelbooking/{self.booking.booking_id}/"
+        self.assertQueries(11, self.client.post(path, headers={"Idempotency-Key": "cancel"}))
+        body = json.dumps([self._booking_body(offset_days=10 * (i + 1)) for i in range(20)])
+        self.assertQueries(12, self.client.post(
+            "/v1/createbookings/", body, content_type="application/json", headers={"Idempotency-Key": "batch"},
+        ))
+
+    def test_getbookings_runs_one_query_per_batch(self):
+        self.assertStreamedQueries(1, self.client.get(f"/v1/getbookings/{self.booking.customer_email}/"))
+        # A full page needs the extra row to know there is a next one
+        self.assertStreamedQueries(1, self.client.get(f"/v1/getbookings/{self.booking.customer_email}/?limit=1"))
+
+    def test_getbooking(self):
+        self.assertQueries(1, self.client.get(f"/v1/getbooking/{self.booking.booking_id}/"))
+
+    def test_getbooking_by_token(self):
+        self.assertQueries(1, self.client.get(f"/v1/getbooking/token/{self.booking.access_token}/"))
+
+    def test_resellerreport(self):
+        self.assertQueries(1, self.client.get(
+            f"/v1/resellerreport/{self.booking.reseller_id}/?from=2025-01-01&to=2025-12-31"
+        ))
+
+    def test_quote(self):
+        items = [{
+            "product_id": product.product_id,
+            "start_date": self.start.isoformat(),
+            "end_date": (self.start + timedelta(days=2)).isoformat(),
+        } for product in self.products]
+        self.assertQueries(1, self._post("/v1/quote/", {"items": items}))
+
+    def test_cachestats_and_metrics(self):
+        self.assertQueries(0, self.client.get("/v1/cachestats/"))
+        self.assertQueries(0, self.client.get("/v1/metrics/"))
+
+    @override_settings(QUERY_BUDGETS={"v1/getbooking/<int:booking_id>/": 0})
+    def test_exceeding_a_budget_fails(self):
+        with self.assertLogs("core.queries", "WARNING"), self.assertRaises(QueryBudgetExceeded):
+            self.client.get(f"/v1/getbooking/{self.booking.booking_id}/")
+
+
+class StatementShapeTests(SimpleTestCase):
+    def test_literals_and_in_lists_collapse(self):
+        self.assertEqual(
+            statement_shape("SELECT * FROM t WHERE id = 5 AND name = 'x' AND k IN (%s, %s, %s)"),
+            statement_shape("SELECT * FROM t WHERE id = 7 AND name = 'y' AND k IN (%s)"),
+        )
@@ -0,0 +1,122 @@
+import json
+import os
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from core.dto.booking_dto import BookingDTO
+from core.dto.quote_dto import QuoteItemDTO
+from core.models import Booking
+from core.service.quote_service import QuoteService
+from core.testsuite.utils.seed import SEED_START, seed_catalog
+
+
+class BillableDaysTests(SimpleTestCase):
+    def _days(self, **delta) -> int:
+        return QuoteService.billable_days(QuoteItemDTO(1, SEED_START, SEED_START + timedelta(**delta)))
+
+    def test_every_started_day_is_billed(self):
+        self.assertEqual(self._days(seconds=1), 1)
+        self.assertEqual(self._days(days=1), 1)
+        self.assertEqual(self._days(days=1, seconds=1), 2)
+        self.assertEqual(self._days(days=1, microseconds=1), 2)
+        self.assertEqual(self._days(days=2, hours=23), 3)
+
+    def test_empty_and_negative_ranges_are_rejected(self):
+        for delta in ({"seconds": 0}, {"days": -1}):
+            with self.assertRaisesMessage(ValueError, "end_date must be after start_date"):
+                self._days(**delta)
+
+
+class QuoteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = seed_catalog(resellers=1, products_per_reseller=1)[0]
+        cls.product.price_per_day = Decimal("12.35")
+        cls.product.save()
+
+    def setUp(self):
+        env = mock.patch.dict(os.environ, {"API_KEY": "test-key"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = Client(HTTP_X_API_KEY="test-key")
+
+    def _item(self, product_id=None, **delta) -> dict:
+        return {
+            "product_id": self.product.product_id if product_id is None else product_id,
+            "start_date": SEED_START.isoformat(),
+            "end_date": (SEED_START + timedelta(**delta)).isoformat(),
+        }
+
+    def _dto(self, total_price: str, **delta) -> BookingDTO:
+        return BookingDTO(self.product.product_id, "quote@example.com", self.product.reseller_id,
+                          SEED_START, SEED_START + timedelta(**delta), Decimal(total_price))
+
+    def test_quote(self):
+        response = self.client.post("/v1/quote/", json.dumps({"items": [
+            self._item(days=2),
+            self._item(product_id=999999, days=1),
+            {"product_id": "x"},
+            self._item(days=0),
+            self._item(days=1, hours=1),
+        ]}), content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        items = response.json()["data"]["items"]
+        self.assertEqual(items[0], {
+            "product_id": self.product.product_id, "days": 2, "price_per_day": "12.35", "total_price": "24.70",
+        })
+        self.assertEqual(items[1], {"product_id": 999999, "error": "Product not found"})
+        self.assertIn("error", items[2])
+        self.assertEqual(items[3], {"error": "end_date must be after start_date"})
+        self.assertEqual((items[4]["days"], items[4]["total_price"]), (2, "24.70"))
+
+    def test_quote_rejects_bad_requests(self):
+        for body, message in [
+            ("{", "Invalid JSON"),
+            (json.dumps({"items": {}}), "items must be a list"),
+            (json.dumps({"items": [self._item(days=1)] * (QuoteService.MAX_ITEMS + 1)}), "At most 500"),
+        ]:
+            response = self.client.post("/v1/quote/", body, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(message, response.json()["data"])
+        self.assertEqual(self.client.get("/v1/quote/").status_code, 400)
+
+    def test_check_totals(self):
+        dtos = [
+            self._dto("24.70", days=2),
+            self._dto("24.69", days=2),
+            self._dto("12.35", days=1, seconds=1),
+            self._dto("0", days=0),
+        ]
+        self.assertEqual(QuoteService.check_totals(dtos), [
+            None,
+            "total_price does not match the quoted price of 24.70",
+            "total_price does not match the quoted price of 24.70",
+            "end_date must be after start_date",
+        ])
+        dtos[0].product_id = 999999
+        self.assertEqual(QuoteService.check_totals(dtos[:1]), ["Product not found"])
+
+    def _create(self, total_price: str):
+        start = SEED_START + timedelta(days=3000)
+        return self.client.post("/v1/createbooking/", json.dumps({
+            "product_id": self.product.product_id,
+            "customer_email": "quote@example.com",
+            "reseller_id": self.product.reseller_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=2)).isoformat(),
+            "total_price": total_price,
+        }), content_type="application/json")
+
+    @override_settings(BOOKING_VERIFY_PRICE=True)
+    def test_createbooking_rejects_a_wrong_price(self):
+        response = self._create("1.00")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["data"], "total_price does not match the quoted price of 24.70")
+        self.assertFalse(Booking.objects.exists())
+
+        self.assertEqual(self._create("24.70").status_code, 201)
+
+    @override_settings(BOOKING_VERIFY_PRICE=False)
+    def test_createbooking_accepts_any_price_with_verification_off(self):
+        self.assertEqual(self._create("1.00").status_code, 201)
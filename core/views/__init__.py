@@ -1,10 +1,20 @@
 # Re-export views so existing imports and handler paths keep working
 from .health import health
 from .getproducts import getproducts
+from .searchproducts import searchproducts
+from .productfacets import productfacets
 from .createproduct import createproduct
+from .importproducts import importproducts
 from .getproduct import getproduct
 from .errors import error_400, error_404, error_500
 from .createbooking import createbooking
+from .createbookings import createbookings
 from .cancelbooking import cancelbooking
+from .cancelbookingbytoken import cancelbookingbytoken
 from .getbookings import getbookings
 from .getbooking import getbooking
+from .getbookingbytoken import getbookingbytoken
+from .resellerreport import resellerreport
+from .cachestats import cachestats
+from .quote import quote
+from .metrics import metrics
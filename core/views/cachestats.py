@@ -0,0 +1,14 @@
+from django.http import JsonResponse
+from core.service.product_service import ProductService
+from utilities.querycountutility import query_budget
+
+
+@query_budget(0)
+def cachestats(request):
+    """Hit/miss/eviction counters of this worker's caches, for sizing them."""
+    return JsonResponse({
+        "status": "ok",
+        "data": {
+            "catalog": ProductService.cache_stats()
+        }
+    }, status=200)
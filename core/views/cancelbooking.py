@@ -1,12 +1,16 @@
+from django.db import DatabaseError
 from django.http import JsonResponse
 from core.service.booking_service import BookingService
-from core.models import Reseller
-from utilities.mailerutility import send_cancellation_mail
-from datetime import datetime
+from core.service.idempotency_service import idempotent
+from utilities.admissionutility import admission_class
+from utilities.querycountutility import query_budget
 
 service = BookingService()
 
 
+@admission_class("email_write")
+@query_budget(11)
+@idempotent
 def cancelbooking(request, booking_id: int):
     if request.method != "POST":
         return JsonResponse({
@@ -15,23 +19,8 @@ def cancelbooking(request, booking_id: int):
         }, status=400)
 
     try:
+        # The cancellation email is queued in the outbox within the same transaction
         booking = service.cancel_booking(booking_id)
-        # Attempt to send cancellation email (non-blocking)
-        try:
-            reseller = Reseller.objects.filter(pk=booking.reseller_id).first()
-            reseller_name = reseller.name if reseller else ""
-
-            template_model = {
-                "subject": "Your booking has been cancelled",
-                "customer_email": booking.customer_email,
-                "booking_id": booking.booking_id,
-                "reseller_name": reseller_name,
-                "CURRENT_YEAR": datetime.now().year,
-            }
-            send_cancellation_mail(booking.customer_email, template_model)
-        except Exception:
-            # Swallow any email errors; they should not impact API response
-            pass
         return JsonResponse({
             "status": "ok",
             "data": {
@@ -45,6 +34,10 @@ def cancelbooking(request, booking_id: int):
             "status": "error",
             "data": str(e)
         }, status=404)
+    except DatabaseError:
+        # Not the client's fault: a 500 that rolls back the request and its Idempotency-Key,
+        # so a retry runs again instead of replaying an error
+        raise
     except Exception as e:
         return JsonResponse({
             "status": "error",
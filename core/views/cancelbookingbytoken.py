@@ -0,0 +1,49 @@
+from django.db import DatabaseError
+from django.http import JsonResponse
+from core.models import ACCESS_TOKEN_MAX_LENGTH
+from core.service.booking_service import BookingService
+from core.service.idempotency_service import idempotent
+from utilities.admissionutility import admission_class
+from utilities.querycountutility import query_budget
+
+service = BookingService()
+
+
+@admission_class("email_write")
+@query_budget(11)
+@idempotent
+def cancelbookingbytoken(request, token: str):
+    if request.method != "POST":
+        return JsonResponse({
+            "status": "error",
+            "data": "POST request required"
+        }, status=400)
+
+    try:
+        if len(token) > ACCESS_TOKEN_MAX_LENGTH:
+            raise ValueError("Booking not found")
+
+        # The cancellation email is queued in the outbox within the same transaction
+        booking = service.cancel_booking_by_token(token)
+        return JsonResponse({
+            "status": "ok",
+            "data": {
+                "booking_id": booking.booking_id,
+                "status": booking.status
+            }
+        }, status=200)
+    except ValueError as e:
+        # Booking not found
+        return JsonResponse({
+            "status": "error",
+            "data": str(e)
+        }, status=404)
+    except DatabaseError:
+        # Not the client's fault: a 500 that rolls back the request and its Idempotency-Key,
+        # so a retry runs again instead of replaying an error
+        raise
+    except Exception as e:
+        return JsonResponse({
+            "status": "error",
+            "data": str(e)
+        }, status=400)
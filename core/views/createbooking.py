@@ -1,15 +1,21 @@
+from django.db import DatabaseError
 from django.http import JsonResponse
 import json
 from datetime import datetime
 from decimal import Decimal
 from core.dto.booking_dto import BookingDTO
 from core.service.booking_service import BookingService
-from core.models import Product, Reseller
-from utilities.mailerutility import send_confirmation_mail
+from core.repository.booking_repository import BookingConflict
+from core.service.idempotency_service import idempotent
+from utilities.admissionutility import admission_class
+from utilities.querycountutility import query_budget
 
 service = BookingService()
 
 
+@admission_class("email_write")
+@query_budget(14)
+@idempotent
 def createbooking(request):
     if request.method != "POST":
         return JsonResponse({
@@ -29,34 +35,31 @@ def createbooking(request):
             total_price=Decimal(str(data.get("total_price")))
         )
 
+        # The confirmation email is queued in the outbox within the same transaction
         booking = service.create_booking(dto)
 
-        product = Product.objects.get(pk=booking.product_id)
-        reseller = Reseller.objects.filter(pk=booking.reseller_id).first()
-        reseller_name = reseller.name if reseller else ""
-        send_confirmation_mail(booking.customer_email, {
-            "subject": "Your booking is confirmed",
-            "email": booking.customer_email,
-            "booking_id": booking.booking_id,
-            "reseller_name": reseller_name,
-            "start_date": booking.start_date.strftime('%Y-%m-%d %H:%M'),
-            "end_date": booking.end_date.strftime('%Y-%m-%d %H:%M'),
-            "parking_type": getattr(product, 'type', ''),
-            "CURRENT_YEAR": datetime.now().year,
-        })
-
         return JsonResponse({
             "status": "ok",
             "data": {
-                "booking_id": booking.booking_id
+                "booking_id": booking.booking_id,
+                "access_token": booking.access_token
             }
         }, status=201)
 
+    except BookingConflict as e:
+        return JsonResponse({
+            "status": "error",
+            "data": str(e)
+        }, status=409)
     except json.JSONDecodeError:
         return JsonResponse({
             "status": "error",
             "data": "Invalid JSON"
         }, status=400)
+    except DatabaseError:
+        # Not the client's fault: a 500 that rolls back the request and its Idempotency-Key,
+        # so a retry runs again instead of replaying an error
+        raise
     except Exception as e:
         return JsonResponse({
             "status": "error",
@@ -0,0 +1,99 @@
+from django.db import DatabaseError
+from django.http import JsonResponse
+import json
+from datetime import datetime
+from decimal import Decimal
+from core.dto.booking_dto import BookingDTO
+from core.models import Booking
+from core.repository.booking_repository import BookingConflict
+from core.service.booking_service import BookingService
+from core.service.idempotency_service import idempotent
+from utilities.admissionutility import admission_class
+from utilities.querycountutility import query_budget
+
+service = BookingService()
+
+MAX_BOOKINGS = 500
+
+
+@admission_class("email_write")
+@query_budget(12)
+@idempotent
+def createbookings(request):
+    if request.method != "POST":
+        return JsonResponse({
+            "status": "error",
+            "data": "POST request required"
+        }, status=400)
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, list) or not data:
+            return JsonResponse({
+                "status": "error",
+                "data": "A non-empty JSON array of bookings is required"
+            }, status=400)
+        if len(data) > MAX_BOOKINGS:
+            return JsonResponse({
+                "status": "error",
+                "data": f"At most {MAX_BOOKINGS} bookings can be created at once"
+            }, status=400)
+
+        # Validate every item in one pass; only well-formed ones reach the service
+        results = [None] * len(data)
+        dtos, positions = [], []
+        for index, item in enumerate(data):
+            try:
+                dtos.append(BookingDTO(
+                    product_id=int(item.get("product_id")),
+                    customer_email=str(item.get("customer_email")),
+                    reseller_id=int(item.get("reseller_id")),
+                    start_date=datetime.fromisoformat(item.get("start_date")),
+                    end_date=datetime.fromisoformat(item.get("end_date")),
+                    total_price=Decimal(str(item.get("total_price")))
+                ))
+                positions.append(index)
+            except Exception as e:
+                results[index] = ValueError(str(e))
+
+        for index, result in zip(positions, service.create_bookings(dtos)):
+            results[index] = result
+
+        items = []
+        for index, result in enumerate(results):
+            if isinstance(result, Booking):
+                items.append({
+                    "index": index, "status": "ok", "booking_id": result.booking_id, "access_token": result.access_token,
+                })
+            else:
+                items.append({
+                    "index": index,
+                    "status": "error",
+                    "code": 409 if isinstance(result, BookingConflict) else 400,
+                    "data": str(result),
+                })
+
+        created = sum(1 for item in items if item["status"] == "ok")
+        return JsonResponse({
+            "status": "ok" if created else "error",
+            "data": {
+                "created": created,
+                "failed": len(items) - created,
+                "items": items
+            }
+        }, status=201 if created else 400)
+
+    except json.JSONDecodeError:
+        return JsonResponse({
+            "status": "error",
+            "data": "Invalid JSON"
+        }, status=400)
+    except DatabaseError:
+        # Not the client's fault: a 500 that rolls back the request and its Idempotency-Key,
+        # so a retry runs again instead of replaying an error
+        raise
+    except Exception as e:
+        return JsonResponse({
+            "status": "error",
+            "data": str(e)
+        }, status=400)
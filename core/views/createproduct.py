@@ -1,8 +1,10 @@
 from django.http import JsonResponse
 import json
-from core.models import Product
+from core.service.product_service import ProductService
+from utilities.querycountutility import query_budget
 
 
+@query_budget(6)
 def createproduct(request):
     if request.method != "POST":
         return JsonResponse({
@@ -16,7 +18,7 @@ def createproduct(request):
         # Support both old and new payload keys for backward compatibility
         reseller_id = data.get("reseller_id")
 
-        product = Product.objects.create(
+        product = ProductService.create_product(
             reseller_id=reseller_id,
             name=data.get("name"),
             type=data.get("type"),
@@ -1,11 +1,16 @@
 from django.http import JsonResponse
 import json
 from core.service.booking_service import BookingService
+from core.serializers import booking_serializer
+from utilities.etagutility import make_etag, etag_matches, not_modified, with_etag
+from utilities.serializerutility import FastJsonResponse
+from utilities.querycountutility import query_budget
 
 service = BookingService()
 
 
-def getbooking(request, booking_id: int):
+@query_budget(1)
+async def getbooking(request, booking_id: int):
     if request.method != "GET":
         return JsonResponse({
             "status": "error",
@@ -19,22 +24,13 @@ def getbooking(request, booking_id: int):
                 "data": "booking_id query parameter is required"
             }, status=400)
 
-        booking = service.get_booking(int(booking_id))
+        *booking, updated_at = await service.aget_booking_row(int(booking_id))
 
-        response = ({
-            "booking_id": booking.booking_id,
-            "product_id": booking.product_id,
-            "customer_email": booking.customer_email,
-            "reseller_id": booking.reseller_id,
-            "start_date": booking.start_date.isoformat(),
-            "end_date": booking.end_date.isoformat(),
-            "total_price": str(booking.total_price),
-        })
+        etag = make_etag("booking", booking[0], updated_at.isoformat())
+        if etag_matches(request, etag):
+            return not_modified(etag)
 
-        return JsonResponse({
-            "status": "ok",
-            "data": response
-        }, status=200)
+        return with_etag(FastJsonResponse(raw=booking_serializer.dumps_row(booking), status=200), etag)
 
     except json.JSONDecodeError:
         return JsonResponse({
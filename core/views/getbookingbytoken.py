@@ -0,0 +1,37 @@
+from django.http import JsonResponse
+from core.models import ACCESS_TOKEN_MAX_LENGTH
+from core.service.booking_service import BookingService
+from core.serializers import booking_serializer
+from utilities.etagutility import make_etag, etag_matches, not_modified, with_etag
+from utilities.serializerutility import FastJsonResponse
+from utilities.querycountutility import query_budget
+
+service = BookingService()
+
+@query_budget(1)
+async def getbookingbytoken(request, token: str):
+    if request.method != "GET":
+        return JsonResponse({
+            "status": "error",
+            "data": "GET request required"
+        }, status=400)
+
+    try:
+        # Longer strings were never issued; answer without hashing or querying them
+        if len(token) > ACCESS_TOKEN_MAX_LENGTH:
+            raise ValueError("Booking not found")
+
+        *booking, updated_at = await service.aget_booking_row_by_token(token)
+
+        # The same ETag as /v1/getbooking/<id>/: it is the same representation
+        etag = make_etag("booking", booking[0], updated_at.isoformat())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        return with_etag(FastJsonResponse(raw=booking_serializer.dumps_row(booking), status=200), etag)
+
+    except Exception as e:
+        return JsonResponse({
+            "status": "error",
+            "data": str(e)
+        }, status=400)
@@ -1,11 +1,81 @@
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 import json
 from core.service.booking_service import BookingService
+from core.serializers import booking_serializer
+from utilities.cursorutility import encode_cursor, decode_cursor
 
 service = BookingService()
 
+MAX_LIMIT = 1000
 
-def getbookings(request, customer_email: str):
+
+class _Envelope:
+    """
+    Builds the response envelope piece by piece. Without a limit data is the list of
+    bookings, as before paging existed. With one data is {"items": [...], "next_cursor"}
+    like the other paged endpoints, and one extra row is read to decide whether a
+    next_cursor is needed.
+    """
+
+    def __init__(self, limit: int | None):
+        self.limit = limit
+        self.head = b'{"status":"ok","data":[' if limit is None else b'{"status":"ok","data":{"items":['
+        self.count = 0
+        self.last_id = None
+        self.has_more = False
+
+    def item(self, row) -> bytes | None:
+        """JSON for row, or None once the page is full."""
+        if self.limit is not None and self.count == self.limit:
+            self.has_more = True
+            return None
+        piece = booking_serializer.dumps_row(row)
+        if self.count:
+            piece = b"," + piece
+        self.last_id, self.count = row[0], self.count + 1
+        return piece
+
+    def tail(self) -> bytes:
+        if self.limit is None:
+            return b"]}"
+        next_cursor = f'"{encode_cursor(self.last_id)}"' if self.has_more else "null"
+        return f'],"next_cursor":{next_cursor}}}}}'.encode()
+
+
+# Rows per streamed chunk, so each write to the client carries a useful amount of data
+ROWS_PER_CHUNK = 100
+
+
+def _stream(rows, envelope: _Envelope):
+    pieces = [envelope.head]
+    for row in rows:
+        piece = envelope.item(row)
+        if piece is None:
+            break
+        pieces.append(piece)
+        if len(pieces) >= ROWS_PER_CHUNK:
+            yield b"".join(pieces)
+            pieces = []
+    pieces.append(envelope.tail())
+    yield b"".join(pieces)
+
+
+async def _astream(rows, envelope: _Envelope):
+    pieces = [envelope.head]
+    async for row in rows:
+        piece = envelope.item(row)
+        if piece is None:
+            break
+        pieces.append(piece)
+        if len(pieces) >= ROWS_PER_CHUNK:
+            yield b"".join(pieces)
+            pieces = []
+    pieces.append(envelope.tail())
+    yield b"".join(pieces)
+
+
+async def getbookings(request, customer_email: str):
     if request.method != "GET":
         return JsonResponse({
             "status": "error",
@@ -19,24 +89,29 @@ def getbookings(request, customer_email: str):
                 "data": "customer_email query parameter is required"
             }, status=400)
 
-        bookings = service.get_bookings(customer_email)
-
-        response = []
-        for booking in bookings:
-            response.append({
-                "booking_id": booking.booking_id,
-                "product_id": booking.product_id,
-                "customer_email": booking.customer_email,
-                "reseller_id": booking.reseller_id,
-                "start_date": booking.start_date.isoformat(),
-                "end_date": booking.end_date.isoformat(),
-                "total_price": str(booking.total_price),
-        })
+        limit = request.GET.get("limit")
+        cursor = request.GET.get("cursor")
+        after_id = 0
+        try:
+            if limit is not None:
+                limit = min(max(int(limit), 1), MAX_LIMIT)
+            if cursor:
+                after_id = int(decode_cursor(cursor, 1)[0])
+        except (TypeError, ValueError):
+            return JsonResponse({
+                "status": "error",
+                "data": "Invalid limit or cursor"
+            }, status=400)
 
-        return JsonResponse({
-            "status": "ok",
-            "data": response
-        }, status=200)
+        read_limit = limit + 1 if limit is not None else None
+        envelope = _Envelope(limit)
+        # Stream with the iterator type the server consumes natively: an async iterator
+        # under ASGI, a sync one under WSGI (which would otherwise buffer the whole body)
+        if isinstance(request, ASGIRequest):
+            content = _astream(service.aiter_bookings(customer_email, after_id, read_limit), envelope)
+        else:
+            content = _stream(service.iter_bookings(customer_email, after_id, read_limit), envelope)
+        return StreamingHttpResponse(content, content_type="application/json", status=200)
 
     except json.JSONDecodeError:
         return JsonResponse({
@@ -1,18 +1,15 @@
 from django.http import JsonResponse
-from core.models import Product
+from core.service.product_service import ProductService
 from django.views.decorators.csrf import csrf_exempt
+from utilities.etagutility import etag_matches, not_modified, with_etag
+from utilities.serializerutility import FastJsonResponse
+from utilities.querycountutility import query_budget
 
+@query_budget(1)
 @csrf_exempt
-def getproduct(request, product_id):
+async def getproduct(request, product_id):
     try:
-        product = Product.objects.filter(product_id=product_id).values(
-            'product_id',
-            'reseller_id',
-            'name',
-            'type',
-            'price_per_day',
-            'rating'
-        ).first()
+        product, etag = await ProductService.aget_product_with_etag(product_id)
 
         if not product:
             return JsonResponse({
@@ -20,10 +17,10 @@ def getproduct(request, product_id):
                 "data": "Product not found"
             }, status=404)
 
-        return JsonResponse({
-            "status": "ok",
-            "data": product
-        })
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        return with_etag(FastJsonResponse(product), etag)
 
     except Exception as e:
         return JsonResponse({
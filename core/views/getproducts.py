@@ -1,12 +1,19 @@
 from django.http import JsonResponse
-from ..models import Product
+from core.service.product_service import ProductService
 from decimal import Decimal, InvalidOperation
+from utilities.cursorutility import encode_cursor, decode_cursor
+from utilities.etagutility import etag_matches, not_modified, with_etag
+from utilities.serializerutility import FastJsonResponse
+from utilities.querycountutility import query_budget
 
 
-def getproducts(request):
+@query_budget(2)
+async def getproducts(request):
     page_size = 25
     page_str = request.GET.get("page", "1")
     min_rating_str = request.GET.get("min_rating", "0")
+    cursor = request.GET.get("cursor")
+    include_total = request.GET.get("include_total", "1").lower() not in ("0", "false", "no")
     try:
         page = int(page_str)
         if page < 1:
@@ -25,25 +32,39 @@ def getproducts(request):
     if min_rating > 5:
         min_rating = Decimal("5")
 
-    qs = Product.objects.all().filter(rating__gte=min_rating)
-    total = qs.count()
-
-    start = (page - 1) * page_size
-    end = start + page_size
-
-    products = qs.values(
-        'product_id',
-        'reseller_id',
-        'name',
-        'type',
-        'price_per_day',
-        'rating'
-    )[start:end]
-
-    return JsonResponse({
-        "status": "ok",
-        "data": {
-            "total": total,
-            "items": list(products)
-        }
-    }, status=200)
+    # The catalog generation changes with every product change, so a matching ETag can be
+    # answered without reading any product
+    etag = await ProductService.acatalog_etag(min_rating, cursor if cursor is not None else page, include_total)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    data = {}
+    if include_total:
+        data["total"] = await ProductService.acount_products(min_rating)
+
+    if cursor is None:
+        # Legacy OFFSET paging (?page=N)
+        start = (page - 1) * page_size
+        data["items"] = await ProductService.alist_products(min_rating, start, page_size)
+    else:
+        # Keyset paging: ?cursor= (empty) for the first page, then the returned next_cursor
+        after = None
+        if cursor:
+            try:
+                rating, product_id = decode_cursor(cursor, 2)
+                after = (Decimal(rating), int(product_id))
+            except (ValueError, TypeError, InvalidOperation):
+                return JsonResponse({
+                    "status": "error",
+                    "data": "Invalid cursor"
+                }, status=400)
+
+        items = await ProductService.alist_products_after(min_rating, after, page_size)
+        data["items"] = items
+        data["next_cursor"] = (
+            encode_cursor(items[-1]["rating"], items[-1]["product_id"])
+            if len(items) == page_size
+            else None
+        )
+
+    return with_etag(FastJsonResponse(data, status=200), etag)
@@ -1,7 +1,11 @@
 from django.http import JsonResponse
+from utilities.admissionutility import admission_class
+from utilities.querycountutility import query_budget
 
 
-def health(request):
+@admission_class(None)
+@query_budget(0)
+async def health(request):
     return JsonResponse({
         "status": "ok",
         "data": "API is up and running!"
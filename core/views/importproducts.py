@@ -0,0 +1,43 @@
+from django.http import JsonResponse
+from core.service.product_import_service import ProductImportService
+from utilities.admissionutility import admission_class
+
+CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+@admission_class("import")
+def importproducts(request):
+    """
+    Bulk product import. The body is read line by line (never loaded as a whole), so large
+    catalogs can be streamed. Format comes from ?format=ndjson|csv or the Content-Type.
+    """
+    if request.method != "POST":
+        return JsonResponse({
+            "status": "error",
+            "data": "POST request required"
+        }, status=400)
+
+    fmt = request.GET.get("format") or CONTENT_TYPES.get(request.content_type)
+    if fmt not in ("ndjson", "csv"):
+        return JsonResponse({
+            "status": "error",
+            "data": "Send NDJSON (application/x-ndjson) or CSV (text/csv), or pass ?format="
+        }, status=400)
+
+    try:
+        summary = ProductImportService.import_stream(request, fmt)
+    except ValueError as e:
+        return JsonResponse({
+            "status": "error",
+            "data": str(e)
+        }, status=400)
+
+    return JsonResponse({
+        "status": "ok",
+        "data": summary
+    }, status=201 if summary["created"] else 200)
@@ -0,0 +1,11 @@
+from django.http import HttpResponse
+from utilities.metricsutility import registry
+from utilities.admissionutility import admission_class
+from utilities.querycountutility import query_budget
+
+
+@admission_class(None)
+@query_budget(0)
+def metrics(request):
+    """Request metrics of every worker in this container, in Prometheus text format."""
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,21 @@
+from django.http import JsonResponse
+from core.service.product_service import ProductService
+from utilities.etagutility import etag_matches, not_modified, with_etag
+from utilities.serializerutility import FastJsonResponse
+from utilities.querycountutility import query_budget
+
+
+@query_budget(1)
+async def productfacets(request):
+    if request.method != "GET":
+        return JsonResponse({
+            "status": "error",
+            "data": "GET request required"
+        }, status=400)
+
+    # Facets change only with products, so the catalog generation identifies them
+    etag = await ProductService.acatalog_etag("facets")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    return with_etag(FastJsonResponse(await ProductService.aproduct_facets(), status=200), etag)
@@ -0,0 +1,70 @@
+from django.http import JsonResponse
+import json
+from datetime import datetime
+from core.dto.quote_dto import QuoteItemDTO
+from core.service.quote_service import QuoteService
+from utilities.admissionutility import admission_class
+from utilities.querycountutility import query_budget
+
+
+@admission_class("read")
+@query_budget(1)
+def quote(request):
+    if request.method != "POST":
+        return JsonResponse({
+            "status": "error",
+            "data": "POST request required"
+        }, status=400)
+
+    try:
+        data = json.loads(request.body)
+        raw_items = data.get("items")
+        if not isinstance(raw_items, list):
+            return JsonResponse({
+                "status": "error",
+                "data": "items must be a list"
+            }, status=400)
+        if len(raw_items) > QuoteService.MAX_ITEMS:
+            return JsonResponse({
+                "status": "error",
+                "data": f"At most {QuoteService.MAX_ITEMS} items can be quoted at once"
+            }, status=400)
+
+        # Parse every item first; invalid ones get an error entry instead of a price
+        items, results = [], [None] * len(raw_items)
+        positions = []
+        for index, raw in enumerate(raw_items):
+            try:
+                item = QuoteItemDTO(
+                    product_id=int(raw.get("product_id")),
+                    start_date=datetime.fromisoformat(raw.get("start_date")),
+                    end_date=datetime.fromisoformat(raw.get("end_date")),
+                )
+                if item.end_date <= item.start_date:
+                    raise ValueError("end_date must be after start_date")
+            except Exception as e:
+                results[index] = {"error": str(e)}
+                continue
+            items.append(item)
+            positions.append(index)
+
+        for index, priced in zip(positions, QuoteService.quote(items)):
+            results[index] = priced
+
+        return JsonResponse({
+            "status": "ok",
+            "data": {
+                "items": results
+            }
+        }, status=200)
+
+    except json.JSONDecodeError:
+        return JsonResponse({
+            "status": "error",
+            "data": "Invalid JSON"
+        }, status=400)
+    except Exception as e:
+        return JsonResponse({
+            "status": "error",
+            "data": str(e)
+        }, status=400)
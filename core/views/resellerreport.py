@@ -0,0 +1,35 @@
+from django.http import JsonResponse
+from datetime import date
+from core.service.booking_service import BookingService
+from utilities.serializerutility import FastJsonResponse
+from utilities.querycountutility import query_budget
+
+service = BookingService()
+
+MAX_DAYS = 366
+
+
+@query_budget(1)
+async def resellerreport(request, reseller_id: int):
+    if request.method != "GET":
+        return JsonResponse({
+            "status": "error",
+            "data": "GET request required"
+        }, status=400)
+
+    try:
+        start = date.fromisoformat(request.GET.get("from", ""))
+        end = date.fromisoformat(request.GET.get("to", ""))
+    except ValueError:
+        return JsonResponse({
+            "status": "error",
+            "data": "from and to must be dates (YYYY-MM-DD)"
+        }, status=400)
+    if end < start or (end - start).days >= MAX_DAYS:
+        return JsonResponse({
+            "status": "error",
+            "data": f"to must be on or after from, at most {MAX_DAYS} days apart"
+        }, status=400)
+
+    report = await service.areseller_report(reseller_id, start, end)
+    return FastJsonResponse({"reseller_id": reseller_id, "from": start, "to": end, **report}, status=200)
@@ -0,0 +1,107 @@
+from django.http import JsonResponse
+from decimal import Decimal, InvalidOperation
+from core.dto.product_search_dto import ProductSearchDTO
+from core.repository.product_repository import SEARCH_SORT_COLUMNS
+from core.service.product_service import ProductService
+from utilities.cursorutility import encode_cursor, decode_cursor
+from utilities.etagutility import etag_matches, not_modified, with_etag
+from utilities.serializerutility import FastJsonResponse
+from utilities.querycountutility import query_budget
+
+MAX_LIMIT = 100
+
+
+def _decimal(params, name: str) -> Decimal | None:
+    value = params.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+    if not number.is_finite() or number < 0:
+        raise ValueError(f"{name} must be a non-negative number")
+    return number
+
+
+def _parse_search(params) -> ProductSearchDTO:
+    """Builds the search from the query string; raises ValueError with a client message."""
+    reseller_id = params.get("reseller_id")
+    if reseller_id:
+        try:
+            reseller_id = int(reseller_id)
+        except ValueError:
+            raise ValueError("reseller_id must be an integer")
+
+    name_prefix = params.get("q", "").strip().lower() or None
+    # Prefix searches read most naturally in name order
+    sort = params.get("sort") or ("name" if name_prefix else "-rating")
+    if sort.lstrip("-") not in SEARCH_SORT_COLUMNS:
+        raise ValueError(f"sort must be one of {', '.join(SEARCH_SORT_COLUMNS)}, optionally prefixed with -")
+
+    try:
+        limit = int(params.get("limit", "25"))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+
+    after = None
+    cursor = params.get("cursor")
+    if cursor:
+        # The cursor carries its sort, so it cannot be replayed against another order
+        cursor_sort, value, product_id = decode_cursor(cursor, 3)
+        if cursor_sort != sort:
+            raise ValueError("Invalid cursor")
+        key = sort.lstrip("-")
+        try:
+            if value is None and key == "rating":
+                # The previous page ended among the unrated products
+                after = (None, int(product_id))
+            elif key == "name":
+                if not isinstance(value, str):
+                    raise ValueError("Invalid cursor")
+                after = (value, int(product_id))
+            else:
+                after = (Decimal(value), int(product_id))
+        except (TypeError, ValueError, InvalidOperation):
+            raise ValueError("Invalid cursor")
+
+    return ProductSearchDTO(
+        type=params.get("type") or None,
+        reseller_id=reseller_id or None,
+        min_price=_decimal(params, "min_price"),
+        max_price=_decimal(params, "max_price"),
+        min_rating=_decimal(params, "min_rating"),
+        name_prefix=name_prefix,
+        sort=sort,
+        after=after,
+        limit=limit,
+    )
+
+
+@query_budget(2)
+async def searchproducts(request):
+    if request.method != "GET":
+        return JsonResponse({
+            "status": "error",
+            "data": "GET request required"
+        }, status=400)
+
+    try:
+        search = _parse_search(request.GET)
+    except ValueError as e:
+        return JsonResponse({
+            "status": "error",
+            "data": str(e)
+        }, status=400)
+
+    etag = await ProductService.acatalog_etag("search", repr(search))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    items, after = await ProductService.asearch_products(search)
+    return with_etag(FastJsonResponse({
+        "items": items,
+        "next_cursor": encode_cursor(search.sort, *after) if after else None,
+    }, status=200), etag)
@@ -1,8 +1,15 @@
 #!/usr/bin/env bash
 set -e
 
+if [ "${PROCESS_TYPE:-web}" = "outbox" ]; then
+  exec python manage.py drain_outbox
+fi
+
 if [ "${DJANGO_DEV:-0}" = "1" ]; then
   exec python manage.py runserver 0.0.0.0:8000
+elif [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+  # Async workers: one worker keeps many slow clients in flight on the async read endpoints
+  exec gunicorn app.asgi:application -k uvicorn_worker.UvicornWorker --bind 0.0.0.0:8000 --workers ${GUNICORN_WORKERS:-4} --timeout 30
 else
-  exec gunicorn app.wsgi:application --bind 0.0.0.0:8000 --workers ${GUNICORN_WORKERS:-3} --timeout 30
+  exec gunicorn app.wsgi:application --bind 0.0.0.0:8000 --workers ${GUNICORN_WORKERS:-4} --timeout 30
 fi
@@ -0,0 +1,121 @@
+"""
+Cross-process concurrency limits for admission control.
+
+A SlotLimiter allows at most `slots` holders at a time across every process that uses
+the same directory: slot i is an flock on <directory>/<name>-<i>.lock. Sync gunicorn
+workers handle one request each, so a per-process limit could never trigger; the locks
+make the limit hold for the whole container. The kernel drops the locks of a process
+that dies, so a killed worker never leaks a slot.
+
+Waiting is polling with backoff (a few milliseconds at first), not a FIFO queue.
+"""
+import asyncio
+import fcntl
+import os
+import random
+import threading
+import time
+
+_DEFAULT = object()
+
+# First and longest sleep between attempts while waiting for a slot, in seconds
+_POLL_START = 0.002
+_POLL_MAX = 0.05
+
+
+class SlotLimiter:
+    def __init__(self, name: str, slots: int, directory: str):
+        self.name = name
+        self.slots = slots
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._pid = None
+        self._files = []
+        self._held = []
+
+    def _ensure_open(self):
+        # Lock files inherited through fork share their lock with the parent; reopen them
+        if self._pid == os.getpid():
+            return
+        for f in self._files:
+            f.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._files = [open(os.path.join(self.directory, f"{self.name}-{i}.lock"), "a+b") for i in range(self.slots)]
+        self._held = [False] * self.slots
+        self._pid = os.getpid()
+
+    def try_acquire(self) -> int | None:
+        """A free slot's number, or None if all are taken."""
+        with self._lock:
+            self._ensure_open()
+            # Start at a random slot so processes don't all contend for slot 0
+            first = random.randrange(self.slots) if self.slots else 0
+            for n in range(self.slots):
+                slot = (first + n) % self.slots
+                if self._held[slot]:
+                    continue
+                try:
+                    fcntl.flock(self._files[slot], fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                self._held[slot] = True
+                return slot
+        return None
+
+    def acquire(self, timeout: float) -> int | None:
+        """Waits up to `timeout` seconds for a slot; None if none became free."""
+        deadline = time.monotonic() + timeout
+        delay = _POLL_START
+        while True:
+            slot = self.try_acquire()
+            if slot is not None:
+                return slot
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, _POLL_MAX)
+
+    async def aacquire(self, timeout: float) -> int | None:
+        deadline = time.monotonic() + timeout
+        delay = _POLL_START
+        while True:
+            slot = self.try_acquire()
+            if slot is not None:
+                return slot
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, _POLL_MAX)
+
+    def release(self, slot: int):
+        with self._lock:
+            if self._pid != os.getpid() or not self._held[slot]:
+                return
+            fcntl.flock(self._files[slot], fcntl.LOCK_UN)
+            self._held[slot] = False
+
+    def in_use(self) -> int:
+        """Slots held by this process."""
+        with self._lock:
+            return sum(self._held)
+
+
+def admission_class(name: str | None):
+    """
+    Puts a view in an admission class of settings.ADMISSION_CLASSES (see
+    AdmissionControlMiddleware); None exempts it. Views without one are "read" for GET
+    and HEAD and "write" otherwise.
+    """
+    def decorator(view):
+        view.admission_class = name
+        return view
+    return decorator
+
+
+def view_admission_class(view, method: str) -> str | None:
+    name = getattr(view, "admission_class", _DEFAULT)
+    if name is not _DEFAULT:
+        return name
+    return "read" if method in ("GET", "HEAD") else "write"
@@ -0,0 +1,228 @@
+"""
+Two-level read-through cache: an in-process LRU in front of Django's cache framework.
+
+Keys are namespaced by a generation token kept in the shared cache. Bumping the
+generation makes every cached entry of the namespace unreachable at once, so callers
+never need to know which keys a change affects. The token starts with the time it was
+made, so a cache can tell how recent the last change is (see fill_context).
+
+Inside a generation_scope() (CacheGenerationMiddleware opens one per request) the
+generation is read from the shared cache once and shared by every lookup of the scope,
+so local hits after the first cost no shared cache round trip. A bump is seen by the
+next scope of any process. Outside a scope every lookup reads the generation. Local
+entries are kept pickled and every hit returns a fresh copy, so callers may modify
+what they get.
+"""
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from django.core.cache import caches
+
+_MISSING = object()
+
+# {(alias, generation key): token} read in the current scope (a ContextVar, so it follows async
+# views into the threads that run their ORM calls)
+_scope: ContextVar[dict | None] = ContextVar("cache_generations", default=None)
+
+
+@contextmanager
+def generation_scope():
+    """Reads each TieredCache generation at most once until the block ends (e.g. a request)."""
+    token = _scope.set({})
+    try:
+        yield
+    finally:
+        try:
+            _scope.reset(token)
+        except ValueError:
+            # Ended from another context
+            _scope.set(None)
+
+
+class LocalLRU:
+    """Thread-safe, size- and TTL-bounded LRU dictionary."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _new_generation() -> str:
+    return f"{time.time():.3f}-{uuid.uuid4().hex}"
+
+
+def generation_age(generation: str) -> float | None:
+    """Seconds since the generation token was made; None for tokens without a timestamp."""
+    try:
+        return time.time() - float(generation.split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+class TieredCache:
+    def __init__(
+        self, namespace: str, ttl: int, local_max_entries: int, local_ttl: float, alias: str = "default",
+        fill_context=None,
+    ):
+        """
+        fill_context(age) returns the context manager a loader runs in on a miss, given the
+        generation's age in seconds (e.g. to read from the primary right after a change).
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.alias = alias
+        self.fill_context = fill_context or (lambda age: nullcontext())
+        self.local = LocalLRU(local_max_entries, local_ttl)
+        self._stats_lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @property
+    def _generation_key(self) -> str:
+        return f"{self.namespace}:generation"
+
+    def _remember_generation(self, generation: str) -> str:
+        scope = _scope.get()
+        if scope is not None:
+            scope[(self.alias, self._generation_key)] = generation
+        return generation
+
+    def _scoped_generation(self) -> str | None:
+        scope = _scope.get()
+        return scope.get((self.alias, self._generation_key)) if scope is not None else None
+
+    def generation(self) -> str:
+        generation = self._scoped_generation()
+        if generation is not None:
+            return generation
+        generation = self.shared.get(self._generation_key)
+        if generation is None:
+            generation = _new_generation()
+            # add() so concurrent first readers agree on one token
+            if not self.shared.add(self._generation_key, generation, timeout=None):
+                generation = self.shared.get(self._generation_key, generation)
+        return self._remember_generation(generation)
+
+    async def ageneration(self) -> str:
+        generation = self._scoped_generation()
+        if generation is not None:
+            return generation
+        generation = await self.shared.aget(self._generation_key)
+        if generation is None:
+            generation = _new_generation()
+            if not await self.shared.aadd(self._generation_key, generation, timeout=None):
+                generation = await self.shared.aget(self._generation_key, generation)
+        return self._remember_generation(generation)
+
+    def bump(self):
+        """
+        Invalidates every entry of the namespace, including for the rest of the current
+        scope. Uses a fresh token so no bump is lost.
+        """
+        generation = _new_generation()
+        self.shared.set(self._generation_key, generation, timeout=None)
+        self._remember_generation(generation)
+
+    def clear_local(self):
+        """Drops this process's entries (the shared cache is untouched)."""
+        self.local.clear()
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def get_or_set(self, key: str, loader):
+        """Returns the cached value for key, calling loader() and caching its result on a miss."""
+        generation = self.generation()
+        full_key = f"{self.namespace}:{generation}:{key}"
+
+        pickled = self.local.get(full_key)
+        if pickled is not _MISSING:
+            self._count("local_hits")
+            return pickle.loads(pickled)
+
+        # Values are wrapped in a tuple so a cached None is distinguishable from a miss
+        wrapped = self.shared.get(full_key)
+        if wrapped is not None:
+            self._count("shared_hits")
+            value = wrapped[0]
+        else:
+            self._count("misses")
+            with self.fill_context(generation_age(generation)):
+                value = loader()
+            self.shared.set(full_key, (value,), timeout=self.ttl)
+
+        self.local.set(full_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        return value
+
+    async def aget_or_set(self, key: str, aloader):
+        """Async get_or_set; aloader is a coroutine function."""
+        generation = await self.ageneration()
+        full_key = f"{self.namespace}:{generation}:{key}"
+
+        pickled = self.local.get(full_key)
+        if pickled is not _MISSING:
+            self._count("local_hits")
+            return pickle.loads(pickled)
+
+        wrapped = await self.shared.aget(full_key)
+        if wrapped is not None:
+            self._count("shared_hits")
+            value = wrapped[0]
+        else:
+            self._count("misses")
+            with self.fill_context(generation_age(generation)):
+                value = await aloader()
+            await self.shared.aset(full_key, (value,), timeout=self.ttl)
+
+        self.local.set(full_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        return value
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats.update({
+            "hit_ratio": round((lookups - stats["misses"]) / lookups, 3) if lookups else None,
+            "local_evictions": self.local.evictions,
+            "local_entries": len(self.local),
+            "local_max_entries": self.local.max_entries,
+        })
+        return stats
@@ -0,0 +1,25 @@
+"""Opaque pagination cursors for keyset (seek) pagination."""
+import base64
+import json
+
+
+def encode_cursor(*values) -> str:
+    """Encodes the sort key of the last returned row as an opaque, URL-safe string."""
+    payload = json.dumps([str(v) if v is not None else None for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """
+    Decodes a cursor produced by encode_cursor into its `size` values (as strings).
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,30 @@
+"""Strong ETags and If-None-Match handling for the read endpoints."""
+import hashlib
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+
+
+def make_etag(*parts) -> str:
+    """Builds a quoted strong ETag from values that identify the exact representation."""
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    """True if the request's If-None-Match header matches etag (weak comparison, RFC 9110)."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    tags = parse_etags(header)
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def with_etag(response, etag: str):
+    response["ETag"] = etag
+    # Let browsers keep the body but revalidate it on every poll
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified(etag: str) -> HttpResponse:
+    return with_etag(HttpResponse(status=304), etag)
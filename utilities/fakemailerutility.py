@@ -0,0 +1,38 @@
+"""
+Local stand-in for the SES mailer.
+
+Point settings.MAIL_SENDER / MAIL_BULK_SENDER at `utilities.fakemailerutility.send_mail` /
+`send_bulk_mail` to run the email outbox without AWS. Delivered messages are collected in `outbox`.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Messages "delivered" by the fake sender, as (kind, to_email, template_model) tuples
+outbox = []
+
+# Number of upcoming sends that should fail, to exercise retry/backoff handling
+fail_next = 0
+
+
+def send_mail(kind: str, to_email: str, template_model: dict) -> bool:
+    global fail_next
+
+    if fail_next > 0:
+        fail_next -= 1
+        logger.info("Fake SES send to %s failed (simulated)", to_email)
+        return False
+
+    outbox.append((kind, to_email, template_model))
+    logger.info("Fake SES email (%s) sent to %s", kind, to_email)
+    return True
+
+
+def reset():
+    global fail_next
+    outbox.clear()
+    fail_next = 0
+
+
+def send_bulk_mail(kind: str, messages: list[tuple[str, dict]]) -> list[bool]:
+    return [send_mail(kind, to_email, template_model) for to_email, template_model in messages]
@@ -2,40 +2,162 @@ import logging
 import os
 import sys
 import json
+import threading
+import time
+from collections import deque
 import boto3
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from utilities.circuitbreaker import CircuitBreaker, CircuitOpenError
 
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SES accepts at most 50 destinations per SendBulkTemplatedEmail call
+SES_BULK_MAX_DESTINATIONS = 50
+
+# Error codes that mean SES itself is unhealthy (as opposed to a bad message)
+_SES_UNAVAILABLE_CODES = {"Throttling", "ThrottlingException", "ServiceUnavailable", "InternalFailure"}
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+ses_breaker = CircuitBreaker(
+    "ses",
+    failure_threshold=int(os.getenv("SES_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("SES_BREAKER_RESET_SECONDS", "30")),
+)
+
+
+class _CallStats:
+    """Per-process SES call counters and a window of recent latencies."""
+
+    def __init__(self, window: int = 512):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float, ok: bool):
+        with self._lock:
+            self.calls += 1
+            self.errors += 0 if ok else 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self._latencies.append(elapsed_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._latencies)
+            calls, errors, total_ms, max_ms = self.calls, self.errors, self.total_ms, self.max_ms
+
+        def pct(p):
+            return round(recent[min(int(len(recent) * p), len(recent) - 1)], 1) if recent else None
+
+        return {
+            "calls": calls,
+            "errors": errors,
+            "avg_ms": round(total_ms / calls, 1) if calls else None,
+            "max_ms": round(max_ms, 1),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+        }
+
+
+_stats = _CallStats()
+
+
+def get_ses_stats() -> dict:
+    """Latency and circuit breaker state of this process' SES client."""
+    return {"latency": _stats.snapshot(), "breaker": ses_breaker.snapshot()}
+
 
 def _get_ses_client():
     """
-    Retrieves the SES client using explicit credentials from environment variables.
+    Returns the process-wide SES client, creating it on first use.
+    Credentials are read from environment variables. The client is thread-safe and keeps
+    its HTTPS connections alive between calls; it is rebuilt after a fork.
     """
-    region = os.getenv("AWS_REGION")
-    aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
-    aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+    global _client, _client_pid
 
-    if not aws_access_key or not aws_secret_key:
-        logger.error("Missing AWS credentials in environment variables.")
-        return None
+    if _client is not None and _client_pid == os.getpid():
+        return _client
 
-    return boto3.client(
-        "ses",
-        region_name=region,
-        aws_access_key_id=aws_access_key,
-        aws_secret_access_key=aws_secret_key
-    )
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            return _client
 
+        region = os.getenv("AWS_REGION")
+        aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
+        aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
 
-def _send_ses_email(to_email: str, template_name: str, template_data: dict, source_email: str) -> bool:
+        if not aws_access_key or not aws_secret_key:
+            logger.error("Missing AWS credentials in environment variables.")
+            return None
+
+        config = Config(
+            connect_timeout=float(os.getenv("SES_CONNECT_TIMEOUT", "2")),
+            read_timeout=float(os.getenv("SES_READ_TIMEOUT", "5")),
+            max_pool_connections=int(os.getenv("SES_MAX_POOL_CONNECTIONS", "10")),
+            retries={"max_attempts": 2, "mode": "standard"},
+            tcp_keepalive=True,
+        )
+        _client = boto3.client(
+            "ses",
+            region_name=region,
+            aws_access_key_id=aws_access_key,
+            aws_secret_access_key=aws_secret_key,
+            config=config,
+        )
+        _client_pid = os.getpid()
+        return _client
+
+
+def _call_ses(operation: str, **params) -> dict:
+    """
+    Calls an SES operation through the circuit breaker and records its latency.
+    Raises CircuitOpenError without calling SES while the breaker is open, and
+    RuntimeError when there are no AWS credentials.
+    """
     client = _get_ses_client()
+    if client is None:
+        raise RuntimeError("SES client is not configured")
+
+    ses_breaker.before_call()
+    started = time.perf_counter()
+    try:
+        response = getattr(client, operation)(**params)
+    except ClientError as e:
+        _stats.record((time.perf_counter() - started) * 1000, ok=False)
+        error = e.response.get("Error", {})
+        status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        if status >= 500 or error.get("Code") in _SES_UNAVAILABLE_CODES:
+            ses_breaker.record_failure()
+        else:
+            # SES answered; the request itself was rejected
+            ses_breaker.record_success()
+        raise
+    except Exception:
+        # BotoCoreError (SES unreachable) or anything unexpected. Every call that got past
+        # before_call() must record an outcome, or a half-open trial would never finish.
+        _stats.record((time.perf_counter() - started) * 1000, ok=False)
+        ses_breaker.record_failure()
+        raise
+
+    _stats.record((time.perf_counter() - started) * 1000, ok=True)
+    ses_breaker.record_success()
+    return response
+
 
+def _send_ses_email(to_email: str, template_name: str, template_data: dict, source_email: str) -> bool:
     try:
         serialized_data = json.dumps(template_data)
 
-        response = client.send_templated_email(
+        response = _call_ses(
+            "send_templated_email",
             Source=source_email,
             Destination={
                 "ToAddresses": [to_email]
@@ -50,18 +172,86 @@ def _send_ses_email(to_email: str, template_name: str, template_data: dict, sour
     except ClientError as e:
         logger.error("SES send failed to %s: %s", to_email, e.response['Error']['Message'])
         return False
+    except BotoCoreError as e:
+        logger.error("SES unreachable sending to %s: %s", to_email, e)
+        return False
+    except CircuitOpenError:
+        raise
     except Exception as e:
         logger.exception("Unexpected error sending SES email: %s", e)
         return False
 
 
+def _send_ses_bulk_email(template_name: str, messages: list[tuple[str, dict]], source_email: str) -> list[bool | None]:
+    """
+    Sends one templated email per (to_email, template_data) pair using as few
+    SendBulkTemplatedEmail calls as possible. Returns a delivery flag per message, or None
+    for messages that were not attempted because the circuit opened part-way through.
+    """
+    results = []
+    for offset in range(0, len(messages), SES_BULK_MAX_DESTINATIONS):
+        chunk = messages[offset:offset + SES_BULK_MAX_DESTINATIONS]
+        try:
+            response = _call_ses(
+                "send_bulk_templated_email",
+                Source=source_email,
+                Template=template_name,
+                DefaultTemplateData="{}",
+                Destinations=[
+                    {
+                        "Destination": {"ToAddresses": [to_email]},
+                        "ReplacementTemplateData": json.dumps(template_data),
+                    }
+                    for to_email, template_data in chunk
+                ],
+            )
+        except CircuitOpenError:
+            if offset == 0:
+                raise
+            results.extend([None] * (len(messages) - offset))
+            break
+        except ClientError as e:
+            logger.error("SES bulk send of %d emails failed: %s", len(chunk), e.response['Error']['Message'])
+            results.extend([False] * len(chunk))
+            continue
+        except BotoCoreError as e:
+            logger.error("SES unreachable sending %d emails: %s", len(chunk), e)
+            results.extend([False] * len(chunk))
+            continue
+        except Exception as e:
+            logger.exception("Unexpected error sending %d SES emails: %s", len(chunk), e)
+            results.extend([False] * len(chunk))
+            continue
+
+        statuses = response.get("Status", [])
+        for index, (to_email, _) in enumerate(chunk):
+            status = statuses[index] if index < len(statuses) else {}
+            if status.get("Status") == "Success":
+                results.append(True)
+            else:
+                logger.error("SES bulk send failed to %s: %s", to_email, status.get("Error") or status.get("Status"))
+                results.append(False)
+
+    logger.info("SES bulk send (%s): %d/%d delivered", template_name, results.count(True), len(results))
+    return results
+
+
+def _template_for(kind: str) -> tuple[str | None, str | None]:
+    sender = os.getenv("AWS_SES_SENDER")
+    template_env = {
+        "confirmation": "AWS_SES_CONFIRMATION_TEMPLATE",
+        "cancellation": "AWS_SES_CANCELLATION_TEMPLATE",
+    }.get(kind)
+    return sender, os.getenv(template_env) if template_env else None
+
+
 def send_confirmation_mail(to_email: str, template_model: dict) -> bool:
     """
     Sends booking confirmation via AWS SES.
     Requires env: AWS_SES_SENDER, AWS_SES_CONFIRMATION_TEMPLATE
+    Raises CircuitOpenError while SES is marked as degraded.
     """
-    sender = os.getenv("AWS_SES_SENDER")
-    template_name = os.getenv("AWS_SES_CONFIRMATION_TEMPLATE")
+    sender, template_name = _template_for("confirmation")
 
     if not all([sender, template_name]):
         logger.error("Configuration error: AWS_SES_SENDER or AWS_SES_CONFIRMATION_TEMPLATE is missing.")
@@ -74,12 +264,46 @@ def send_cancellation_mail(to_email: str, template_model: dict) -> bool:
     """
     Sends cancellation email via AWS SES.
     Requires env: AWS_SES_SENDER, AWS_SES_CANCELLATION_TEMPLATE
+    Raises CircuitOpenError while SES is marked as degraded.
     """
-    sender = os.getenv("AWS_SES_SENDER")
-    template_name = os.getenv("AWS_SES_CANCELLATION_TEMPLATE")
+    sender, template_name = _template_for("cancellation")
 
     if not all([sender, template_name]):
         logger.error("Configuration error: AWS_SES_SENDER or AWS_SES_CANCELLATION_TEMPLATE is missing.")
         return False
 
     return _send_ses_email(to_email, template_name, template_model, sender)
+
+
+MAIL_SENDERS = {
+    "confirmation": send_confirmation_mail,
+    "cancellation": send_cancellation_mail,
+}
+
+
+def send_mail(kind: str, to_email: str, template_model: dict) -> bool:
+    """
+    Sends an email of the given kind ("confirmation" or "cancellation") via AWS SES.
+    Used by the email outbox worker; see settings.MAIL_SENDER.
+    """
+    sender = MAIL_SENDERS.get(kind)
+    if sender is None:
+        logger.error("Unknown email kind: %s", kind)
+        return False
+
+    return sender(to_email, template_model)
+
+
+def send_bulk_mail(kind: str, messages: list[tuple[str, dict]]) -> list[bool | None]:
+    """
+    Sends many emails of one kind with SES bulk templated sends.
+    Used by the email outbox worker; see settings.MAIL_BULK_SENDER.
+    Raises CircuitOpenError while SES is marked as degraded.
+    """
+    sender, template_name = _template_for(kind)
+
+    if not all([sender, template_name]):
+        logger.error("Configuration error: AWS_SES_SENDER or the template for '%s' emails is missing.", kind)
+        return [False] * len(messages)
+
+    return _send_ses_bulk_email(template_name, messages, sender)
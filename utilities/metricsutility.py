@@ -0,0 +1,334 @@
+"""
+Process-safe metrics registry with Prometheus text output.
+
+Each process records counters, gauges and histograms in memory (a lock and a dict
+update per call) and writes a snapshot to METRICS_DIR/metrics-<pid>-<start token>.json at
+most every METRICS_FLUSH_SECONDS. Updates that arrive inside that window are written by a
+timer when it ends, so a worker that goes idle still publishes its last numbers; gauge
+changes are written at once. Rendering merges the snapshots of every process, so any
+gunicorn worker can answer a scrape with the totals of all of them.
+
+Files of processes that have exited are folded into METRICS_DIR/exited.json and deleted:
+their counters and histograms are added to the totals there, which keeps the merged
+counters monotonic, and their gauges are dropped. The start token tells a restarted
+worker that got an exited one's pid apart from it.
+"""
+import atexit
+import bisect
+import fcntl
+import json
+import os
+import threading
+import time
+from django.conf import settings
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+EXITED_FILE = "exited.json"
+LOCK_FILE = ".lock"
+
+
+def _labels_key(labels: dict | None) -> tuple:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra: tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _parse_filename(filename: str) -> tuple[int, str] | None:
+    """(pid, start token) of a process's snapshot file, or None for other files."""
+    if not filename.startswith("metrics-") or not filename.endswith(".json"):
+        return None
+    pid, _, token = filename[len("metrics-"):-len(".json")].partition("-")
+    return (int(pid), token) if pid.isdigit() else None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def _read(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path: str, data: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def _merge(snapshot: dict, counters: dict, histograms: dict, gauges: dict | None = None):
+    """Adds a snapshot's series to the merged ones; gauges only if `gauges` is given."""
+    for name, labels, value in snapshot.get("counters", []):
+        key = (name, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+    if gauges is not None:
+        for name, labels, value in snapshot.get("gauges", []):
+            key = (name, tuple(map(tuple, labels)))
+            gauges[key] = gauges.get(key, 0) + value
+    for name, labels, counts, total, count in snapshot.get("histograms", []):
+        key = (name, tuple(map(tuple, labels)))
+        merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+        merged[0] = [a + b for a, b in zip(merged[0], counts)]
+        merged[1] += total
+        merged[2] += count
+
+
+class _DirectoryLock:
+    """Serializes folding and collecting across the processes sharing METRICS_DIR."""
+
+    def __init__(self, directory: str):
+        self._path = os.path.join(directory, LOCK_FILE)
+
+    def __enter__(self):
+        self._file = open(self._path, "a")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._descriptions = {}
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._token = format(time.time_ns(), "x")
+        self._filename = f"metrics-{self._pid}-{self._token}.json"
+        self._folded_stale = False
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._last_flush = 0.0
+        # Pending write of updates made inside the flush window
+        self._timer = None
+
+    def _check_fork(self):
+        # A forked worker must not report its parent's numbers as its own
+        if self._pid != os.getpid():
+            self._reset()
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        """Registers a metric's type ('counter', 'gauge' or 'histogram') and help text."""
+        self._descriptions[name] = (kind, help_text, tuple(buckets))
+
+    def inc(self, name: str, labels: dict | None = None, amount: float = 1):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._check_fork()
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def set_gauge(self, name: str, value: float, labels: dict | None = None):
+        """Gauges are summed across processes (e.g. connections in use per worker)."""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._check_fork()
+            changed = self._gauges.get(key) != value
+            self._gauges[key] = value
+        if changed:
+            # A gauge is a current state (e.g. requests in flight); a throttled write could
+            # leave a stale value up until the worker's next request
+            self.flush()
+
+    def observe(self, name: str, value: float, labels: dict | None = None):
+        buckets = self._descriptions.get(name, (None, None, DEFAULT_BUCKETS))[2]
+        key = (name, _labels_key(labels))
+        index = bisect.bisect_left(buckets, value)
+        with self._lock:
+            self._check_fork()
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # Per-bucket (not cumulative) counts, the last one is +Inf
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+        self._maybe_flush()
+
+    def _snapshot(self) -> dict:
+        with self._lock:
+            self._check_fork()
+            return {
+                "counters": [[name, labels, value] for (name, labels), value in self._counters.items()],
+                "gauges": [[name, labels, value] for (name, labels), value in self._gauges.items()],
+                "histograms": [
+                    [name, labels, list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self._histograms.items()
+                ],
+            }
+
+    def _maybe_flush(self):
+        wait = settings.METRICS_FLUSH_SECONDS - (time.monotonic() - self._last_flush)
+        if wait > 0:
+            self._schedule_flush(wait)
+            return
+        # Skip if another thread is already flushing
+        if self._flush_lock.acquire(blocking=False):
+            try:
+                self._write()
+            finally:
+                self._flush_lock.release()
+
+    def _schedule_flush(self, delay: float):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(delay, self._timed_flush)
+            self._timer.daemon = True
+            timer = self._timer
+        timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            # Cleared first, so updates made during the write schedule another one
+            self._timer = None
+        self.flush()
+
+    def flush(self):
+        """Writes this process's snapshot atomically, replacing its previous one."""
+        with self._flush_lock:
+            self._write()
+
+    def _write(self):
+        self._last_flush = time.monotonic()
+        directory = settings.METRICS_DIR
+        try:
+            os.makedirs(directory, exist_ok=True)
+            snapshot = self._snapshot()
+            _write_atomic(os.path.join(directory, self._filename), snapshot)
+            if not self._folded_stale:
+                # A file an exited process left under this pid would otherwise pass for live
+                with _DirectoryLock(directory):
+                    self._fold_exited(directory)
+                self._folded_stale = True
+        except OSError:
+            # Metrics must never break a request
+            pass
+
+    def _is_live(self, pid: int, token: str) -> bool:
+        if pid == os.getpid():
+            return token == self._token
+        return _pid_alive(pid)
+
+    def _fold_exited(self, directory: str) -> list[str]:
+        """
+        Adds the counters and histograms of processes that have exited to EXITED_FILE and
+        deletes their files. Call with the _DirectoryLock held. Returns the files of the
+        live processes.
+        """
+        exited_path = os.path.join(directory, EXITED_FILE)
+        exited = _read(exited_path) or {}
+        # Files already added whose deletion may not have happened (e.g. a crash)
+        folded = set(exited.get("folded", []))
+        live, dead = [], []
+        for filename in sorted(os.listdir(directory)):
+            parsed = _parse_filename(filename)
+            if parsed is None or filename in folded:
+                continue
+            (live if self._is_live(*parsed) else dead).append(filename)
+
+        if dead:
+            counters, histograms = {}, {}
+            _merge(exited, counters, histograms)
+            for filename in dead:
+                snapshot = _read(os.path.join(directory, filename))
+                if snapshot is not None:
+                    _merge(snapshot, counters, histograms)
+            existing = set(os.listdir(directory))
+            _write_atomic(exited_path, {
+                "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+                "histograms": [
+                    [name, labels, counts, total, count]
+                    for (name, labels), (counts, total, count) in histograms.items()
+                ],
+                "folded": sorted((folded & existing) | set(dead)),
+            })
+            folded |= set(dead)
+
+        for filename in folded:
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+        return live
+
+    def collect(self) -> dict:
+        """Merged counters, gauges and histograms of every process."""
+        self.flush()
+        counters, gauges, histograms = {}, {}, {}
+        directory = settings.METRICS_DIR
+        try:
+            with _DirectoryLock(directory):
+                live = self._fold_exited(directory)
+                _merge(_read(os.path.join(directory, EXITED_FILE)) or {}, counters, histograms)
+                for filename in live:
+                    snapshot = _read(os.path.join(directory, filename))
+                    if snapshot is not None:
+                        _merge(snapshot, counters, histograms, gauges)
+        except OSError:
+            pass
+        return {"counter": counters, "gauge": gauges, "histogram": histograms}
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        collected = self.collect()
+        by_name = {}
+        for kind, series in collected.items():
+            for (name, labels), value in series.items():
+                by_name.setdefault((name, kind), []).append((labels, value))
+
+        lines = []
+        for (name, kind), series in sorted(by_name.items()):
+            help_text = self._descriptions.get(name, (None, name))[1]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series):
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                counts, total, count = value
+                buckets = self._descriptions.get(name, (None, None, DEFAULT_BUCKETS))[2]
+                cumulative = 0
+                for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                    cumulative += bucket_count
+                    le = bound if bound == "+Inf" else _format_value(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(round(total, 6))}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
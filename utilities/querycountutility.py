@@ -0,0 +1,91 @@
+"""
+Per-request database query accounting.
+
+install(connection) adds one execute wrapper to a connection. It records into the
+QueryStats active in the current context (a ContextVar, so async views whose ORM calls
+run in a worker thread are counted too) and costs a single lookup when none is active.
+"""
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+_current: ContextVar["QueryStats | None"] = ContextVar("query_stats", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%s|\?|\d+)\s*,?)+\)", re.IGNORECASE)
+_SAVEPOINT = re.compile(r"^\s*(?:SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b", re.IGNORECASE)
+
+
+def statement_shape(sql: str) -> str:
+    """SQL with literals and IN lists collapsed, so repeats of one statement compare equal."""
+    if _SAVEPOINT.match(sql):
+        return "SAVEPOINT"
+    shape = _STRING_LITERAL.sub("?", sql)
+    shape = _IN_LIST.sub("IN (...)", shape)
+    return _NUMBER_LITERAL.sub("?", shape)
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, sql: str, duration: float, many: bool):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(sql) + (" [many]" if many else "")] += 1
+
+    def repeated(self, threshold: int = 2) -> list[tuple[str, int]]:
+        """Statement shapes run at least `threshold` times, most frequent first (N+1 suspects)."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold and shape != "SAVEPOINT"]
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 3)
+
+
+def _wrapper(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - started, many)
+
+
+def install(connection):
+    """Adds the counting wrapper to a connection once."""
+    if _wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_wrapper)
+
+
+def start() -> tuple[QueryStats, object]:
+    """Begins counting in the current context; pass the token to stop()."""
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def stop(token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Finished from another context (e.g. a stream closed by the server)
+        _current.set(None)
+
+
+def query_budget(max_queries: int):
+    """Marks a view with the number of queries one request may run (see QueryCountMiddleware)."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
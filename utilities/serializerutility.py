@@ -0,0 +1,106 @@
+"""
+JSON serialization for the API: values_list rows straight to bytes, and the
+{"status", "data"} envelope around already encoded data.
+
+orjson is used when it is installed (set JSON_BACKEND=json to force the standard
+library encoder). Both backends produce compact JSON and encode Decimal as a string.
+"""
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_json_encoder = json.JSONEncoder(default=_default, separators=(",", ":"))
+
+
+def _json_dumps(value) -> bytes:
+    return _json_encoder.encode(value).encode()
+
+
+def _orjson_dumps(value) -> bytes:
+    return orjson.dumps(value, default=_default)
+
+
+BACKEND = "orjson" if orjson is not None and os.getenv("JSON_BACKEND", "orjson") == "orjson" else "json"
+dumps = _orjson_dumps if BACKEND == "orjson" else _json_dumps
+
+
+# Field converters. Applied before encoding so every backend produces the same output.
+def decimal_str(value):
+    return str(value) if value is not None else None
+
+
+def isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+# orjson writes datetimes exactly like isoformat(), and faster than a Python call
+_NATIVE_CONVERTERS = {isoformat} if BACKEND == "orjson" else set()
+
+
+class RowSerializer:
+    """
+    Turns values_list tuples into JSON objects.
+
+    fields is a sequence of names or (name, converter) pairs, in the column order of the
+    tuples. The converters to apply are resolved to (column index, converter) pairs up
+    front, so serializing a row only converts those columns and zips the values with
+    the names. Converters the backend already applies natively are left out.
+    """
+
+    def __init__(self, fields):
+        self.fields = tuple((f, None) if isinstance(f, str) else tuple(f) for f in fields)
+        self.names = tuple(name for name, _ in self.fields)
+        self._converters = tuple(
+            (index, converter) for index, (_, converter) in enumerate(self.fields)
+            if converter is not None and converter not in _NATIVE_CONVERTERS
+        )
+
+    def to_dict(self, row) -> dict:
+        if not self._converters:
+            return dict(zip(self.names, row))
+        values = list(row)
+        for index, converter in self._converters:
+            values[index] = converter(values[index])
+        return dict(zip(self.names, values))
+
+    def dumps_row(self, row) -> bytes:
+        return dumps(self.to_dict(row))
+
+    def dumps_rows(self, rows) -> bytes:
+        to_dict = self.to_dict
+        return dumps([to_dict(row) for row in rows])
+
+
+def envelope(data: bytes, status: str = "ok") -> bytes:
+    """Wraps already encoded data in the API envelope without decoding it again."""
+    return b'{"status":"' + status.encode() + b'","data":' + data + b"}"
+
+
+class FastJsonResponse(HttpResponse):
+    """
+    JsonResponse replacement for the hot read paths.
+
+    Pass data to encode it with the configured backend, or raw= with bytes that are
+    already encoded (e.g. from RowSerializer). Either way the body is the API envelope.
+    """
+
+    def __init__(self, data=None, *, raw: bytes | None = None, status_label: str = "ok", **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        body = raw if raw is not None else dumps(data)
+        super().__init__(content=envelope(body, status_label), **kwargs)